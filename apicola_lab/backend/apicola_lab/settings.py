@@ -46,6 +46,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Health checks del balanceador: se responden sin pasar por el resto
+    "modelos.salud.SaludMiddleware",
+    # Antes que los demás, para medir también sus consultas
+    "modelos.instrumentacion.InstrumentacionMiddleware",
+    # Lecturas de reportes en la réplica, si DB_REPORTING_HOST está configurado
+    "modelos.replicas.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # CORS middleware
@@ -79,6 +85,24 @@ WSGI_APPLICATION = "apicola_lab.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Conexiones:
+# - DB_CONN_MAX_AGE: segundos que cada worker reutiliza su conexión entre
+#   requests (0: una conexión por request). CONN_HEALTH_CHECKS descarta antes
+#   de usarla una conexión que el servidor o el pooler cerraron.
+# - DB_STATEMENT_TIMEOUT_MS: corta las consultas que tardan más (0: sin
+#   límite). Las exportaciones y los lotes de reportes usan
+#   EXPORTACION_STATEMENT_TIMEOUT_MS, con SET LOCAL (ver modelos/conexiones.py).
+# - DB_POOLER=transaction: detrás de PgBouncer en modo transaction. PgBouncer
+#   rechaza el parámetro de conexión 'options', así que el timeout general se
+#   configura en el rol: ALTER ROLE <usuario> SET statement_timeout = '30s'.
+#   Además se desactivan los cursores del lado del servidor, que no
+#   sobreviven a un cambio de conexión del pooler (ver modelos/conexiones.py).
+# Con Django >= 5.1 y psycopg 3, OPTIONS['pool'] puede reemplazar a
+# CONN_MAX_AGE como pool dentro del proceso.
+DB_POOLER = os.getenv('DB_POOLER', '')
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+EXPORTACION_STATEMENT_TIMEOUT_MS = int(os.getenv('EXPORTACION_STATEMENT_TIMEOUT_MS', '600000'))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -87,11 +111,83 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', '123456lol'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'client_encoding': 'UTF8',
+            # Que una base caída saque rápido a la instancia de rotación (/health/ready)
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
         },
     }
 }
+if DB_POOLER == 'transaction':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+elif DB_STATEMENT_TIMEOUT_MS:
+    DATABASES['default']['OPTIONS']['options'] = f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'
+
+# Réplica de lectura para estadísticas, exportaciones y reportes (ver
+# modelos/replicas.py). Sin DB_REPORTING_HOST todo se lee de 'default'.
+if os.getenv('DB_REPORTING_HOST'):
+    DATABASES['reporting'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPORTING_NAME', DATABASES['default']['NAME']),
+        'USER': os.getenv('DB_REPORTING_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DB_REPORTING_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.getenv('DB_REPORTING_HOST'),
+        'PORT': os.getenv('DB_REPORTING_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['modelos.replicas.RouterReplica']
+
+# Segundos que un cliente lee de 'default' después de escribir, para ver sus
+# propios cambios aunque la réplica venga atrasada
+REPLICA_STICKY_SEGUNDOS = int(os.getenv('REPLICA_STICKY_SEGUNDOS', '10'))
+# Vencimiento máximo en caché de lo calculado desde la réplica (tablero)
+REPLICA_CACHE_TTL = int(os.getenv('REPLICA_CACHE_TTL', '60'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Con varios workers (gunicorn) la caché tiene que ser compartida: con
+# REDIS_URL=redis://redis:6379/1 se usa Redis (requiere el paquete redis), y
+# CACHE_BACKEND/CACHE_LOCATION permiten elegir otro backend. Sin ninguno se
+# usa LocMemCache, en la que cada proceso tiene la suya: el tablero de
+# estadísticas no se guarda en caché (ver DashboardService, X-Cache-Age
+# siempre 0) y las marcas de ReplicaMiddleware solo valen en el worker que
+# atendió la escritura. Sirve para desarrollo, no para producción.
+REDIS_URL = os.getenv('REDIS_URL', '')
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', (
+            'django.core.cache.backends.redis.RedisCache' if REDIS_URL
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        )),
+        'LOCATION': os.getenv('CACHE_LOCATION', REDIS_URL or 'apicola-lab'),
+    }
+}
+
+# Segundos que se reutiliza el resultado de /health/ready (ver modelos/salud.py)
+SALUD_TTL = float(os.getenv('SALUD_TTL', '5'))
+SALUD_TTL_FALLA = float(os.getenv('SALUD_TTL_FALLA', '1'))
+
+# Segundos que se conservan en caché las estadísticas del tablero
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '300'))
+
+# Reportes PDF: directorio de la caché en disco y procesos para renderizar lotes grandes
+REPORTES_PDF_DIR = os.getenv('REPORTES_PDF_DIR', os.path.join(BASE_DIR, 'reportes_cache'))
+REPORTES_PDF_WORKERS = int(os.getenv('REPORTES_PDF_WORKERS', str(os.cpu_count() or 1)))
+REPORTES_PDF_PARALELO_DESDE = int(os.getenv('REPORTES_PDF_PARALELO_DESDE', '8'))
+# Poda de la caché de reportes: días sin usar y tamaño máximo del directorio
+REPORTES_PDF_MAX_DIAS = int(os.getenv('REPORTES_PDF_MAX_DIAS', '30'))
+REPORTES_PDF_MAX_MB = int(os.getenv('REPORTES_PDF_MAX_MB', '500'))
+
+# Instrumentación de requests (modelos/instrumentacion.py): IPs que pueden leer /metrics
+# y si pasarse de presupuesto_consultas levanta una excepción (en tests y CI) o solo se registra
+METRICAS_IPS = os.getenv('METRICAS_IPS', '127.0.0.1,::1').split(',')
+PRESUPUESTO_CONSULTAS_ESTRICTO = os.getenv('PRESUPUESTO_CONSULTAS_ESTRICTO', '').lower() in ('1', 'true')
 
 
 # Password validation
@@ -146,6 +242,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny', # Solo para desarrollo acordate de cambiar a IsAuthenticated.
     ),
+    # Todos los listados se paginan por cursor keyset sobre (created_at, id); ver modelos/pagination.py
+    'DEFAULT_PAGINATION_CLASS': 'modelos.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 100,
 }
 
 # CORS settings
@@ -154,6 +253,7 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
+CORS_EXPOSE_HEADERS = ['X-Cache-Age', 'Server-Timing']
 
 # API Documentation settings
 SPECTACULAR_SETTINGS = {
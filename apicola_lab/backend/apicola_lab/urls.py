@@ -26,14 +26,20 @@ from drf_spectacular.views import (
     SpectacularRedocView,
     SpectacularSwaggerView,
 )
-from modelos.views import health_check
+from modelos.salud import health_live, health_ready
+from modelos.views import metricas
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     
-    # Health check para AWS ALB
-    path('health/', health_check, name='health_check'),
+    # Health checks para AWS ALB; los responde antes SaludMiddleware (ver modelos/salud.py)
+    path('health/', health_live, name='health_check'),
+    path('health/live', health_live, name='health_live'),
+    path('health/ready', health_ready, name='health_ready'),
+
+    # Métricas de requests en formato Prometheus (ver modelos/instrumentacion.py)
+    path('metrics', metricas, name='metricas'),
     
     # JWT Authentication
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
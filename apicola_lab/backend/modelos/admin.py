@@ -6,6 +6,7 @@ from .models.MuestraTambor_model import MuestraTambor
 from .models.ContienePool_model import ContienePool
 from .models.AnalisisPalinologico_model import AnalisisPalinologico
 from .models.AnalisisFisicoQuimico_model import AnalisisFisicoQuimico
+from .models.ReglaClasificacion_model import ReglaClasificacion
 
 admin.site.register(Analista)
 admin.site.register(Pool)
@@ -13,4 +14,5 @@ admin.site.register(Especie)
 admin.site.register(MuestraTambor)
 admin.site.register(ContienePool)
 admin.site.register(AnalisisPalinologico)
-admin.site.register(AnalisisFisicoQuimico) 
\ No newline at end of file
+admin.site.register(AnalisisFisicoQuimico)
+admin.site.register(ReglaClasificacion)
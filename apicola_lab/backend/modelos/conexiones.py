@@ -0,0 +1,42 @@
+"""
+Lecturas largas con cursor del lado del servidor.
+
+QuerySet.iterator() en PostgreSQL abre un cursor con nombre. Fuera de una
+transacción Django lo declara WITH HOLD, y así sobrevive al commit pero
+queda atado a la conexión del servidor. Detrás de PgBouncer en modo
+transaction (DB_POOLER=transaction) cada sentencia puede ir por otra
+conexión, y el siguiente FETCH falla con "cursor does not exist".
+
+iterar() recorre el queryset dentro de una transacción: el cursor no es
+WITH HOLD y toda la lectura usa una sola conexión del pooler. También
+admite un statement_timeout propio con SET LOCAL, que vale solo para esa
+transacción y no queda en la conexión compartida. Así las exportaciones
+pueden superar el DB_STATEMENT_TIMEOUT_MS general.
+
+Con DB_POOLER=transaction los settings activan además
+DISABLE_SERVER_SIDE_CURSORS, como pide Django para PgBouncer en ese modo:
+ningún iterator() (incluidos los de fuera de iterar()) abre un cursor con
+nombre, y psycopg2 recibe el resultado completo antes de entregar la
+primera fila. Las exportaciones siguen saliendo por partes hacia el
+cliente, pero cada una ocupa en memoria el resultado de su consulta.
+"""
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+
+
+@contextmanager
+def transaccion_lectura(timeout_ms=None, using='default'):
+    """Transacción con statement_timeout propio (en milisegundos; 0 es sin límite)"""
+    with transaction.atomic(using=using):
+        conexion = connections[using]
+        if timeout_ms is not None and conexion.vendor == 'postgresql':
+            with conexion.cursor() as cursor:
+                cursor.execute(f'SET LOCAL statement_timeout = {int(timeout_ms)}')
+        yield conexion
+
+
+def iterar(queryset, chunk_size, timeout_ms=None):
+    """Filas del queryset con iterator(chunk_size), dentro de transaccion_lectura"""
+    with transaccion_lectura(timeout_ms, using=queryset.db):
+        yield from queryset.iterator(chunk_size=chunk_size)
@@ -0,0 +1,137 @@
+"""
+Búsquedas geográficas de apiarios sin PostGIS.
+
+Cada apiario guarda el geohash de sus coordenadas (ver Apiario.save). Un
+geohash es un texto en base 32 en el que cada carácter subdivide la celda
+anterior, así que los apiarios de una misma celda comparten prefijo: el
+índice B-tree sobre la columna sirve para filtrar por celda y para agrupar
+resultados por celda con Substr(geohash, 1, precisión).
+
+Las consultas por caja (bbox) y por radio usan el índice sobre
+(latitud, longitud); el radio se acota primero con la caja que lo contiene
+y después se filtra por la distancia exacta (haversine) calculada en SQL.
+"""
+import math
+
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Sin, Sqrt
+
+
+RADIO_TIERRA_KM = 6371.0088
+PRECISION_GEOHASH = 12
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def codificar_geohash(latitud, longitud, precision=PRECISION_GEOHASH):
+    """Geohash de un punto; None si falta alguna coordenada"""
+    if latitud is None or longitud is None:
+        return None
+    latitudes, longitudes = [-90.0, 90.0], [-180.0, 180.0]
+    latitud, longitud = float(latitud), float(longitud)
+    caracteres = []
+    bits = valor = 0
+    es_longitud = True
+    while len(caracteres) < precision:
+        intervalo, coordenada = (longitudes, longitud) if es_longitud else (latitudes, latitud)
+        medio = (intervalo[0] + intervalo[1]) / 2
+        valor <<= 1
+        if coordenada >= medio:
+            valor |= 1
+            intervalo[0] = medio
+        else:
+            intervalo[1] = medio
+        es_longitud = not es_longitud
+        bits += 1
+        if bits == 5:
+            caracteres.append(_BASE32[valor])
+            bits = valor = 0
+    return ''.join(caracteres)
+
+
+def caja_geohash(geohash):
+    """Caja (lat_min, lon_min, lat_max, lon_max) que cubre la celda"""
+    latitudes, longitudes = [-90.0, 90.0], [-180.0, 180.0]
+    es_longitud = True
+    for caracter in geohash:
+        valor = _BASE32.index(caracter)
+        for desplazamiento in range(4, -1, -1):
+            intervalo = longitudes if es_longitud else latitudes
+            medio = (intervalo[0] + intervalo[1]) / 2
+            if valor >> desplazamiento & 1:
+                intervalo[0] = medio
+            else:
+                intervalo[1] = medio
+            es_longitud = not es_longitud
+    return latitudes[0], longitudes[0], latitudes[1], longitudes[1]
+
+
+def caja_radio(latitud, longitud, radio_km):
+    """
+    Caja (lat_min, lon_min, lat_max, lon_max) que contiene el círculo
+
+    Cerca de los polos, o si el círculo cruza el antimeridiano, la caja
+    abarca todas las longitudes.
+    """
+    delta_latitud = math.degrees(radio_km / RADIO_TIERRA_KM)
+    lat_min, lat_max = latitud - delta_latitud, latitud + delta_latitud
+    if lat_min <= -90 or lat_max >= 90:
+        return max(lat_min, -90.0), -180.0, min(lat_max, 90.0), 180.0
+    razon = math.sin(radio_km / RADIO_TIERRA_KM) / math.cos(math.radians(latitud))
+    if radio_km >= RADIO_TIERRA_KM * math.pi / 2 or razon >= 1:
+        return lat_min, -180.0, lat_max, 180.0
+    delta_longitud = math.degrees(math.asin(razon))
+    lon_min, lon_max = longitud - delta_longitud, longitud + delta_longitud
+    if lon_min < -180 or lon_max > 180:
+        return lat_min, -180.0, lat_max, 180.0
+    return lat_min, lon_min, lat_max, lon_max
+
+
+def distancia_km(latitud, longitud):
+    """Expresión SQL con la distancia (haversine) de cada fila al punto, en km"""
+    lat = Radians(Cast(F('latitud'), FloatField()))
+    lon = Radians(Cast(F('longitud'), FloatField()))
+    latitud, longitud = math.radians(latitud), math.radians(longitud)
+    seno_lat = Power(Sin((lat - latitud) / 2), 2)
+    seno_lon = Power(Sin((lon - longitud) / 2), 2)
+    # Least: el redondeo puede dejar el argumento apenas por encima de 1
+    raiz = Least(Sqrt(seno_lat + math.cos(latitud) * Cos(lat) * seno_lon), 1.0)
+    return 2 * RADIO_TIERRA_KM * ASin(raiz, output_field=FloatField())
+
+
+def q_caja(caja, prefijo=''):
+    """
+    Condición de la caja (lat_min, lon_min, lat_max, lon_max) sobre las
+    columnas latitud/longitud de la relación indicada por el prefijo
+
+    Es un solo Q para usarlo en un único filter(): en relaciones
+    muchos-a-muchos cada filter() agrega su propio JOIN. Si lon_min > lon_max
+    la caja cruza el antimeridiano.
+    """
+    lat_min, lon_min, lat_max, lon_max = caja
+    condicion = Q(**{f'{prefijo}latitud__range': (lat_min, lat_max)})
+    if lon_min <= lon_max:
+        return condicion & Q(**{f'{prefijo}longitud__range': (lon_min, lon_max)})
+    return condicion & (Q(**{f'{prefijo}longitud__gte': lon_min}) | Q(**{f'{prefijo}longitud__lte': lon_max}))
+
+
+def parsear_bbox(valor):
+    """'lon_min,lat_min,lon_max,lat_max' (orden GeoJSON) -> (lat_min, lon_min, lat_max, lon_max)"""
+    partes = [float(parte) for parte in valor.split(',')]
+    if len(partes) != 4:
+        raise ValueError('bbox debe tener cuatro números')
+    lon_min, lat_min, lon_max, lat_max = partes
+    # lon_min > lon_max es válido: la caja cruza el antimeridiano
+    if not (-90 <= lat_min <= lat_max <= 90 and -180 <= lon_min <= 180 and -180 <= lon_max <= 180):
+        raise ValueError('bbox fuera de rango')
+    return lat_min, lon_min, lat_max, lon_max
+
+
+def parsear_punto(valor):
+    """'lat,lon' -> (lat, lon)"""
+    partes = [float(parte) for parte in valor.split(',')]
+    if len(partes) != 2:
+        raise ValueError('near debe tener latitud y longitud')
+    latitud, longitud = partes
+    if not (-90 <= latitud <= 90 and -180 <= longitud <= 180):
+        raise ValueError('near fuera de rango')
+    return latitud, longitud
@@ -0,0 +1,333 @@
+"""
+Instrumentación de requests: consultas SQL, tiempos y tamaño de respuesta.
+
+InstrumentacionMiddleware mide cada request y publica el resultado en la
+cabecera Server-Timing (visible en la pestaña de red del navegador):
+
+    Server-Timing: db;dur=12.4;desc="7 consultas", app;dur=30.1,
+                   serializacion;dur=4.2, total;dur=46.7
+
+- db: tiempo dentro del driver de la base, y cantidad de consultas
+- serializacion: render de la respuesta (datos -> JSON)
+- app: el resto del tiempo de la vista, incluido el to_representation de
+  los serializers de DRF, que corre dentro de la vista al leer .data
+- total: desde que el middleware recibe el request hasta que tiene la respuesta
+
+Los acumulados por vista se exponen en formato de texto de Prometheus en
+/metrics (solo desde METRICAS_IPS). El registro es por proceso: con varios
+workers de gunicorn, cada uno publica los suyos.
+
+Cada viewset puede declarar cuántas consultas admite por acción:
+
+    presupuesto_consultas = {'list': 2, 'retrieve': 2, '*': 10}
+
+Si lo que cuesta un request depende de sus parámetros (?expand= en
+SparseFieldsViewSetMixin), la vista suma las consultas adicionales con
+consultas_adicionales(request, accion).
+
+Los presupuestos de modelos/views.py son las consultas medidas en un request
+anónimo más una: la búsqueda del usuario de JWTAuthentication. No dependen
+de la cantidad de filas, así que un N+1 los supera en cuanto la página trae
+más de un par de filas.
+
+Un request que se pasa del presupuesto se cuenta en
+apicola_presupuesto_excedido_total y se registra en el log, con el SQL de
+las consultas que lo superaron (el de todas con DEBUG o en modo estricto;
+si no, las consultas solo se cuentan). Con
+PRESUPUESTO_CONSULTAS_ESTRICTO = True levanta PresupuestoExcedido, que el
+cliente de pruebas de Django propaga, así un N+1 nuevo hace fallar los tests
+(ver también el comando verificar_presupuestos).
+
+Las respuestas en streaming hacen sus consultas mientras se envían: se
+siguen midiendo hasta terminar el cuerpo, y recién entonces se registran y
+se comparan con el presupuesto (en modo estricto, la excepción la recibe
+quien lee el cuerpo). Server-Timing sale con los encabezados, así que en
+ellas solo cuenta lo hecho antes de empezar a enviar.
+"""
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_DURACION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class PresupuestoExcedido(AssertionError):
+    """Un request hizo más consultas que las declaradas en presupuesto_consultas"""
+
+
+class Medicion:
+    """
+    Consultas y tiempos de un request (o de un bloque medido con medir())
+
+    El texto SQL se guarda en `sentencias` solo si se pide (DEBUG, modo
+    estricto, verificar_presupuestos) o, con un `limite` fijado, para las
+    consultas que lo superan: en producción cada consulta solo se cuenta.
+    """
+
+    def __init__(self, sentencias=False):
+        self.inicio = time.perf_counter()
+        self.fin = None
+        self.consultas = 0
+        self.tiempo_bd = 0.0
+        self.tiempo_serializacion = 0.0
+        self.bytes = None
+        self.guardar_sentencias = sentencias
+        self.limite = None
+        self.sentencias = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # Envoltorio de connection.execute_wrapper: cuenta y cronometra cada consulta
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo_bd += time.perf_counter() - inicio
+            self.consultas += 1
+            if self.guardar_sentencias or (self.limite is not None and self.consultas > self.limite):
+                self.sentencias.append(sql)
+
+    @property
+    def total(self):
+        return (self.fin or time.perf_counter()) - self.inicio
+
+    @property
+    def tiempo_app(self):
+        return max(self.total - self.tiempo_bd - self.tiempo_serializacion, 0.0)
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.tiempo_bd * 1000:.1f};desc="{self.consultas} consultas"',
+            f'app;dur={self.tiempo_app * 1000:.1f}',
+            f'serializacion;dur={self.tiempo_serializacion * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ])
+
+
+@contextmanager
+def medir(sentencias=False):
+    """
+    Mide las consultas de un bloque, en todas las bases configuradas
+
+        with medir(sentencias=True) as medicion:
+            client.get('/api/pools/')
+        assert medicion.consultas <= 3, medicion.sentencias
+    """
+    medicion = Medicion(sentencias)
+    try:
+        with _contando(medicion):
+            yield medicion
+    finally:
+        medicion.fin = time.perf_counter()
+
+
+@contextmanager
+def _contando(medicion):
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(medicion))
+        yield
+
+
+def contenido(response):
+    """Cuerpo de la respuesta; en las de streaming lo lee, con las consultas que haga"""
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def presupuesto(vista, accion, request=None):
+    """Consultas permitidas para la acción de la vista (clase), o None si no declara"""
+    declarado = getattr(vista, 'presupuesto_consultas', None)
+    if isinstance(declarado, dict):
+        declarado = declarado.get(accion, declarado.get('*'))
+    adicionales = getattr(vista, 'consultas_adicionales', None)
+    if declarado is not None and request is not None and adicionales is not None:
+        declarado += adicionales(request, accion)
+    return declarado
+
+
+def _vista_y_accion(view_func, metodo):
+    """Clase de la vista y acción de DRF (list, retrieve, ...) o el método HTTP"""
+    vista = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    acciones = getattr(view_func, 'actions', None) or {}
+    return vista, acciones.get(metodo.lower(), metodo.lower())
+
+
+class RegistroMetricas:
+    """Acumulados por vista y método, en memoria del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self._requests = {}
+            self._series = {}
+            self._excedidos = {}
+
+    def registrar(self, vista, metodo, estado, medicion):
+        with self._lock:
+            clave_estado = (vista, metodo, str(estado))
+            self._requests[clave_estado] = self._requests.get(clave_estado, 0) + 1
+            serie = self._series.get((vista, metodo))
+            if serie is None:
+                serie = self._series[(vista, metodo)] = {
+                    'duracion': [0] * len(BUCKETS_DURACION),
+                    'duracion_suma': 0.0,
+                    'consultas': [0] * len(BUCKETS_CONSULTAS),
+                    'consultas_suma': 0,
+                    'cantidad': 0,
+                    'db': 0.0,
+                    'serializacion': 0.0,
+                    'bytes': 0,
+                }
+            serie['cantidad'] += 1
+            serie['duracion_suma'] += medicion.total
+            serie['consultas_suma'] += medicion.consultas
+            serie['db'] += medicion.tiempo_bd
+            serie['serializacion'] += medicion.tiempo_serializacion
+            serie['bytes'] += medicion.bytes or 0
+            for i, limite in enumerate(BUCKETS_DURACION):
+                if medicion.total <= limite:
+                    serie['duracion'][i] += 1
+            for i, limite in enumerate(BUCKETS_CONSULTAS):
+                if medicion.consultas <= limite:
+                    serie['consultas'][i] += 1
+
+    def registrar_exceso(self, vista, accion):
+        with self._lock:
+            self._excedidos[(vista, accion)] = self._excedidos.get((vista, accion), 0) + 1
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus (version 0.0.4)"""
+        with self._lock:
+            lineas = [
+                '# HELP apicola_http_requests_total Requests atendidos',
+                '# TYPE apicola_http_requests_total counter',
+            ]
+            for (vista, metodo, estado), valor in sorted(self._requests.items()):
+                lineas.append(f'apicola_http_requests_total{_etiquetas(vista=vista, metodo=metodo, estado=estado)} {valor}')
+
+            for nombre, campo, buckets, ayuda in (
+                ('apicola_http_duracion_segundos', 'duracion', BUCKETS_DURACION, 'Duración de los requests'),
+                ('apicola_http_consultas', 'consultas', BUCKETS_CONSULTAS, 'Consultas SQL por request'),
+            ):
+                lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} histogram']
+                for (vista, metodo), serie in sorted(self._series.items()):
+                    for limite, valor in zip(buckets, serie[campo]):
+                        etiquetas = _etiquetas(vista=vista, metodo=metodo, le=limite)
+                        lineas.append(f'{nombre}_bucket{etiquetas} {valor}')
+                    etiquetas = _etiquetas(vista=vista, metodo=metodo)
+                    lineas += [
+                        f'{nombre}_bucket{_etiquetas(vista=vista, metodo=metodo, le="+Inf")} {serie["cantidad"]}',
+                        f'{nombre}_sum{etiquetas} {serie[campo + "_suma"]}',
+                        f'{nombre}_count{etiquetas} {serie["cantidad"]}',
+                    ]
+
+            for nombre, campo, ayuda in (
+                ('apicola_http_db_segundos_total', 'db', 'Tiempo en la base de datos'),
+                ('apicola_http_serializacion_segundos_total', 'serializacion', 'Tiempo de render de las respuestas'),
+                ('apicola_http_respuesta_bytes_total', 'bytes', 'Bytes de respuesta (sin streaming)'),
+            ):
+                lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} counter']
+                for (vista, metodo), serie in sorted(self._series.items()):
+                    lineas.append(f'{nombre}{_etiquetas(vista=vista, metodo=metodo)} {serie[campo]}')
+
+            lineas += [
+                '# HELP apicola_presupuesto_excedido_total Requests por encima de presupuesto_consultas',
+                '# TYPE apicola_presupuesto_excedido_total counter',
+            ]
+            for (vista, accion), valor in sorted(self._excedidos.items()):
+                lineas.append(f'apicola_presupuesto_excedido_total{_etiquetas(vista=vista, accion=accion)} {valor}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _etiquetas(**valores):
+    partes = []
+    for nombre, valor in valores.items():
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{nombre}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+
+registro = RegistroMetricas()
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide cada request (ver la documentación del módulo)
+
+    Va antes que los demás middlewares (solo lo precede SaludMiddleware, que
+    responde los health checks sin medirlos) para que la medición incluya
+    las consultas de sesión y autenticación.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        estricto = getattr(settings, 'PRESUPUESTO_CONSULTAS_ESTRICTO', False)
+        with medir(sentencias=settings.DEBUG or estricto) as medicion:
+            request._medicion = medicion
+            response = self.get_response(request)
+        response['Server-Timing'] = medicion.server_timing()
+        if response.streaming:
+            response.streaming_content = self._medir_streaming(
+                request, response, response.streaming_content, medicion
+            )
+        else:
+            medicion.bytes = len(response.content)
+            self._registrar(request, response, medicion)
+        return response
+
+    def _medir_streaming(self, request, response, cuerpo, medicion):
+        with _contando(medicion):
+            yield from cuerpo
+        medicion.fin = time.perf_counter()
+        self._registrar(request, response, medicion)
+
+    def _registrar(self, request, response, medicion):
+        match = getattr(request, 'resolver_match', None)
+        nombre = (match.view_name or match._func_path) if match else 'sin_ruta'
+        registro.registrar(nombre, request.method, response.status_code, medicion)
+
+        vista, accion = getattr(request, '_vista_instrumentada', (None, None))
+        limite = medicion.limite
+        if limite is not None and medicion.consultas > limite:
+            registro.registrar_exceso(nombre, accion)
+            mensaje = (
+                f"{request.method} {request.path} ({vista.__name__}.{accion}) hizo "
+                f"{medicion.consultas} consultas; presupuesto_consultas: {limite}\n"
+                + '\n'.join(medicion.sentencias)
+            )
+            if getattr(settings, 'PRESUPUESTO_CONSULTAS_ESTRICTO', False):
+                raise PresupuestoExcedido(mensaje)
+            logger.warning(mensaje)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._vista_instrumentada = vista, accion = _vista_y_accion(view_func, request.method)
+        medicion = getattr(request, '_medicion', None)
+        if medicion is not None and vista is not None:
+            # Desde acá se guarda el texto de las consultas que superen el presupuesto
+            medicion.limite = presupuesto(vista, accion, request)
+
+    def process_template_response(self, request, response):
+        # Es el último middleware en ver la respuesta antes del render
+        medicion = getattr(request, '_medicion', None)
+        if medicion is not None:
+            inicio = time.perf_counter()
+
+            def fin_render(response):
+                medicion.tiempo_serializacion += time.perf_counter() - inicio
+
+            response.add_post_render_callback(fin_render)
+        return response
@@ -0,0 +1,233 @@
+"""
+Serialización de solo lectura sin la maquinaria de ModelSerializer.
+
+compilar(serializer_class) analiza una sola vez los campos de un
+ModelSerializer y devuelve un SerializerCompilado que arma la misma salida a
+partir de filas de values(): columnas propias, claves foráneas como id,
+serializers anidados por FK (resueltos con el mismo JOIN) y relaciones
+muchos-a-muchos con una consulta por relación.
+
+Si el serializer usa algo que no se puede reproducir (SerializerMethodField,
+source con puntos, un to_representation propio) compilar devuelve None y la
+vista sigue por el camino normal de DRF. Los ModelSerializer se siguen usando
+para validar las escrituras.
+"""
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+from .serializers import AnotacionesSerializerMixin
+
+
+# Campos cuyo to_representation no cambia el valor que devuelve la base
+_SIN_CONVERSION = (serializers.IntegerField, serializers.CharField, serializers.BooleanField)
+
+# Campos escalares que se pueden convertir con su propio to_representation
+_ESCALARES = (
+    serializers.IntegerField, serializers.CharField, serializers.BooleanField,
+    serializers.FloatField, serializers.DecimalField, serializers.DateField,
+    serializers.DateTimeField, serializers.TimeField, serializers.ChoiceField,
+    serializers.JSONField, serializers.UUIDField,
+)
+
+_REPRESENTACIONES_ESTANDAR = (
+    serializers.Serializer.to_representation,
+    AnotacionesSerializerMixin.to_representation,
+)
+
+COLUMNA, FECHA_HORA, FK, ANIDADO, IDS, LISTA = range(6)
+
+
+class SerializerCompilado:
+    """Arma la salida de un serializer a partir de filas de values()"""
+
+    def __init__(self, model, campos):
+        self.model = model
+        self.pk = model._meta.pk.name
+        self.campos = campos
+
+    def columnas(self, prefijo=''):
+        """Columnas de values() que necesita el serializer (y sus anidados por FK)"""
+        columnas = [prefijo + self.pk]
+        for _, tipo, dato in self.campos:
+            if tipo in (COLUMNA, FECHA_HORA, FK):
+                columna = prefijo + dato[0]
+                if columna not in columnas:
+                    columnas.append(columna)
+            elif tipo == ANIDADO:
+                source, hijo = dato
+                columnas += hijo.columnas(f'{prefijo}{source}__')
+        return columnas
+
+    def convertidores(self):
+        """Conversión de cada columna propia, por nombre de campo"""
+        convertidores = {}
+        for nombre, tipo, dato in self.campos:
+            if tipo in (COLUMNA, FK):
+                convertidores[nombre] = dato[1]
+            elif tipo == FECHA_HORA:
+                convertidores[nombre] = dato[1].to_representation
+        return convertidores
+
+    def serializar(self, filas, anotaciones=()):
+        lote = _Lote()
+        datos = []
+        for fila in filas:
+            data = self._armar(fila, '', lote)
+            for nombre in anotaciones:
+                data[nombre] = fila[nombre]
+            datos.append(data)
+        lote.resolver()
+        return datos
+
+    def _armar(self, fila, prefijo, lote):
+        data = {}
+        for nombre, tipo, dato in self.campos:
+            if tipo in (COLUMNA, FK):
+                columna, convertir = dato
+                valor = fila[prefijo + columna]
+                data[nombre] = valor if valor is None or convertir is None else convertir(valor)
+            elif tipo == FECHA_HORA:
+                columna, field = dato
+                valor = fila[prefijo + columna]
+                data[nombre] = None if valor is None else _fecha_hora_iso(valor, lote.zona, field)
+            elif tipo == ANIDADO:
+                source, hijo = dato
+                sub = f'{prefijo}{source}__'
+                data[nombre] = None if fila[sub + hijo.pk] is None else hijo._armar(fila, sub, lote)
+            else:
+                # Se completa al final con una consulta por relación
+                data[nombre] = []
+                lote.pendientes[(self, nombre)].append((data, fila[prefijo + self.pk]))
+        return data
+
+    def _completar(self, nombre, pendientes, lote):
+        tipo, (campo_m2m, hijo) = next(
+            (tipo, dato) for campo, tipo, dato in self.campos if campo == nombre
+        )
+        por_padre = defaultdict(list)
+        for data, pk in pendientes:
+            por_padre[pk].append(data)
+
+        relacionado = campo_m2m.related_model
+        padre = campo_m2m.related_query_name()
+        columnas = [relacionado._meta.pk.name] if tipo == IDS else hijo.columnas()
+        filas = relacionado._default_manager.filter(**{f'{padre}__in': list(por_padre)}).values(
+            *columnas, padre_pk_=F(padre)
+        )
+        for fila in filas:
+            for data in por_padre[fila['padre_pk_']]:
+                if tipo == IDS:
+                    data[nombre].append(fila[columnas[0]])
+                else:
+                    data[nombre].append(hijo._armar(fila, '', lote))
+
+
+class _Lote:
+    """Relaciones muchos-a-muchos pendientes de una serialización"""
+
+    def __init__(self):
+        self.pendientes = defaultdict(list)
+        # Resolver la zona horaria activa es caro: se hace una vez por lote
+        self.zona = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def resolver(self):
+        # Los hijos armados pueden dejar a su vez relaciones pendientes
+        while self.pendientes:
+            (compilado, nombre), pendientes = self.pendientes.popitem()
+            compilado._completar(nombre, pendientes, self)
+
+
+def _fecha_hora_iso(valor, zona, field):
+    """Lo mismo que DateTimeField.to_representation en ISO 8601, con la zona ya resuelta"""
+    if zona is None or timezone.is_naive(valor):
+        return field.to_representation(valor)
+    valor = valor.astimezone(zona).isoformat()
+    return valor[:-6] + 'Z' if valor.endswith('+00:00') else valor
+
+
+def _campo_modelo(model, nombre):
+    try:
+        return model._meta.get_field(nombre)
+    except FieldDoesNotExist:
+        return None
+
+
+def _es_m2m_directo(campo):
+    return campo is not None and campo.many_to_many and not campo.auto_created
+
+
+def _es_fk_directa(campo):
+    return campo is not None and campo.concrete and (campo.many_to_one or campo.one_to_one)
+
+
+@lru_cache(maxsize=None)
+def compilar(serializer_class):
+    """SerializerCompilado equivalente a serializer_class, o None si no se puede compilar"""
+    if not issubclass(serializer_class, serializers.ModelSerializer):
+        return None
+    if serializer_class.to_representation not in _REPRESENTACIONES_ESTANDAR:
+        return None
+
+    model = serializer_class.Meta.model
+    campos = []
+    for nombre, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or '.' in field.source:
+            return None
+        campo = _campo_modelo(model, field.source)
+
+        if isinstance(field, ManyRelatedField):
+            hijo = field.child_relation
+            if not isinstance(hijo, PrimaryKeyRelatedField) or hijo.pk_field is not None:
+                return None
+            if not _es_m2m_directo(campo):
+                return None
+            campos.append((nombre, IDS, (campo, None)))
+        elif isinstance(field, serializers.ListSerializer):
+            hijo = compilar(type(field.child))
+            if hijo is None or not _es_m2m_directo(campo):
+                return None
+            campos.append((nombre, LISTA, (campo, hijo)))
+        elif isinstance(field, serializers.BaseSerializer):
+            hijo = compilar(type(field))
+            if hijo is None or not _es_fk_directa(campo):
+                return None
+            campos.append((nombre, ANIDADO, (field.source, hijo)))
+        elif isinstance(field, PrimaryKeyRelatedField):
+            if field.pk_field is not None or not _es_fk_directa(campo):
+                return None
+            campos.append((nombre, FK, (field.source, None)))
+        elif isinstance(field, _ESCALARES):
+            if campo is None or not campo.concrete or campo.is_relation:
+                return None
+            formato = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            if (
+                isinstance(field, serializers.DateTimeField)
+                and isinstance(formato, str) and formato.lower() == ISO_8601
+                and not hasattr(field, 'timezone')
+            ):
+                campos.append((nombre, FECHA_HORA, (field.source, field)))
+                continue
+            convertir = None if isinstance(field, _SIN_CONVERSION) else field.to_representation
+            campos.append((nombre, COLUMNA, (field.source, convertir)))
+        else:
+            return None
+
+    return SerializerCompilado(model, campos)
+
+
+@lru_cache(maxsize=None)
+def compilar_modelo(model):
+    """Serializer compilado con todos los campos del modelo, como fields = '__all__'"""
+    meta = type('Meta', (), {'model': model, 'fields': '__all__'})
+    serializer_class = type(f'{model.__name__}LecturaSerializer', (serializers.ModelSerializer,), {'Meta': meta})
+    return compilar(serializer_class)
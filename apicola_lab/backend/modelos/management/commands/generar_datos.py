@@ -0,0 +1,287 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from modelos.geo import codificar_geohash
+from modelos.models.Analista_model import Analista
+from modelos.models.Apicultor_model import Apicultor
+from modelos.models.Apiario_model import Apiario
+from modelos.models.MuestraTambor_model import MuestraTambor
+from modelos.models.TamborApiario_model import TamborApiario
+from modelos.models.Pool_model import Pool
+from modelos.models.ContienePool_model import ContienePool
+from modelos.models.Especie_model import Especie
+from modelos.models.AnalisisPalinologico_model import AnalisisPalinologico
+from modelos.models.AnalisisFisicoQuimico_model import AnalisisFisicoQuimico
+from modelos.models.ReglaClasificacion_model import ReglaClasificacion
+from modelos.services import ComposicionService, DashboardService, SerieFisicoQuimicaService
+
+
+PREFIJO = 'SIM'
+
+# Géneros frecuentes en mieles de la región pampeana, con su familia
+GENEROS = [
+    ('Eucalyptus', 'Myrtaceae'), ('Trifolium', 'Fabaceae'), ('Melilotus', 'Fabaceae'),
+    ('Lotus', 'Fabaceae'), ('Medicago', 'Fabaceae'), ('Helianthus', 'Asteraceae'),
+    ('Brassica', 'Brassicaceae'), ('Diplotaxis', 'Brassicaceae'), ('Echium', 'Boraginaceae'),
+    ('Carduus', 'Asteraceae'), ('Centaurea', 'Asteraceae'), ('Baccharis', 'Asteraceae'),
+    ('Prosopis', 'Fabaceae'), ('Salix', 'Salicaceae'), ('Citrus', 'Rutaceae'),
+    ('Schinus', 'Anacardiaceae'), ('Taraxacum', 'Asteraceae'), ('Glycine', 'Fabaceae'),
+    ('Gleditsia', 'Fabaceae'), ('Ligustrum', 'Oleaceae'), ('Tilia', 'Malvaceae'),
+    ('Sagittaria', 'Alismataceae'), ('Cirsium', 'Asteraceae'), ('Condalia', 'Rhamnaceae'),
+]
+LOCALIDADES = [
+    'Azul', 'Tandil', 'Olavarría', 'Tres Arroyos', 'Bahía Blanca', 'Pigüé', 'Coronel Suárez',
+    'Necochea', 'Balcarce', 'Lobería', 'Rauch', 'Ayacucho', 'Tapalqué', 'Benito Juárez',
+    'Laprida', 'General Alvarado', 'Coronel Pringles', 'Saladillo', 'Las Flores', 'Dolores',
+    'Chascomús', 'Gualeguaychú', 'Concepción del Uruguay', 'Victoria', 'Paraná', 'Rosario',
+    'Venado Tuerto', 'Pergamino', 'Junín', 'Trenque Lauquen',
+]
+# Color en escala Pfund (mm) y su frecuencia
+COLORES = np.array([8, 17, 34, 50, 85, 114, 140])
+PESOS_COLOR = np.array([0.05, 0.15, 0.30, 0.25, 0.15, 0.07, 0.03])
+# Umbrales propios (%) de las especies más frecuentes, en orden de frecuencia
+UMBRALES = [Decimal('70.00'), Decimal('60.00'), Decimal('45.00'), Decimal('45.00'), Decimal('30.00')]
+# Meses de cosecha (de octubre a abril) y su peso: el pico es en diciembre y enero
+MESES_COSECHA = [(10, 0.05), (11, 0.15), (12, 0.25), (1, 0.25), (2, 0.17), (3, 0.10), (4, 0.03)]
+MARCAS = np.array(['x', '#', '##'])
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un conjunto de datos sintético y reproducible para medir rendimiento '
+        '(ver rendimiento/ y el comando medir_rendimiento). Usar sobre una base dedicada.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apicultores', type=int, default=2000)
+        parser.add_argument('--apiarios', type=int, default=10000)
+        parser.add_argument('--tambores', type=int, default=500000)
+        parser.add_argument('--pools', type=int, default=100000)
+        parser.add_argument('--especies', type=int, default=400)
+        parser.add_argument('--especies-por-pool', type=float, default=25,
+                            help='Promedio de especies contadas por pool (análisis palinológicos por pool)')
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help='Exponente de la distribución de Zipf de las especies')
+        parser.add_argument('--analistas', type=int, default=20)
+        parser.add_argument('--temporadas', type=int, default=5)
+        parser.add_argument('--ultima-temporada', type=int, default=2025,
+                            help='Año en que termina la última temporada de cosecha')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if MuestraTambor.objects.filter(num_registro__startswith=f'{PREFIJO}-T').exists():
+            raise CommandError('La base ya tiene datos generados; usar una base nueva para que sean reproducibles')
+        self.rng = np.random.default_rng(options['semilla'])
+        self.batch_size = options['batch_size']
+        self.inicio = time.perf_counter()
+
+        analistas = self._analistas(options['analistas'])
+        especies = self._especies(options['especies'])
+        self._reglas(especies)
+        apiarios = self._apiarios(options['apicultores'], options['apiarios'])
+        tambores, fechas, tamanios, en_pool = self._tambores(
+            options['tambores'], options['pools'], apiarios, analistas,
+            options['ultima_temporada'], options['temporadas']
+        )
+        pool_ids = self._pools(
+            tambores, fechas, tamanios, en_pool, analistas, especies, options['especies_por_pool'], options['zipf']
+        )
+        self._derivados(pool_ids, especies)
+        self._informar('Listo')
+
+    def _informar(self, mensaje):
+        self.stdout.write(f"[{time.perf_counter() - self.inicio:7.1f}s] {mensaje}")
+
+    def _analistas(self, cantidad):
+        analistas = Analista.objects.bulk_create([
+            Analista(
+                nombres=f'Analista {i + 1}', apellidos=PREFIJO,
+                username=f'{PREFIJO.lower()}-analista-{i + 1:03d}', password='!'
+            ) for i in range(cantidad)
+        ])
+        return np.array([analista.id for analista in analistas])
+
+    def _especies(self, cantidad):
+        """Especies ordenadas por frecuencia: la primera es la más común (rango 1 de Zipf)"""
+        orden = self.rng.permutation(cantidad)
+        nuevas = []
+        for i in orden:
+            genero, familia = GENEROS[i % len(GENEROS)]
+            nuevas.append(Especie(
+                nombre_cientifico=f'{genero} {PREFIJO.lower()}{i + 1:04d}', familia=familia
+            ))
+        especies = Especie.objects.bulk_create(nuevas)
+        self._informar(f'{len(especies)} especies')
+        return np.array([especie.id for especie in especies])
+
+    def _reglas(self, especies):
+        ReglaClasificacion.objects.bulk_create([
+            ReglaClasificacion(especie_id=especie_id, umbral=umbral)
+            for especie_id, umbral in zip(especies.tolist(), UMBRALES)
+        ])
+
+    def _apiarios(self, cant_apicultores, cant_apiarios):
+        apicultores = Apicultor.objects.bulk_create([
+            Apicultor(nombre=f'Apicultor {i + 1}', apellido=PREFIJO) for i in range(cant_apicultores)
+        ])
+        apicultor_ids = np.array([apicultor.id for apicultor in apicultores])
+
+        # Apiarios agrupados alrededor de su localidad, en el sudeste bonaerense y el litoral
+        centros = np.column_stack([
+            self.rng.uniform(-39.0, -31.5, len(LOCALIDADES)), self.rng.uniform(-63.5, -58.0, len(LOCALIDADES))
+        ])
+        localidades = self.rng.integers(0, len(LOCALIDADES), cant_apiarios)
+        coordenadas = centros[localidades] + self.rng.normal(0, 0.15, (cant_apiarios, 2))
+        duenios = apicultor_ids[self.rng.integers(0, len(apicultor_ids), cant_apiarios)]
+        colmenas = self.rng.integers(10, 400, cant_apiarios)
+
+        ids = []
+        for desde in range(0, cant_apiarios, self.batch_size):
+            lote = []
+            for i in range(desde, min(desde + self.batch_size, cant_apiarios)):
+                latitud = Decimal(f'{coordenadas[i, 0]:.6f}')
+                longitud = Decimal(f'{coordenadas[i, 1]:.6f}')
+                # bulk_create no llama a Apiario.save(): el geohash se calcula acá
+                lote.append(Apiario(
+                    apicultor_id=int(duenios[i]), nombre_apiario=f'{PREFIJO} Apiario {i + 1}',
+                    cant_colmenas=int(colmenas[i]), localidad=LOCALIDADES[localidades[i]],
+                    latitud=latitud, longitud=longitud, geohash=codificar_geohash(latitud, longitud),
+                ))
+            ids += [apiario.id for apiario in Apiario.objects.bulk_create(lote)]
+        self._informar(f'{cant_apicultores} apicultores, {cant_apiarios} apiarios')
+        return np.array(ids)
+
+    def _tambores(self, cantidad, cant_pools, apiarios, analistas, ultima_temporada, temporadas):
+        """
+        Tambores en orden cronológico, con su apiario y su análisis físico-químico
+
+        Returns:
+            tuple: (ids de tambores, fechas de extracción, tambores por pool,
+                    máscara de los tambores que van a un pool)
+        """
+        anios = ultima_temporada - self.rng.integers(0, temporadas, cantidad)
+        meses, pesos = zip(*MESES_COSECHA)
+        mes = np.array(meses)[self.rng.choice(len(meses), cantidad, p=pesos)]
+        # Octubre a diciembre son del año anterior al de fin de la temporada
+        anio = np.where(mes >= 10, anios - 1, anios)
+        dia = self.rng.integers(1, 29, cantidad)
+        fechas = sorted(date(int(a), int(m), int(d)) for a, m, d in zip(anio, mes, dia))
+
+        # Tambores que terminan en un pool: entre uno y cinco por pool
+        tamanios = self.rng.integers(1, 6, cant_pools)
+        if tamanios.sum() > cantidad:
+            raise CommandError(f'{cant_pools} pools necesitan unos {tamanios.sum()} tambores')
+        en_pool = np.zeros(cantidad, dtype=bool)
+        en_pool[self.rng.choice(cantidad, tamanios.sum(), replace=False)] = True
+
+        ids = np.zeros(cantidad, dtype=np.int64)
+        for desde in range(0, cantidad, self.batch_size):
+            hasta = min(desde + self.batch_size, cantidad)
+            n = hasta - desde
+            with transaction.atomic():
+                tambores = MuestraTambor.objects.bulk_create([
+                    MuestraTambor(
+                        num_registro=f'{PREFIJO}-T{i + 1:07d}',
+                        estado_analisis_palinologico=bool(en_pool[i]),
+                        fecha_de_extraccion=fechas[i],
+                    ) for i in range(desde, hasta)
+                ])
+                ids[desde:hasta] = [tambor.id for tambor in tambores]
+
+                # Uno de cada diez tambores mezcla miel de dos apiarios
+                relaciones = []
+                primeros = apiarios[self.rng.integers(0, len(apiarios), n)]
+                segundos = apiarios[self.rng.integers(0, len(apiarios), n)]
+                dobles = self.rng.random(n) < 0.1
+                for j in range(n):
+                    relaciones.append(TamborApiario(tambor_id=int(ids[desde + j]), apiario_id=int(primeros[j])))
+                    if dobles[j] and segundos[j] != primeros[j]:
+                        relaciones.append(TamborApiario(tambor_id=int(ids[desde + j]), apiario_id=int(segundos[j])))
+                TamborApiario.objects.bulk_create(relaciones)
+
+                # Ocho de cada diez tambores tienen análisis físico-químico
+                con_analisis = self.rng.random(n) < 0.8
+                humedades = np.clip(self.rng.normal(17.6, 1.1, n), 14, 22).round(1)
+                colores = COLORES[self.rng.choice(len(COLORES), n, p=PESOS_COLOR)]
+                demoras = self.rng.integers(7, 60, n)
+                quienes = analistas[self.rng.integers(0, len(analistas), n)]
+                AnalisisFisicoQuimico.objects.bulk_create([
+                    AnalisisFisicoQuimico(
+                        analista_id=int(quienes[j]), tambor_id=int(ids[desde + j]),
+                        humedad=Decimal(f'{humedades[j]:.2f}'), color=int(colores[j]),
+                        fecha_extraccion=fechas[desde + j],
+                        fecha_analisis=fechas[desde + j] + timedelta(days=int(demoras[j])),
+                    ) for j in range(n) if con_analisis[j]
+                ])
+            if hasta % (self.batch_size * 20) < self.batch_size or hasta == cantidad:
+                self._informar(f'{hasta} tambores')
+        return ids, fechas, tamanios, en_pool
+
+    def _pools(self, tambores, fechas, tamanios, en_pool, analistas, especies, especies_por_pool, exponente):
+        """Pools con tambores de fechas cercanas y conteos de especies con frecuencia de Zipf"""
+        # Los tambores están en orden cronológico: los consecutivos tienen fechas cercanas
+        grupos = np.split(np.flatnonzero(en_pool), np.cumsum(tamanios)[:-1])
+
+        probabilidades = 1.0 / np.arange(1, len(especies) + 1) ** exponente
+        probabilidades /= probabilidades.sum()
+        pools_por_lote = max(1, int(self.batch_size // max(especies_por_pool, 1)))
+
+        pool_ids = []
+        for desde in range(0, len(grupos), pools_por_lote):
+            lote = grupos[desde:desde + pools_por_lote]
+            n = len(lote)
+            pools = [
+                Pool(
+                    analista_id=int(analistas[self.rng.integers(0, len(analistas))]),
+                    fecha_analisis=max(fechas[i] for i in grupo) + timedelta(days=int(self.rng.integers(10, 90))),
+                    observaciones=f'{PREFIJO} generado',
+                ) for grupo in lote
+            ]
+            Pool.asignar_numeros_registro(pools)
+            with transaction.atomic():
+                pools = Pool.objects.bulk_create(pools)
+                ContienePool.objects.bulk_create([
+                    ContienePool(pool_id=pool.id, tambor_id=int(tambores[i]), fecha_asociacion=pool.fecha_analisis)
+                    for pool, grupo in zip(pools, lote) for i in grupo
+                ])
+
+                cantidades_especies = np.clip(self.rng.poisson(especies_por_pool, n), 1, len(especies))
+                totales = self.rng.integers(300, 1200, n)
+                analisis = []
+                for pool, k, total in zip(pools, cantidades_especies, totales):
+                    elegidas = self.rng.choice(len(especies), k, replace=False, p=probabilidades)
+                    # La primera elegida tiende a dominar: proporciones de Dirichlet decrecientes;
+                    # en tres de cada diez pools domina con claridad (mieles monoflorales)
+                    alfas = np.linspace(3.0, 0.3, k)
+                    if self.rng.random() < 0.3:
+                        alfas[0] = alfas.sum() * 1.5
+                    proporciones = self.rng.dirichlet(alfas)
+                    granos = np.maximum(self.rng.multinomial(total, proporciones), 1)
+                    marcas = self.rng.random(k) < 0.02
+                    analisis += [
+                        AnalisisPalinologico(
+                            pool_id=pool.id, especie_id=int(especies[e]), cantidad_granos=int(g),
+                            marca_especial=str(MARCAS[self.rng.integers(0, len(MARCAS))]) if marca else None,
+                        ) for e, g, marca in zip(elegidas, granos, marcas)
+                    ]
+                AnalisisPalinologico.objects.bulk_create(analisis, batch_size=self.batch_size)
+            pool_ids += [pool.id for pool in pools]
+            if (desde // pools_por_lote) % 20 == 0 or desde + n == len(grupos):
+                self._informar(f'{len(pool_ids)} pools')
+        return pool_ids
+
+    def _derivados(self, pool_ids, especies):
+        """bulk_create no dispara señales: las tablas derivadas se recalculan al final"""
+        for desde in range(0, len(pool_ids), 2000):
+            ComposicionService.recalcular_pools(pool_ids[desde:desde + 2000])
+        self._informar('Composiciones y clasificación recalculadas')
+        ComposicionService.recalcular_resumen_especies(especies.tolist())
+        SerieFisicoQuimicaService.reconstruir()
+        DashboardService.invalidar()
+        self._informar('Resúmenes por especie y series físico-químicas recalculados')
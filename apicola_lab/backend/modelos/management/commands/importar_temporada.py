@@ -0,0 +1,48 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from modelos.services import ImportacionTemporadaService
+
+
+class Command(BaseCommand):
+    help = 'Importa una temporada de tambores, apiarios y análisis físico-químicos desde un CSV o Excel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta al archivo .csv o .xlsx')
+        parser.add_argument('--batch-size', type=int, default=ImportacionTemporadaService.BATCH_SIZE,
+                            help='Filas validadas y guardadas por bloque')
+        parser.add_argument('--dry-run', action='store_true', help='Solo validar, sin guardar')
+        parser.add_argument('--reporte', help='Ruta del CSV con los errores por fila')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = ImportacionTemporadaService.importar(
+                    ImportacionTemporadaService.leer_filas(archivo, options['archivo']),
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if options['reporte']:
+            with open(options['reporte'], 'w', newline='', encoding='utf-8') as salida:
+                writer = csv.writer(salida)
+                writer.writerow(['fila', 'columna', 'error'])
+                for error in resultado['errores']:
+                    for columna, mensaje in error['errores'].items():
+                        writer.writerow([error['fila'], columna, mensaje])
+        else:
+            for error in resultado['errores']:
+                self.stderr.write(f"Fila {error['fila']}: {json.dumps(error['errores'], ensure_ascii=False)}")
+
+        resumen = (
+            f"{resultado['filas']} filas leídas, {len(resultado['errores'])} con errores. "
+            f"Tambores: {resultado['tambores_creados']}, asignaciones: {resultado['asignaciones_creadas']}, "
+            f"análisis: {resultado['analisis_creados']}"
+        )
+        if options['dry_run']:
+            resumen = f"[dry-run] {resumen}"
+        self.stdout.write(self.style.SUCCESS(resumen) if not resultado['errores'] else self.style.WARNING(resumen))
@@ -0,0 +1,131 @@
+import json
+import random
+import statistics
+import subprocess
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from modelos.instrumentacion import medir
+from rendimiento.escenarios import ESCENARIOS, preparar
+
+
+class Command(BaseCommand):
+    help = (
+        'Reproduce los escenarios del frontend (rendimiento/escenarios.py) en proceso e informa '
+        'latencia p50/p99 y consultas por request. Pensado para la base de generar_datos. '
+        'Para comparar corridas y fallar ante regresiones: pytest rendimiento/bench_escenarios.py '
+        '(pytest-benchmark, requirements-dev.txt)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escenario', action='append', choices=sorted(ESCENARIOS),
+                            help='Escenario a medir (se puede repetir); por defecto, todos')
+        parser.add_argument('--iteraciones', type=int, default=20)
+        parser.add_argument('--calentamiento', type=int, default=2,
+                            help='Iteraciones iniciales que no se miden (cachés, matriz de similitud)')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--historial',
+                            help='Archivo JSON Lines al que se agrega el resultado, para seguir la evolución')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            client = Client(raise_request_exception=False)
+            datos = self._ejecutar(client, preparar())
+            if not datos['pool_ids']:
+                raise CommandError('No hay pools con conteos: generar datos con manage.py generar_datos')
+
+            rng = random.Random(options['semilla'])
+            muestras = defaultdict(list)
+            for nombre in options['escenario'] or ESCENARIOS:
+                _, escenario = ESCENARIOS[nombre]
+                for iteracion in range(options['calentamiento'] + options['iteraciones']):
+                    destino = muestras if iteracion >= options['calentamiento'] else None
+                    self._ejecutar(client, escenario(datos, rng), destino, nombre)
+        finally:
+            teardown_test_environment()
+
+        resultados = self._resumir(muestras)
+        self._imprimir(resultados)
+        if options['historial']:
+            with open(options['historial'], 'a', encoding='utf-8') as salida:
+                salida.write(json.dumps({
+                    'fecha': timezone.now().isoformat(),
+                    'commit': self._commit(),
+                    'iteraciones': options['iteraciones'],
+                    'resultados': resultados,
+                }, ensure_ascii=False) + '\n')
+
+    def _ejecutar(self, client, escenario, muestras=None, nombre_escenario=None):
+        """Recorre el generador del escenario; devuelve lo que retorne (preparar devuelve los datos)"""
+        respuesta = None
+        while True:
+            try:
+                nombre, metodo, url, cuerpo = escenario.send(respuesta)
+            except StopIteration as fin:
+                return fin.value
+
+            with medir() as medicion:
+                if metodo == 'GET':
+                    response = client.get(url)
+                else:
+                    response = client.generic(metodo, url, json.dumps(cuerpo), content_type='application/json')
+                # Las respuestas en streaming hacen sus consultas mientras se leen
+                contenido = b''.join(response.streaming_content) if response.streaming else response.content
+            if response.status_code >= 400:
+                raise CommandError(f"{metodo} {url} respondió {response.status_code}: {contenido[:500]!r}")
+
+            clave = f"{nombre_escenario}: {metodo} {nombre}" if nombre_escenario else nombre
+            if muestras is not None:
+                muestras[clave].append((medicion.total, medicion.consultas, len(contenido)))
+            respuesta = json.loads(contenido) if contenido else None
+
+    def _resumir(self, muestras):
+        resultados = {}
+        for clave, valores in muestras.items():
+            tiempos = sorted(tiempo * 1000 for tiempo, _, _ in valores)
+            consultas = [cantidad for _, cantidad, _ in valores]
+            resultados[clave] = {
+                'n': len(valores),
+                'p50_ms': round(self._percentil(tiempos, 50), 2),
+                'p99_ms': round(self._percentil(tiempos, 99), 2),
+                'media_ms': round(statistics.fmean(tiempos), 2),
+                'consultas_media': round(statistics.fmean(consultas), 2),
+                'consultas_max': max(consultas),
+                'bytes_media': round(statistics.fmean(tamanio for _, _, tamanio in valores)),
+            }
+        return resultados
+
+    @staticmethod
+    def _percentil(ordenados, percentil):
+        """Percentil con interpolación lineal sobre valores ordenados"""
+        if len(ordenados) == 1:
+            return ordenados[0]
+        posicion = (len(ordenados) - 1) * percentil / 100
+        inferior = int(posicion)
+        superior = min(inferior + 1, len(ordenados) - 1)
+        return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+    def _imprimir(self, resultados):
+        ancho = max([len(clave) for clave in resultados] + [10])
+        self.stdout.write(
+            f"{'request':<{ancho}} {'n':>4} {'p50 ms':>9} {'p99 ms':>9} {'consultas':>9} {'máx':>5} {'KB':>9}"
+        )
+        for clave, fila in resultados.items():
+            self.stdout.write(
+                f"{clave:<{ancho}} {fila['n']:>4} {fila['p50_ms']:>9.1f} {fila['p99_ms']:>9.1f} "
+                f"{fila['consultas_media']:>9.1f} {fila['consultas_max']:>5} {fila['bytes_media'] / 1024:>9.1f}"
+            )
+
+    @staticmethod
+    def _commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
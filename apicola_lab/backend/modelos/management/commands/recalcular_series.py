@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from modelos.models.SerieFisicoQuimica_model import SerieFisicoQuimica
+from modelos.services import SerieFisicoQuimicaService
+
+
+class Command(BaseCommand):
+    help = 'Rearma la tabla de series físico-químicas (SerieFisicoQuimica) desde los análisis'
+
+    def handle(self, *args, **options):
+        SerieFisicoQuimicaService.reconstruir()
+        self.stdout.write(self.style.SUCCESS(
+            f"{SerieFisicoQuimica.objects.count()} filas de series recalculadas"
+        ))
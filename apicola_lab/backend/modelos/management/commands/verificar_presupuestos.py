@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from modelos.instrumentacion import PresupuestoExcedido, contenido, medir, presupuesto
+from modelos.models import Apicultor
+from modelos.urls import router
+
+
+# Acciones que exigen un parámetro: se les pasa el id de la primera fila del modelo
+PARAMETROS = {
+    'estadisticas_por_apicultor': ('apicultor', Apicultor),
+}
+
+
+def endpoints(page_size=50):
+    """
+    (viewset, accion, url) de list, retrieve y las acciones GET de cada
+    viewset del router, y los prefijos sin filas (sin ellas no hay detalle
+    que pedir ni N+1 que detectar)
+    """
+    pruebas, vacios = [], []
+    for prefijo, viewset, _ in router.registry:
+        primero = viewset.queryset.model.objects.order_by('pk').values_list('pk', flat=True).first()
+        pruebas.append((viewset, 'list', f'/api/{prefijo}/?page_size={page_size}'))
+        if primero is None:
+            vacios.append(prefijo)
+        else:
+            pruebas.append((viewset, 'retrieve', f'/api/{prefijo}/{primero}/'))
+        for extra in viewset.get_extra_actions():
+            if 'get' not in extra.mapping:
+                continue
+            if not extra.detail:
+                url = f'/api/{prefijo}/{extra.url_path}/'
+                if extra.__name__ in PARAMETROS:
+                    parametro, modelo = PARAMETROS[extra.__name__]
+                    url += f'?{parametro}={modelo.objects.order_by("pk").values_list("pk", flat=True).first()}'
+                pruebas.append((viewset, extra.__name__, url))
+            elif primero is not None:
+                pruebas.append((viewset, extra.__name__, f'/api/{prefijo}/{primero}/{extra.url_path}/'))
+    return pruebas, vacios
+
+
+class Command(BaseCommand):
+    help = (
+        'Recorre list, retrieve y las acciones GET de los viewsets del router y compara las consultas '
+        'de cada uno con su presupuesto_consultas; termina con error si alguno se pasa, no responde 200, '
+        'no declara presupuesto o no tiene filas para probar (para CI: cargar antes generar_datos)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=50,
+                            help='Filas por página de los listados: varias filas ponen en evidencia los N+1')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            # Un error en una vista se informa como respuesta 500 y se sigue con las demás
+            errores = self._verificar(Client(raise_request_exception=False), options['page_size'])
+        finally:
+            teardown_test_environment()
+        if errores:
+            raise CommandError(f"{errores} endpoint(s) sin verificar o por encima de su presupuesto_consultas")
+        self.stdout.write(self.style.SUCCESS('Todos los endpoints dentro de su presupuesto'))
+
+    def _verificar(self, client, page_size):
+        pruebas, vacios = endpoints(page_size)
+        errores = len(vacios)
+        for prefijo in vacios:
+            self.stdout.write(self.style.ERROR(f"{prefijo}: sin filas, no se puede detectar un N+1"))
+
+        for viewset, accion, url in pruebas:
+            limite = presupuesto(viewset, accion)
+            with medir(sentencias=True) as medicion:
+                response = client.get(url)
+                # Las respuestas en streaming consultan mientras se leen
+                try:
+                    contenido(response)
+                except PresupuestoExcedido:
+                    pass
+            linea = f"{viewset.__name__}.{accion}: {medicion.consultas} consultas (presupuesto: {limite})"
+            if response.status_code != 200:
+                errores += 1
+                self.stdout.write(self.style.ERROR(f"{linea} - respuesta {response.status_code}"))
+            elif limite is None:
+                errores += 1
+                self.stdout.write(self.style.ERROR(f"{linea} - sin presupuesto declarado"))
+            elif medicion.consultas > limite:
+                errores += 1
+                self.stdout.write(self.style.ERROR(linea))
+                for sql in medicion.sentencias:
+                    self.stdout.write(f"    {sql}")
+            else:
+                self.stdout.write(linea)
+        return errores
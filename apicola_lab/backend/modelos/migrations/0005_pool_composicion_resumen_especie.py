@@ -0,0 +1,99 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def poblar_tablas_derivadas(apps, schema_editor):
+    """Calcula la composición de cada pool y los totales por especie existentes"""
+    AnalisisPalinologico = apps.get_model('modelos', 'AnalisisPalinologico')
+    Especie = apps.get_model('modelos', 'Especie')
+    PoolComposicion = apps.get_model('modelos', 'PoolComposicion')
+    ResumenEspecie = apps.get_model('modelos', 'ResumenEspecie')
+
+    filas = AnalisisPalinologico.objects.order_by('pool_id', 'especie__nombre_cientifico').values_list(
+        'pool_id', 'especie_id', 'especie__nombre_cientifico', 'especie__nombre_comun', 'cantidad_granos'
+    )
+
+    def componer(pool_id, especies):
+        total_granos = sum(item['cantidad'] for item in especies)
+        for item in especies:
+            item['porcentaje'] = round(item['cantidad'] / total_granos * 100, 2) if total_granos > 0 else 0
+        return PoolComposicion(
+            pool_id=pool_id, total_granos=total_granos, num_especies=len(especies), especies=especies
+        )
+
+    composiciones = []
+    pool_actual, especies = None, []
+    for pool_id, especie_id, nombre_cientifico, nombre_comun, cantidad in filas.iterator(chunk_size=2000):
+        if pool_id != pool_actual:
+            if pool_actual is not None:
+                composiciones.append(componer(pool_actual, especies))
+            pool_actual, especies = pool_id, []
+        especies.append({
+            'especie_id': especie_id,
+            'especie': nombre_cientifico,
+            'nombre_comun': nombre_comun,
+            'cantidad': cantidad,
+        })
+        if len(composiciones) >= 1000:
+            PoolComposicion.objects.bulk_create(composiciones)
+            composiciones = []
+    if pool_actual is not None:
+        composiciones.append(componer(pool_actual, especies))
+    PoolComposicion.objects.bulk_create(composiciones)
+
+    totales = {
+        fila['especie_id']: fila
+        for fila in AnalisisPalinologico.objects.values('especie_id').annotate(
+            total_analisis=models.Count('id'), total_granos=models.Sum('cantidad_granos')
+        ).order_by()
+    }
+    ResumenEspecie.objects.bulk_create([
+        ResumenEspecie(
+            especie_id=especie_id,
+            total_analisis=totales.get(especie_id, {}).get('total_analisis', 0),
+            total_granos=totales.get(especie_id, {}).get('total_granos') or 0,
+        ) for especie_id in Especie.objects.values_list('id', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelos', '0004_muestratambor_estado_analisis_palinologico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoolComposicion',
+            fields=[
+                ('pool', models.OneToOneField(db_column='id_pool', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='composicion', serialize=False, to='modelos.pool')),
+                ('total_granos', models.IntegerField(default=0)),
+                ('num_especies', models.IntegerField(default=0)),
+                ('especies', models.JSONField(default=list, help_text='Lista ordenada por nombre científico con especie_id, especie, nombre_comun, cantidad y porcentaje')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Composición de Pool',
+                'verbose_name_plural': 'Composiciones de Pools',
+                'db_table': 'pool_composicion',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenEspecie',
+            fields=[
+                ('especie', models.OneToOneField(db_column='id_especie', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen', serialize=False, to='modelos.especie')),
+                ('total_analisis', models.IntegerField(default=0)),
+                ('total_granos', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Especie',
+                'verbose_name_plural': 'Resúmenes de Especies',
+                'db_table': 'resumen_especie',
+                'indexes': [models.Index(fields=['-total_analisis'], name='idx_resumen_especie_total')],
+            },
+        ),
+        migrations.RunPython(poblar_tablas_derivadas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelos', '0005_pool_composicion_resumen_especie'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analisisfisicoquimico',
+            index=models.Index(fields=['created_at', 'id'], name='idx_fq_created'),
+        ),
+        migrations.AddIndex(
+            model_name='analisispalinologico',
+            index=models.Index(fields=['created_at', 'id'], name='idx_analisis_created'),
+        ),
+        migrations.AddIndex(
+            model_name='analista',
+            index=models.Index(fields=['created_at', 'id'], name='idx_analista_created'),
+        ),
+        migrations.AddIndex(
+            model_name='apiario',
+            index=models.Index(fields=['created_at', 'id'], name='idx_apiarios_created'),
+        ),
+        migrations.AddIndex(
+            model_name='apicultor',
+            index=models.Index(fields=['created_at', 'id'], name='idx_apicultor_created'),
+        ),
+        migrations.AddIndex(
+            model_name='especie',
+            index=models.Index(fields=['created_at', 'id'], name='idx_especies_created'),
+        ),
+        migrations.AddIndex(
+            model_name='muestratambor',
+            index=models.Index(fields=['created_at', 'id'], name='idx_tambor_created'),
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['created_at', 'id'], name='idx_pool_created'),
+        ),
+    ]
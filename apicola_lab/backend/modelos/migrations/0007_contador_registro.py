@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:11
+
+from django.db import migrations, models
+
+
+def inicializar_contador_pool(apps, schema_editor):
+    """Arranca el contador de pools en el mayor número de registro numérico existente"""
+    Pool = apps.get_model('modelos', 'Pool')
+    ContadorRegistro = apps.get_model('modelos', 'ContadorRegistro')
+
+    ultimo = max(
+        (int(num) for num in Pool.objects.exclude(num_registro=None).values_list('num_registro', flat=True)
+         if num.isdigit()),
+        default=0
+    )
+    ContadorRegistro.objects.update_or_create(nombre='pool', defaults={'ultimo_valor': ultimo})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelos', '0006_indices_paginacion_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorRegistro',
+            fields=[
+                ('nombre', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('ultimo_valor', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Contador de Registro',
+                'verbose_name_plural': 'Contadores de Registro',
+                'db_table': 'contador_registro',
+            },
+        ),
+        migrations.RunPython(inicializar_contador_pool, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelos', '0007_contador_registro'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='poolcomposicion',
+            index=models.Index(fields=['updated_at'], name='idx_composicion_actualizada'),
+        ),
+    ]
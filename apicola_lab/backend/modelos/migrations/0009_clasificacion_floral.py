@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:55
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+from decimal import Decimal
+from itertools import groupby
+
+
+def clasificar_pools_existentes(apps, schema_editor):
+    """Clasifica los pools ya cargados con el umbral por defecto (todavía no hay reglas)"""
+    Pool = apps.get_model('modelos', 'Pool')
+    AnalisisPalinologico = apps.get_model('modelos', 'AnalisisPalinologico')
+
+    filas = AnalisisPalinologico.objects.filter(cantidad_granos__gt=0).filter(
+        models.Q(marca_especial__isnull=True) | models.Q(marca_especial='')
+    ).order_by('pool_id', 'especie_id').values_list('pool_id', 'especie_id', 'cantidad_granos')
+
+    pools = []
+    for pool_id, conteos in groupby(filas.iterator(chunk_size=2000), key=lambda fila: fila[0]):
+        conteos = list(conteos)
+        total = sum(cantidad for _, _, cantidad in conteos)
+        # Mayor cantidad; ante un empate, el menor especie_id
+        _, especie_id, cantidad = max(conteos, key=lambda fila: (fila[2], -fila[1]))
+        porcentaje = cantidad * 100 / total
+        pools.append(Pool(
+            id=pool_id,
+            tipo_floral='MONOFLORAL' if porcentaje > 45 else 'MULTIFLORAL',
+            especie_dominante_id=especie_id,
+            porcentaje_dominante=Decimal(porcentaje).quantize(Decimal('0.01')),
+        ))
+    Pool.objects.bulk_update(pools, ['tipo_floral', 'especie_dominante', 'porcentaje_dominante'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelos', '0008_indice_composicion_actualizada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReglaClasificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('umbral', models.DecimalField(decimal_places=2, help_text='Porcentaje de polen de la especie que debe superarse para que la miel sea monofloral', max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Regla de Clasificación',
+                'verbose_name_plural': 'Reglas de Clasificación',
+                'db_table': 'regla_clasificacion',
+            },
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='especie_dominante',
+            field=models.ForeignKey(blank=True, db_column='id_especie_dominante', editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pools_dominados', to='modelos.especie'),
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='porcentaje_dominante',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='tipo_floral',
+            field=models.CharField(blank=True, choices=[('MONOFLORAL', 'Monofloral'), ('MULTIFLORAL', 'Multifloral')], editable=False, max_length=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['tipo_floral', 'especie_dominante', 'fecha_analisis'], name='idx_pool_clasificacion'),
+        ),
+        migrations.AddField(
+            model_name='reglaclasificacion',
+            name='especie',
+            field=models.OneToOneField(db_column='id_especie', on_delete=django.db.models.deletion.CASCADE, related_name='regla_clasificacion', to='modelos.especie'),
+        ),
+        migrations.RunPython(clasificar_pools_existentes, migrations.RunPython.noop),
+    ]
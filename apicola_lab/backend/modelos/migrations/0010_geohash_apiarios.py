@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+from modelos.geo import codificar_geohash
+
+
+def calcular_geohash(apps, schema_editor):
+    Apiario = apps.get_model('modelos', 'Apiario')
+    apiarios = list(Apiario.objects.exclude(latitud=None).exclude(longitud=None).only('id', 'latitud', 'longitud'))
+    for apiario in apiarios:
+        apiario.geohash = codificar_geohash(apiario.latitud, apiario.longitud)
+    Apiario.objects.bulk_update(apiarios, ['geohash'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelos', '0009_clasificacion_floral'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apiario',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='apiario',
+            index=models.Index(fields=['latitud', 'longitud'], name='idx_apiarios_coordenadas'),
+        ),
+        migrations.RunPython(calcular_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelos', '0010_geohash_apiarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerieFisicoQuimica',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('agrupacion', models.CharField(choices=[('APIARIO', 'Apiario'), ('LOCALIDAD', 'Localidad'), ('APICULTOR', 'Apicultor'), ('TOTAL', 'Total')], max_length=10)),
+                ('clave', models.CharField(blank=True, max_length=100)),
+                ('periodo', models.CharField(choices=[('MES', 'Mes'), ('ANIO', 'Año')], max_length=4)),
+                ('inicio', models.DateField(help_text='Primer día del mes o del año')),
+                ('cantidad', models.IntegerField(default=0)),
+                ('cantidad_humedad', models.IntegerField(default=0)),
+                ('humedad_promedio', models.DecimalField(blank=True, decimal_places=3, max_digits=7, null=True)),
+                ('humedad_minima', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('humedad_maxima', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('humedad_p90', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('humedades', models.JSONField(default=dict, help_text='Histograma {humedad: cantidad de análisis}')),
+                ('colores', models.JSONField(default=dict, help_text='Distribución {color: cantidad de análisis}')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Serie Físico-Química',
+                'verbose_name_plural': 'Series Físico-Químicas',
+                'db_table': 'serie_fisicoquimica',
+                'indexes': [models.Index(fields=['agrupacion', 'periodo', 'inicio'], name='idx_serie_fq_inicio')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='seriefisicoquimica',
+            constraint=models.UniqueConstraint(fields=('agrupacion', 'periodo', 'clave', 'inicio'), name='uniq_serie_fisicoquimica'),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:30
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from itertools import groupby
+
+from django.db import migrations
+from django.utils import timezone
+
+
+CENTESIMO = Decimal('0.01')
+
+
+def percentil(valores, total, fraccion):
+    """Percentil con interpolación lineal sobre un histograma ordenado, como SerieFisicoQuimicaService"""
+    posicion = fraccion * (total - 1)
+    inferior = int(posicion)
+
+    def valor_en(rango):
+        acumulado = 0
+        for valor, veces in valores:
+            acumulado += veces
+            if rango < acumulado:
+                return valor
+        return valores[-1][0]
+
+    bajo = valor_en(inferior)
+    alto = valor_en(inferior + 1) if inferior + 1 < total else bajo
+    return (bajo + (alto - bajo) * (posicion - inferior)).quantize(CENTESIMO)
+
+
+def poblar_series(apps, schema_editor):
+    """Arma las series de los análisis físico-químicos ya cargados (como SerieFisicoQuimicaService.reconstruir)"""
+    AnalisisFisicoQuimico = apps.get_model('modelos', 'AnalisisFisicoQuimico')
+    SerieFisicoQuimica = apps.get_model('modelos', 'SerieFisicoQuimica')
+
+    # (agrupacion, periodo, clave, inicio) -> [cantidad, humedades, colores]
+    grupos = defaultdict(lambda: [0, defaultdict(int), defaultdict(int)])
+    filas = AnalisisFisicoQuimico.objects.exclude(fecha_extraccion=None).order_by('id').values_list(
+        'id', 'fecha_extraccion', 'humedad', 'color',
+        'tambor__apiarios__id', 'tambor__apiarios__localidad', 'tambor__apiarios__apicultor_id'
+    )
+    # Una fila por apiario del tambor: cada análisis cuenta una vez en cada grupo
+    for _, apiarios in groupby(filas.iterator(chunk_size=2000), key=lambda fila: fila[0]):
+        apiarios = list(apiarios)
+        _, fecha, humedad, color = apiarios[0][:4]
+        claves = {('TOTAL', '')}
+        for *_, apiario_id, localidad, apicultor_id in apiarios:
+            if apiario_id is None:
+                continue
+            claves |= {('APIARIO', str(apiario_id)), ('APICULTOR', str(apicultor_id))}
+            if localidad is not None:
+                claves.add(('LOCALIDAD', localidad))
+        for agrupacion, clave in claves:
+            for periodo, inicio in (('MES', fecha.replace(day=1)), ('ANIO', date(fecha.year, 1, 1))):
+                grupo = grupos[(agrupacion, periodo, clave, inicio)]
+                grupo[0] += 1
+                if humedad is not None:
+                    grupo[1][str(humedad.quantize(CENTESIMO))] += 1
+                if color is not None:
+                    grupo[2][str(color)] += 1
+
+    ahora = timezone.now()
+    series = []
+    for (agrupacion, periodo, clave, inicio), (cantidad, humedades, colores) in grupos.items():
+        valores = sorted((Decimal(valor), veces) for valor, veces in humedades.items())
+        cantidad_humedad = sum(veces for _, veces in valores)
+        serie = SerieFisicoQuimica(
+            agrupacion=agrupacion, clave=clave, periodo=periodo, inicio=inicio,
+            cantidad=cantidad, cantidad_humedad=cantidad_humedad,
+            humedades={str(valor): veces for valor, veces in valores},
+            colores=dict(sorted(colores.items(), key=lambda item: int(item[0]))),
+            updated_at=ahora,
+        )
+        if cantidad_humedad:
+            serie.humedad_promedio = (
+                sum(valor * veces for valor, veces in valores) / cantidad_humedad
+            ).quantize(Decimal('0.001'))
+            serie.humedad_minima = valores[0][0]
+            serie.humedad_maxima = valores[-1][0]
+            serie.humedad_p90 = percentil(valores, cantidad_humedad, Decimal('0.9'))
+        series.append(serie)
+    SerieFisicoQuimica.objects.bulk_create(series, batch_size=1000)
+
+
+def vaciar_series(apps, schema_editor):
+    apps.get_model('modelos', 'SerieFisicoQuimica').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelos', '0011_series_fisicoquimicas'),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_series, vaciar_series),
+    ]
@@ -10,6 +10,11 @@ from .models.Pool_model import Pool
 from .models.ContienePool_model import ContienePool
 from .models.AnalisisPalinologico_model import AnalisisPalinologico
 from .models.AnalisisFisicoQuimico_model import AnalisisFisicoQuimico
+from .models.PoolComposicion_model import PoolComposicion
+from .models.ResumenEspecie_model import ResumenEspecie
+from .models.ContadorRegistro_model import ContadorRegistro
+from .models.ReglaClasificacion_model import ReglaClasificacion
+from .models.SerieFisicoQuimica_model import SerieFisicoQuimica
 
 __all__ = [
     'Apicultor',
@@ -22,6 +27,11 @@ __all__ = [
     'Pool',
     'ContienePool',
     'AnalisisPalinologico',
-    'AnalisisFisicoQuimico'
+    'AnalisisFisicoQuimico',
+    'PoolComposicion',
+    'ResumenEspecie',
+    'ContadorRegistro',
+    'ReglaClasificacion',
+    'SerieFisicoQuimica'
 ]
 
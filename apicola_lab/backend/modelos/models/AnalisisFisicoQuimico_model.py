@@ -37,6 +37,9 @@ class AnalisisFisicoQuimico(models.Model):
         db_table = 'analisis_fisicoquimicos'
         verbose_name = 'Análisis Físico-Químico'
         verbose_name_plural = 'Análisis Físico-Químicos'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='idx_fq_created'),
+        ]
 
     def __str__(self):
         return f"Análisis F-Q {self.num_registro or self.id} - {self.tambor}" 
\ No newline at end of file
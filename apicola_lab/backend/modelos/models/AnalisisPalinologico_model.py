@@ -52,6 +52,7 @@ class AnalisisPalinologico(models.Model):
         indexes = [
             models.Index(fields=['pool'], name='idx_analisis_pool'),
             models.Index(fields=['especie'], name='idx_analisis_especie'),
+            models.Index(fields=['created_at', 'id'], name='idx_analisis_created'),
         ]
 
     def __str__(self):
@@ -26,6 +26,9 @@ class Analista(AbstractBaseUser):
         db_table = 'analista'
         verbose_name = 'Analista'
         verbose_name_plural = 'Analistas'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='idx_analista_created'),
+        ]
 
     def __str__(self):
         return f"{self.nombres} {self.apellidos}"
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator
 from modelos.models.Apicultor_model import Apicultor  
+from modelos.geo import codificar_geohash
 
 
 
@@ -32,6 +33,8 @@ class Apiario(models.Model):
         blank=True,
         help_text="Coordenada de longitud"
     )
+    # Se calcula en save() a partir de latitud/longitud (ver modelos/geo.py)
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -41,7 +44,16 @@ class Apiario(models.Model):
         verbose_name_plural = 'Apiarios'
         indexes = [
             models.Index(fields=['apicultor'], name='idx_apiarios_apicultor'),
+            models.Index(fields=['created_at', 'id'], name='idx_apiarios_created'),
+            models.Index(fields=['latitud', 'longitud'], name='idx_apiarios_coordenadas'),
         ]
 
+    def save(self, *args, **kwargs):
+        self.geohash = codificar_geohash(self.latitud, self.longitud)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitud', 'longitud'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.nombre_apiario} - {self.apicultor}"
\ No newline at end of file
@@ -13,6 +13,9 @@ class Apicultor(models.Model):
         db_table = 'apicultor'
         verbose_name = 'Apicultor'
         verbose_name_plural = 'Apicultores'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='idx_apicultor_created'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
@@ -0,0 +1,48 @@
+from django.db import models, transaction
+from django.db.models import F
+
+
+class ContadorRegistro(models.Model):
+    """Contador atómico para asignar números de registro correlativos"""
+    nombre = models.CharField(max_length=50, primary_key=True)
+    ultimo_valor = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'contador_registro'
+        verbose_name = 'Contador de Registro'
+        verbose_name_plural = 'Contadores de Registro'
+
+    def __str__(self):
+        return f"{self.nombre}: {self.ultimo_valor}"
+
+    @classmethod
+    def reservar(cls, nombre, cantidad=1):
+        """
+        Reserva un bloque de números consecutivos del contador
+
+        El UPDATE ... SET ultimo_valor = ultimo_valor + cantidad bloquea la
+        fila del contador hasta el fin de la transacción, así que dos
+        reservas concurrentes nunca reciben el mismo número. Conviene
+        llamarlo fuera de transacciones largas para no retener el bloqueo.
+
+        Args:
+            nombre (str): Nombre del contador (por ejemplo 'pool')
+            cantidad (int): Cantidad de números a reservar
+
+        Returns:
+            range: Números reservados
+        """
+        if cantidad <= 0:
+            return range(0)
+
+        with transaction.atomic():
+            actualizados = cls.objects.filter(nombre=nombre).update(
+                ultimo_valor=F('ultimo_valor') + cantidad
+            )
+            if not actualizados:
+                cls.objects.get_or_create(nombre=nombre)
+                cls.objects.filter(nombre=nombre).update(ultimo_valor=F('ultimo_valor') + cantidad)
+            ultimo = cls.objects.filter(nombre=nombre).values_list('ultimo_valor', flat=True).get()
+
+        return range(ultimo - cantidad + 1, ultimo + 1)
@@ -16,6 +16,7 @@ class Especie(models.Model):
         verbose_name_plural = 'Especies'
         indexes = [
             models.Index(fields=['nombre_cientifico'], name='idx_especies_nombre'),
+            models.Index(fields=['created_at', 'id'], name='idx_especies_created'),
         ]
 
     def __str__(self):
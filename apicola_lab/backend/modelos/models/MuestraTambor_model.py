@@ -22,6 +22,9 @@ class MuestraTambor(models.Model):
         db_table = 'muestra_tambor'
         verbose_name = 'MuestraTambor'
         verbose_name_plural = 'MuestrasTambores'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='idx_tambor_created'),
+        ]
 
     def __str__(self):
         return f"MuestraTambor {self.num_registro}"
@@ -0,0 +1,33 @@
+from django.db import models
+from modelos.models.Pool_model import Pool
+
+
+class PoolComposicion(models.Model):
+    """Composición polínica precalculada de un pool (derivada de AnalisisPalinologico)"""
+    pool = models.OneToOneField(
+        Pool,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='composicion',
+        db_column='id_pool'
+    )
+    total_granos = models.IntegerField(default=0)
+    num_especies = models.IntegerField(default=0)
+    especies = models.JSONField(
+        default=list,
+        help_text="Lista ordenada por nombre científico con especie_id, especie, "
+                  "nombre_comun, cantidad y porcentaje"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'pool_composicion'
+        verbose_name = 'Composición de Pool'
+        verbose_name_plural = 'Composiciones de Pools'
+        indexes = [
+            # Lectura incremental de la matriz de similitud
+            models.Index(fields=['updated_at'], name='idx_composicion_actualizada'),
+        ]
+
+    def __str__(self):
+        return f"Composición {self.pool}"
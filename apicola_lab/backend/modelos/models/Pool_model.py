@@ -1,11 +1,20 @@
 from django.db import models
 from django.utils import timezone
 from modelos.models.Analista_model import Analista
+from modelos.models.Especie_model import Especie
 from modelos.models.MuestraTambor_model import MuestraTambor
+from modelos.models.ContadorRegistro_model import ContadorRegistro
 
 
 class Pool(models.Model):
     """Modelo para las muestras de miel"""
+    MONOFLORAL = 'MONOFLORAL'
+    MULTIFLORAL = 'MULTIFLORAL'
+    TIPO_FLORAL_CHOICES = [
+        (MONOFLORAL, 'Monofloral'),
+        (MULTIFLORAL, 'Multifloral'),
+    ]
+
     analista = models.ForeignKey(
         Analista, 
         on_delete=models.RESTRICT,
@@ -20,6 +29,30 @@ class Pool(models.Model):
     fecha_analisis = models.DateField(null=True, blank=True)
     num_registro = models.CharField(max_length=50, unique=True, null=True, blank=True)
     observaciones = models.TextField(blank=True, null=True)
+    # Clasificación calculada por ClasificacionService; vacía si no hay conteos
+    tipo_floral = models.CharField(
+        max_length=12,
+        choices=TIPO_FLORAL_CHOICES,
+        null=True,
+        blank=True,
+        editable=False
+    )
+    especie_dominante = models.ForeignKey(
+        Especie,
+        on_delete=models.SET_NULL,
+        related_name='pools_dominados',
+        db_column='id_especie_dominante',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    porcentaje_dominante = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -29,18 +62,28 @@ class Pool(models.Model):
         verbose_name_plural = 'Pools'
         indexes = [
             models.Index(fields=['analista'], name='idx_pool_analista'),
+            models.Index(fields=['created_at', 'id'], name='idx_pool_created'),
+            models.Index(fields=['tipo_floral', 'especie_dominante', 'fecha_analisis'],
+                         name='idx_pool_clasificacion'),
         ]
 
     def save(self, *args, **kwargs):
         if not self.num_registro or self.num_registro == '':
-            # Buscar el último número de registro existente
-            ultimo = Pool.objects.order_by('-id').first()
-            if ultimo and ultimo.num_registro and ultimo.num_registro.isdigit():
-                nuevo_num = int(ultimo.num_registro) + 1
-            else:
-                nuevo_num = 1
-            self.num_registro = str(nuevo_num).zfill(5)  # Ejemplo: 00001, 00002
+            Pool.asignar_numeros_registro([self])
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def asignar_numeros_registro(pools):
+        """
+        Asigna números de registro (00001, 00002, ...) a los pools que no tienen
+
+        Reserva todos los números con una sola operación sobre el contador,
+        por lo que sirve también para preparar pools antes de un bulk_create.
+        """
+        sin_numero = [pool for pool in pools if not pool.num_registro]
+        numeros = ContadorRegistro.reservar('pool', len(sin_numero))
+        for pool, numero in zip(sin_numero, numeros):
+            pool.num_registro = str(numero).zfill(5)  # Ejemplo: 00001, 00002
+
     def __str__(self):
         return f"Pool {self.num_registro or self.id}"
\ No newline at end of file
@@ -0,0 +1,29 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+from modelos.models.Especie_model import Especie
+
+
+class ReglaClasificacion(models.Model):
+    """Umbral propio de una especie para considerar monofloral a una miel"""
+    especie = models.OneToOneField(
+        Especie,
+        on_delete=models.CASCADE,
+        related_name='regla_clasificacion',
+        db_column='id_especie'
+    )
+    umbral = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        help_text="Porcentaje de polen de la especie que debe superarse para que la miel sea monofloral"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'regla_clasificacion'
+        verbose_name = 'Regla de Clasificación'
+        verbose_name_plural = 'Reglas de Clasificación'
+
+    def __str__(self):
+        return f"{self.especie}: > {self.umbral}%"
@@ -0,0 +1,27 @@
+from django.db import models
+from modelos.models.Especie_model import Especie
+
+
+class ResumenEspecie(models.Model):
+    """Totales acumulados de análisis palinológicos por especie"""
+    especie = models.OneToOneField(
+        Especie,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='resumen',
+        db_column='id_especie'
+    )
+    total_analisis = models.IntegerField(default=0)
+    total_granos = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'resumen_especie'
+        verbose_name = 'Resumen de Especie'
+        verbose_name_plural = 'Resúmenes de Especies'
+        indexes = [
+            models.Index(fields=['-total_analisis'], name='idx_resumen_especie_total'),
+        ]
+
+    def __str__(self):
+        return f"Resumen {self.especie}"
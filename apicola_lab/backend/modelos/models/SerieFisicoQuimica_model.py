@@ -0,0 +1,52 @@
+from django.db import models
+
+
+class SerieFisicoQuimica(models.Model):
+    """Agregados mensuales y anuales de análisis físico-químicos (derivada de AnalisisFisicoQuimico)"""
+    MES = 'MES'
+    ANIO = 'ANIO'
+    PERIODO_CHOICES = [
+        (MES, 'Mes'),
+        (ANIO, 'Año'),
+    ]
+    APIARIO = 'APIARIO'
+    LOCALIDAD = 'LOCALIDAD'
+    APICULTOR = 'APICULTOR'
+    TOTAL = 'TOTAL'
+    AGRUPACION_CHOICES = [
+        (APIARIO, 'Apiario'),
+        (LOCALIDAD, 'Localidad'),
+        (APICULTOR, 'Apicultor'),
+        (TOTAL, 'Total'),
+    ]
+
+    agrupacion = models.CharField(max_length=10, choices=AGRUPACION_CHOICES)
+    # id del apiario o del apicultor, nombre de la localidad, '' para el total
+    clave = models.CharField(max_length=100, blank=True)
+    periodo = models.CharField(max_length=4, choices=PERIODO_CHOICES)
+    inicio = models.DateField(help_text="Primer día del mes o del año")
+    cantidad = models.IntegerField(default=0)
+    cantidad_humedad = models.IntegerField(default=0)
+    humedad_promedio = models.DecimalField(max_digits=7, decimal_places=3, null=True, blank=True)
+    humedad_minima = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    humedad_maxima = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    humedad_p90 = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    humedades = models.JSONField(default=dict, help_text="Histograma {humedad: cantidad de análisis}")
+    colores = models.JSONField(default=dict, help_text="Distribución {color: cantidad de análisis}")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'serie_fisicoquimica'
+        verbose_name = 'Serie Físico-Química'
+        verbose_name_plural = 'Series Físico-Químicas'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['agrupacion', 'periodo', 'clave', 'inicio'], name='uniq_serie_fisicoquimica'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['agrupacion', 'periodo', 'inicio'], name='idx_serie_fq_inicio'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_agrupacion_display()} {self.clave} - {self.inicio:%Y-%m}"
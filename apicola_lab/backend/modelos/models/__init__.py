@@ -8,6 +8,11 @@ from .Pool_model import Pool
 from .ContienePool_model import ContienePool
 from .AnalisisPalinologico_model import AnalisisPalinologico
 from .AnalisisFisicoQuimico_model import AnalisisFisicoQuimico
+from .PoolComposicion_model import PoolComposicion
+from .ResumenEspecie_model import ResumenEspecie
+from .ContadorRegistro_model import ContadorRegistro
+from .ReglaClasificacion_model import ReglaClasificacion
+from .SerieFisicoQuimica_model import SerieFisicoQuimica
 
 from django.apps import apps
 def get_model(model_name):
@@ -23,5 +28,10 @@ __all__ = [
     'Muestra_model',
     'MuestraTambor_model',
     'AnalisisPalinologico_model',
-    'AnalisisFisicoQuimico_model'
+    'AnalisisFisicoQuimico_model',
+    'PoolComposicion_model',
+    'ResumenEspecie_model',
+    'ContadorRegistro_model',
+    'ReglaClasificacion_model',
+    'SerieFisicoQuimica_model'
 ]
@@ -0,0 +1,144 @@
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import BooleanField, Expression, F, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class FilaComparada(Expression):
+    """
+    (a, b) < (c, d) de SQL: compara filas en orden lexicográfico.
+
+    Es una sola condición de rango sobre el índice compuesto (created_at, id),
+    a diferencia de created_at < c OR (created_at = c AND id < d).
+    """
+    conditional = True
+
+    def __init__(self, campos, valores, operador):
+        super().__init__(output_field=BooleanField())
+        self.campos = list(campos)
+        self.valores = list(valores)
+        self.operador = operador
+
+    def get_source_expressions(self):
+        return self.campos + self.valores
+
+    def set_source_expressions(self, exprs):
+        self.campos, self.valores = exprs[:len(self.campos)], exprs[len(self.campos):]
+
+    def as_sql(self, compiler, connection):
+        partes, params = [], []
+        for expresion in self.get_source_expressions():
+            sql, parametros = compiler.compile(expresion)
+            partes.append(sql)
+            params += parametros
+        n = len(self.campos)
+        return f"({', '.join(partes[:n])}) {self.operador} ({', '.join(partes[n:])})", params
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginación keyset, aplicada siempre a todos los listados.
+
+    El cursor guarda la posición completa de la última fila enviada, los
+    valores de todo el ordering (created_at e id), y cada página se obtiene
+    con WHERE (created_at, id) < (valor, id) sobre el índice compuesto, sin
+    OFFSET: el costo no depende de la profundidad de la página ni de cuántas
+    filas comparten created_at (las importadas en bloque). Las tablas sin
+    created_at se ordenan solo por id.
+
+    Una vista puede pedir otro orden con get_orden_paginacion(), por ejemplo
+    apiarios por distancia con ?near=; todos los campos del orden van en el
+    mismo sentido y el último tiene que ser único. El cliente elige el tamaño
+    con ?page_size= hasta max_page_size y recorre las páginas con 'next'.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        orden = view.get_orden_paginacion() if hasattr(view, 'get_orden_paginacion') else None
+        if orden:
+            return tuple(orden)
+        # Las tablas intermedias no tienen created_at: se ordenan solo por id
+        campos = {field.name for field in queryset.model._meta.get_fields()}
+        return self.ordering if 'created_at' in campos else ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, posicion = (False, None) if self.cursor is None else (self.cursor.reverse, self.cursor.position)
+
+        descendente = self.ordering[0].startswith('-')
+        campos = [campo.lstrip('-') for campo in self.ordering]
+        # Hacia atrás se recorre con el orden invertido y se da vuelta la página
+        if reverse == descendente:
+            queryset = queryset.order_by(*campos)
+        else:
+            queryset = queryset.order_by(*[F(campo).desc() for campo in campos])
+        if posicion is not None:
+            queryset = queryset.filter(FilaComparada(
+                [F(campo) for campo in campos],
+                self._valores(queryset.model, campos, posicion),
+                '>' if reverse == descendente else '<',
+            ))
+
+        filas = list(queryset[:self.page_size + 1])
+        self.page = filas[:self.page_size]
+        hay_mas = len(filas) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = posicion is not None, hay_mas
+        else:
+            self.has_next, self.has_previous = hay_mas, posicion is not None
+        return self.page
+
+    def _valores(self, modelo, campos, posicion):
+        """Value() de cada campo del cursor, con el tipo del campo del modelo"""
+        try:
+            valores = json.loads(posicion)
+            if not isinstance(valores, list) or len(valores) != len(campos):
+                raise ValueError
+            resultado = []
+            for campo, valor in zip(campos, valores):
+                try:
+                    field = modelo._meta.get_field(campo)
+                except FieldDoesNotExist:
+                    # Anotaciones, como distancia_km
+                    resultado.append(Value(float(valor)))
+                    continue
+                resultado.append(Value(field.to_python(valor), output_field=field))
+            return resultado
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        valores = []
+        for campo in ordering:
+            campo = campo.lstrip('-')
+            valor = instance[campo] if isinstance(instance, dict) else getattr(instance, campo)
+            valores.append(valor.isoformat() if isinstance(valor, (date, datetime)) else valor)
+        return json.dumps(valores)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        posicion = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=posicion))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Página vacía después del final: la anterior es la última
+            return self.encode_cursor(Cursor(offset=0, reverse=True, position=None)) if self.cursor else None
+        posicion = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=posicion))
@@ -0,0 +1,138 @@
+"""
+Lecturas de estadísticas, exportaciones y reportes en la réplica.
+
+Si DATABASES tiene el alias 'reporting' (DB_REPORTING_HOST, ver
+settings.py), RouterReplica manda a la réplica las lecturas de las vistas
+que lo declaran, en los requests GET y HEAD:
+
+    lecturas_replica = True                          # toda la vista
+    lecturas_replica = {'estadisticas', 'celdas'}    # solo esas acciones
+
+Las vistas función usan el decorador @lectura_replica. El resto de las
+lecturas y todas las escrituras van a 'default', que tampoco cambia si el
+alias no está configurado.
+
+Lectura de las propias escrituras: ReplicaMiddleware anota en la caché
+cada request que escribió con éxito (método distinto de GET, HEAD u
+OPTIONS, respuesta < 400) y, durante REPLICA_STICKY_SEGUNDOS, las lecturas
+de ese cliente siguen yendo a 'default'. Así, después de guardar un conteo
+en ContadorPolen, las gráficas del pool no muestran la versión anterior. El
+cliente se identifica por la cabecera Authorization (el JWT), o por la
+cookie de sesión, o por la IP. No se consulta request.user, porque
+autenticarlo ya es una lectura. Con varios workers, la caché tiene que ser
+compartida (Redis/Memcached) para que la marca valga en todos.
+
+Las respuestas en streaming (exportaciones, estadísticas de muchos pools)
+siguen leyendo de la réplica mientras se envían.
+"""
+import hashlib
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .instrumentacion import _vista_y_accion
+
+
+ALIAS = 'reporting'
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+# True mientras el request en curso lee de la réplica
+_leyendo_replica = ContextVar('leyendo_replica', default=False)
+
+
+def replica_configurada():
+    return ALIAS in settings.DATABASES
+
+
+def leyendo_replica():
+    """Si las lecturas del request en curso van a la réplica"""
+    return _leyendo_replica.get() and replica_configurada()
+
+
+def lectura_replica(vista):
+    """Marca una vista función para leer de la réplica"""
+    @wraps(vista)
+    def envuelta(*args, **kwargs):
+        return vista(*args, **kwargs)
+    envuelta.lecturas_replica = True
+    return envuelta
+
+
+def usa_replica(vista, accion):
+    """Si la vista (clase o función) declara lecturas en la réplica para la acción"""
+    declarado = getattr(vista, 'lecturas_replica', False)
+    if isinstance(declarado, (set, frozenset, list, tuple)):
+        return accion in declarado
+    return bool(declarado)
+
+
+class RouterReplica:
+    def db_for_read(self, model, **hints):
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db:
+            return instancia._state.db
+        return ALIAS if leyendo_replica() else None
+
+    def db_for_write(self, model, **hints):
+        # También para instancias leídas de la réplica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica tiene los mismos datos que default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # El esquema de la réplica llega por la replicación
+        return db != ALIAS
+
+
+def _clave_cliente(request):
+    credencial = (
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get('REMOTE_ADDR', '')
+    )
+    return 'replica:escritura:' + hashlib.sha256(credencial.encode()).hexdigest()[:32]
+
+
+def _en_replica(contenido):
+    token = _leyendo_replica.set(True)
+    try:
+        yield from contenido
+    finally:
+        _leyendo_replica.reset(token)
+
+
+class ReplicaMiddleware:
+    """Elige la base de las lecturas de cada request (ver la documentación del módulo)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            token = getattr(request, '_token_replica', None)
+            if token is not None:
+                _leyendo_replica.reset(token)
+
+        if token is not None and response.streaming:
+            response.streaming_content = _en_replica(response.streaming_content)
+        if request.method not in METODOS_LECTURA and response.status_code < 400 and replica_configurada():
+            cache.set(_clave_cliente(request), True, getattr(settings, 'REPLICA_STICKY_SEGUNDOS', 10))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD') or not replica_configurada():
+            return None
+        vista, accion = _vista_y_accion(view_func, request.method)
+        if not usa_replica(vista or view_func, accion):
+            return None
+        if cache.get(_clave_cliente(request)):
+            return None
+        request._token_replica = _leyendo_replica.set(True)
+        return None
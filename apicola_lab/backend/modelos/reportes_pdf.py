@@ -0,0 +1,123 @@
+"""
+Dibujo del reporte melisopalinológico de un pool en PDF.
+
+Este módulo solo usa reportlab: recibe los datos ya armados (diccionarios con
+tipos simples) y devuelve los bytes del PDF, así que puede correr en procesos
+de trabajo sin tocar la base de datos. Los datos los arma ReportePoolService.
+"""
+import io
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+COLOR_ENCABEZADO = colors.HexColor('#3182CE')
+COLOR_MARCAS = colors.HexColor('#9C51B6')
+
+
+def _tabla(encabezados, filas, color=COLOR_ENCABEZADO):
+    tabla = Table([encabezados] + filas, repeatRows=1, hAlign='LEFT')
+    tabla.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), color),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F7FAFC')]),
+    ]))
+    return tabla
+
+
+def _texto(valor):
+    return '—' if valor in (None, '') else str(valor)
+
+
+def renderizar_reporte(datos):
+    """
+    Dibuja el reporte de un pool
+
+    Args:
+        datos (dict): Lo que arma ReportePoolService.datos_reportes para el pool
+
+    Returns:
+        bytes: El PDF
+    """
+    estilos = getSampleStyleSheet()
+    pool = datos['pool']
+    buffer = io.BytesIO()
+    # invariant: sin fecha de creación embebida, el mismo contenido da los mismos bytes
+    documento = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=1.5 * cm,
+        rightMargin=1.5 * cm,
+        topMargin=1.5 * cm,
+        bottomMargin=1.5 * cm,
+        title=f"Reporte melisopalinológico {pool['num_registro'] or pool['id']}",
+        invariant=1,
+    )
+
+    elementos = [Paragraph('Reporte Melisopalinológico', estilos['Title'])]
+    info = [
+        ('Estudio ID', pool['id']),
+        ('Protocolo/ID', pool['num_registro'] or f"Pool {pool['id']}"),
+        ('Fecha de Análisis', pool['fecha_analisis'] or 'Sin fecha'),
+        ('Analista', pool['analista']),
+        ('Solicitante', datos.get('solicitante')),
+        ('Fecha de Cosecha', datos.get('fecha_cosecha')),
+        ('Tipo', datos['tipo']['tipo']),
+        ('Clasificación', datos['tipo']['descripcion']),
+        ('Observaciones', datos.get('observacion') or pool['observaciones']),
+    ]
+    for etiqueta, valor in info:
+        elementos.append(Paragraph(f'<b>{etiqueta}:</b> {escape(_texto(valor))}', estilos['Normal']))
+
+    if datos['tambores']:
+        elementos += [Spacer(1, 0.4 * cm), Paragraph('Tambores que componen la muestra', estilos['Heading3'])]
+        elementos.append(_tabla(
+            ['ID Tambor', 'Código', 'Apiario(s)', 'Apicultor', 'Fecha de Extracción'],
+            [[_texto(t['id']), _texto(t['num_registro']), _texto(t['apiarios']),
+              _texto(t['apicultores']), _texto(t['fecha_de_extraccion'])]
+             for t in datos['tambores']]
+        ))
+
+    elementos += [Spacer(1, 0.4 * cm), Paragraph('Composición polínica', estilos['Heading3'])]
+    if datos['especies']:
+        elementos.append(_tabla(
+            ['Nombre Científico', 'Nombre Vulgar', 'Familia', 'Cantidad', 'Porcentaje'],
+            [[_texto(e['nombre_cientifico']), _texto(e['nombre_comun']), _texto(e['familia']),
+              str(e['cantidad']), f"{e['porcentaje']:.1f}%"]
+             for e in datos['especies']]
+        ))
+        elementos.append(Paragraph(f"Total de granos: {datos['total_granos']}", estilos['Normal']))
+    else:
+        elementos.append(Paragraph('Sin conteos cargados.', estilos['Normal']))
+
+    if datos['marcas']:
+        elementos += [
+            Spacer(1, 0.4 * cm),
+            Paragraph('Especies con marca especial (no incluidas en % de miel)', estilos['Heading3']),
+            _tabla(
+                ['Nombre Científico', 'Nombre Vulgar', 'Familia', 'Cantidad', 'Marca Especial'],
+                [[_texto(e['nombre_cientifico']), _texto(e['nombre_comun']), _texto(e['familia']),
+                  str(e['cantidad']), _texto(e['marca_especial'])]
+                 for e in datos['marcas']],
+                color=COLOR_MARCAS
+            ),
+        ]
+
+    if datos['fisicoquimicos']:
+        elementos += [Spacer(1, 0.4 * cm), Paragraph('Análisis físico-químicos', estilos['Heading3'])]
+        elementos.append(_tabla(
+            ['Tambor', 'Registro', 'Fecha de Análisis', 'Color', 'Humedad (%)', 'Analista'],
+            [[_texto(a['tambor']), _texto(a['num_registro']), _texto(a['fecha_analisis']),
+              _texto(a['color']), _texto(a['humedad']), _texto(a['analista'])]
+             for a in datos['fisicoquimicos']]
+        ))
+
+    documento.build(elementos)
+    return buffer.getvalue()
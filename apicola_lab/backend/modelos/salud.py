@@ -0,0 +1,160 @@
+"""
+Health checks para el balanceador (AWS ALB) y orquestadores.
+
+- /health/live: el proceso responde. No toca la base ni la caché; si falla,
+  hay que reiniciar el proceso.
+- /health/ready: el proceso puede atender tráfico. Verifica la conexión a
+  la base, la caché y que no haya migraciones pendientes; responde 503 si
+  algo falla, para que el balanceador saque la instancia de rotación. El
+  estado de las demás bases de DATABASES (la réplica 'reporting') se
+  informa pero no falla el check: una réplica caída afecta a todas las
+  instancias por igual.
+- /health/: el check anterior, equivalente a /health/live.
+
+SaludMiddleware va primero en MIDDLEWARE y responde estas rutas sin pasar
+por el resto (sesiones, CSRF, autenticación, instrumentación) ni por el
+resolver de URLs. Tampoco valida ALLOWED_HOSTS: el ALB consulta por IP.
+
+El resultado de readiness se conserva SALUD_TTL segundos por proceso, así
+que con un check cada pocos segundos la base recibe a lo sumo una consulta
+por proceso y por TTL. Un resultado fallido se conserva solo
+SALUD_TTL_FALLA segundos, para detectar enseguida la recuperación. Las
+migraciones se verifican hasta encontrarlas aplicadas: el código del
+proceso no cambia mientras corre.
+"""
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+RUTAS_LIVE = ('/health/live', '/health/live/', '/health/', '/health')
+RUTAS_READY = ('/health/ready', '/health/ready/')
+
+CLAVE_CACHE = 'salud:ready'
+
+
+def _respuesta(datos, status=200):
+    response = HttpResponse(json.dumps(datos), content_type='application/json', status=status)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+class Readiness:
+    """Checks de readiness con el último resultado en memoria del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resultado = None
+        self._vence = 0.0
+        self._migraciones_ok = False
+
+    def reiniciar(self):
+        with self._lock:
+            self._resultado = None
+            self._vence = 0.0
+            self._migraciones_ok = False
+
+    def estado(self):
+        """(ok, checks): reutiliza el resultado mientras no venza"""
+        ahora = time.monotonic()
+        if ahora < self._vence:
+            return self._resultado
+        # Un solo hilo verifica; los demás esperan y reutilizan su resultado
+        with self._lock:
+            if time.monotonic() < self._vence:
+                return self._resultado
+            checks = {
+                'db': self._verificar_base(DEFAULT_DB_ALIAS),
+                'cache': self._verificar_cache(),
+                'migraciones': self._verificar_migraciones(),
+            }
+            ok = all(valor == 'ok' for valor in checks.values())
+            for alias in connections:
+                if alias != DEFAULT_DB_ALIAS:
+                    checks[f'db_{alias}'] = self._verificar_base(alias)
+            if not ok:
+                logger.warning("Readiness fallida: %s", checks)
+            ttl = getattr(settings, 'SALUD_TTL', 5) if ok else getattr(settings, 'SALUD_TTL_FALLA', 1)
+            self._resultado = (ok, checks)
+            self._vence = time.monotonic() + ttl
+            return self._resultado
+
+    @staticmethod
+    def _verificar_base(alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Exception as e:
+            return e.__class__.__name__
+        return 'ok'
+
+    @staticmethod
+    def _verificar_cache():
+        try:
+            marca = str(time.time())
+            cache.set(CLAVE_CACHE, marca, 30)
+            if cache.get(CLAVE_CACHE) != marca:
+                return 'no conserva valores'
+        except Exception as e:
+            return e.__class__.__name__
+        return 'ok'
+
+    def _verificar_migraciones(self):
+        if self._migraciones_ok:
+            return 'ok'
+        try:
+            executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+            pendientes = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        except Exception as e:
+            return e.__class__.__name__
+        if pendientes:
+            return f'{len(pendientes)} pendiente(s)'
+        self._migraciones_ok = True
+        return 'ok'
+
+
+readiness = Readiness()
+
+
+def health_live(request):
+    """Liveness: el proceso responde"""
+    return _respuesta({
+        'status': 'healthy',
+        'service': 'apicola_lab',
+        'timestamp': timezone.now().isoformat(),
+    })
+
+
+def health_ready(request):
+    """Readiness: base, caché y migraciones; 503 si algo falla"""
+    ok, checks = readiness.estado()
+    return _respuesta({
+        'status': 'ready' if ok else 'unavailable',
+        'service': 'apicola_lab',
+        'checks': checks,
+    }, status=200 if ok else 503)
+
+
+class SaludMiddleware:
+    """Responde los health checks antes que el resto de los middlewares"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            if request.path in RUTAS_LIVE:
+                return health_live(request)
+            if request.path in RUTAS_READY:
+                return health_ready(request)
+        return self.get_response(request)
@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models.Analista_model import Analista
 from .models.Apiario_model import Apiario
@@ -9,6 +10,37 @@ from .models.Pool_model import Pool
 from .models.ContienePool_model import ContienePool
 from .models.AnalisisPalinologico_model import AnalisisPalinologico
 from .models.AnalisisFisicoQuimico_model import AnalisisFisicoQuimico
+from .models.ReglaClasificacion_model import ReglaClasificacion
+
+
+class EagerLoadingMixin:
+    """
+    Permite que cada serializer declare qué relaciones recorre.
+
+    setup_eager_loading(queryset) agrega los select_related/Prefetch que
+    necesita el serializer (incluidos los de sus serializers anidados), de
+    modo que serializar N objetos cueste un número fijo de consultas.
+    """
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset
+
+
+class AnotacionesSerializerMixin:
+    """
+    Agrega a la salida las columnas calculadas pedidas con ?with=.
+
+    La vista anota el queryset y deja los nombres en el contexto
+    ('anotaciones'); aquí solo se copian los valores ya calculados.
+    """
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for nombre in self.context.get('anotaciones', ()):
+            data[nombre] = getattr(instance, nombre, None)
+        return data
+
 
 class ApicultorSerializer(serializers.ModelSerializer):
     class Meta:
@@ -21,16 +53,21 @@ class AnalistaSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombres', 'apellidos', 'contacto', 'username', 'email', 'is_active']
         read_only_fields = ['is_active']
 
-class ApiarioSerializer(serializers.ModelSerializer):
+class ApiarioSerializer(AnotacionesSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Apiario
         fields = '__all__'
 
-class TamborSerializer(serializers.ModelSerializer):
+class TamborSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = MuestraTambor
         fields = '__all__'
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # 'apiarios' se serializa como lista de ids
+        return queryset.prefetch_related(Prefetch('apiarios', queryset=Apiario.objects.only('id')))
+
 class TamborApiarioSerializer(serializers.ModelSerializer):
     class Meta:
         model = TamborApiario
@@ -41,23 +78,60 @@ class EspecieSerializer(serializers.ModelSerializer):
         model = Especie
         fields = '__all__'
 
-class PoolSerializer(serializers.ModelSerializer):
+class ReglaClasificacionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReglaClasificacion
+        fields = '__all__'
+
+class PoolSerializer(AnotacionesSerializerMixin, EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Pool
         fields = '__all__'
 
-class PoolDetailSerializer(serializers.ModelSerializer):
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # 'tambores' se serializa como lista de ids
+        return queryset.prefetch_related(Prefetch('tambores', queryset=MuestraTambor.objects.only('id')))
+
+class PoolConTamboresSerializer(PoolSerializer):
+    """Alta de un pool junto con los tambores que lo componen"""
+    tambor_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        write_only=True
+    )
+    fecha_asociacion = serializers.DateField(required=False, allow_null=True, write_only=True)
+
+    class Meta(PoolSerializer.Meta):
+        pass
+
+    def validate_tambor_ids(self, value):
+        if len(value) != len(set(value)):
+            raise serializers.ValidationError("No puede seleccionar el mismo tambor más de una vez.")
+        return value
+
+class PoolDetailSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     analista = AnalistaSerializer(read_only=True)
     
     class Meta:
         model = Pool
-        fields = ['id', 'analista', 'fecha_analisis', 'num_registro', 'observaciones', 'created_at', 'updated_at']
+        fields = ['id', 'analista', 'fecha_analisis', 'num_registro', 'observaciones',
+                  'tipo_floral', 'especie_dominante', 'porcentaje_dominante', 'created_at', 'updated_at']
 
-class MuestraTamborSerializer(serializers.ModelSerializer):
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('analista')
+
+class MuestraTamborSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = MuestraTambor
         fields = '__all__'
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # 'apiarios' se serializa como lista de ids
+        return queryset.prefetch_related(Prefetch('apiarios', queryset=Apiario.objects.only('id')))
+
 class AnalisisPalinologicoSerializer(serializers.ModelSerializer):
     class Meta:
         model = AnalisisPalinologico
@@ -90,20 +164,65 @@ class AnalisisPalinologicoSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+class ConteoEspecieSerializer(serializers.Serializer):
+    """Un item del conteo de un pool: especie y cantidad de granos"""
+    especie = serializers.IntegerField()
+    cantidad_granos = serializers.IntegerField(min_value=0)
+    marca_especial = serializers.ChoiceField(
+        choices=AnalisisPalinologico.MARCA_CHOICES,
+        required=False,
+        allow_null=True,
+        allow_blank=True
+    )
+
+class ConteosPoolSerializer(serializers.Serializer):
+    """Conteo completo de un pool para la carga masiva de análisis palinológicos"""
+    conteos = ConteoEspecieSerializer(many=True)
+
+    def validate_conteos(self, value):
+        especie_ids = [item['especie'] for item in value]
+        if len(especie_ids) != len(set(especie_ids)):
+            raise serializers.ValidationError("Cada especie puede aparecer una sola vez en el conteo.")
+
+        existentes = set(Especie.objects.filter(id__in=especie_ids).values_list('id', flat=True))
+        faltantes = sorted(set(especie_ids) - existentes)
+        if faltantes:
+            raise serializers.ValidationError(f"Especies inexistentes: {faltantes}")
+        return value
+
+class SimilitudSerializer(serializers.Serializer):
+    """Parámetros de la búsqueda de pools similares"""
+    k = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    metrica = serializers.ChoiceField(choices=['coseno', 'bray-curtis'], default='coseno')
+
+class PerfilSimilitudSerializer(SimilitudSerializer):
+    """Perfil de referencia para buscar pools similares: conteo por especie"""
+    perfil = ConteoEspecieSerializer(many=True, allow_empty=False)
+
+    def validate_perfil(self, value):
+        especie_ids = [item['especie'] for item in value]
+        if len(especie_ids) != len(set(especie_ids)):
+            raise serializers.ValidationError("Cada especie puede aparecer una sola vez en el perfil.")
+        return value
+
 class AnalisisFisicoQuimicoSerializer(serializers.ModelSerializer):
     class Meta:
         model = AnalisisFisicoQuimico
         fields = '__all__'
 
 # Serializers anidados para relaciones
-class ApiarioDetailSerializer(serializers.ModelSerializer):
+class ApiarioDetailSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     apicultor = ApicultorSerializer(read_only=True)
     
     class Meta:
         model = Apiario
         fields = '__all__'
 
-class MuestraDetailSerializer(serializers.ModelSerializer):
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('apicultor')
+
+class MuestraDetailSerializer(AnotacionesSerializerMixin, EagerLoadingMixin, serializers.ModelSerializer):
     analista = AnalistaSerializer(read_only=True)
     tambores = MuestraTamborSerializer(many=True, read_only=True)
     
@@ -111,7 +230,14 @@ class MuestraDetailSerializer(serializers.ModelSerializer):
         model = Pool
         fields = ['id', 'analista', 'tambores', 'fecha_analisis', 'num_registro', 'observaciones', 'created_at', 'updated_at']
 
-class AnalisisPalinologicoDetailSerializer(serializers.ModelSerializer):
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        tambores = MuestraTamborSerializer.setup_eager_loading(MuestraTambor.objects.all())
+        return queryset.select_related('analista').prefetch_related(
+            Prefetch('tambores', queryset=tambores)
+        )
+
+class AnalisisPalinologicoDetailSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     pool = PoolDetailSerializer(read_only=True)
     especie = EspecieSerializer(read_only=True)
     
@@ -119,7 +245,11 @@ class AnalisisPalinologicoDetailSerializer(serializers.ModelSerializer):
         model = AnalisisPalinologico
         fields = '__all__'
 
-class AnalisisFisicoQuimicoDetailSerializer(serializers.ModelSerializer):
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('pool__analista', 'especie')
+
+class AnalisisFisicoQuimicoDetailSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     analista = AnalistaSerializer(read_only=True)
     tambor = MuestraTamborSerializer(read_only=True)
     
@@ -127,6 +257,12 @@ class AnalisisFisicoQuimicoDetailSerializer(serializers.ModelSerializer):
         model = AnalisisFisicoQuimico
         fields = '__all__' 
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('analista', 'tambor').prefetch_related(
+            Prefetch('tambor__apiarios', queryset=Apiario.objects.only('id'))
+        )
+
 class EstadisticasSerializer(serializers.Serializer):
     estadisticas_generales = serializers.DictField()
 
@@ -142,15 +278,34 @@ class EstadisticasSerializer(serializers.Serializer):
         child=serializers.DictField()
     )
 
+class SeriesEstadisticasSerializer(serializers.Serializer):
+    """Parámetros de las series físico-químicas"""
+    agrupacion = serializers.ChoiceField(choices=['apiario', 'localidad', 'apicultor', 'total'], default='total')
+    periodo = serializers.ChoiceField(choices=['mes', 'anio'], default='mes')
+    fecha_desde = serializers.DateField(required=False)
+    fecha_hasta = serializers.DateField(required=False)
+    # ids de apiarios o apicultores, o nombres de localidades (se puede repetir)
+    clave = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
+
+    def validate(self, attrs):
+        if attrs.get('fecha_desde') and attrs.get('fecha_hasta') and attrs['fecha_desde'] > attrs['fecha_hasta']:
+            raise serializers.ValidationError("fecha_desde no puede ser posterior a fecha_hasta.")
+        return attrs
+
 class ContienePoolSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContienePool
         fields = '__all__'
 
 # --- Nuevo serializer para tambores con apiarios y apicultor anidados ---
-class TamborWithApiariosSerializer(serializers.ModelSerializer):
+class TamborWithApiariosSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     apiarios = ApiarioDetailSerializer(many=True, read_only=True)
 
     class Meta:
         model = MuestraTambor
-        fields = ['id', 'num_registro', 'fecha_de_extraccion', 'estado_analisis_palinologico', 'apiarios']
\ No newline at end of file
+        fields = ['id', 'num_registro', 'fecha_de_extraccion', 'estado_analisis_palinologico', 'apiarios']
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        apiarios = ApiarioDetailSerializer.setup_eager_loading(Apiario.objects.all())
+        return queryset.prefetch_related(Prefetch('apiarios', queryset=apiarios))
\ No newline at end of file
@@ -1,14 +1,58 @@
-from django.db.models import Sum, Count
-from django.http import JsonResponse
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, router, transaction
+from django.db.models import Avg, BigIntegerField, Case, Count, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Substr, TruncMonth
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models.Analista_model import Analista
+from .models.Apicultor_model import Apicultor
+from .models.Apiario_model import Apiario
+from .models.MuestraTambor_model import MuestraTambor
+from .models.TamborApiario_model import TamborApiario
 from .models.Pool_model import Pool
+from .models.ContadorRegistro_model import ContadorRegistro
+from .models.ContienePool_model import ContienePool
 from .models.AnalisisPalinologico_model import AnalisisPalinologico
+from .models.AnalisisFisicoQuimico_model import AnalisisFisicoQuimico
+from .models.PoolComposicion_model import PoolComposicion
+from .models.ResumenEspecie_model import ResumenEspecie
+from .models.ReglaClasificacion_model import ReglaClasificacion
+from .models.SerieFisicoQuimica_model import SerieFisicoQuimica
+from .conexiones import iterar, transaccion_lectura
+from .replicas import leyendo_replica
+
+logger = logging.getLogger(__name__)
 
 
 class PoolStatsService:
     """
     Servicio para calcular estadísticas de pools
+
+    Las estadísticas se arman a partir de la composición precalculada
+    del pool (PoolComposicion), que se lee junto con el pool en una
+    única consulta.
     """
-    
+
     @staticmethod
     def get_pool_stats(pool_id):
         """
@@ -21,90 +65,123 @@ class PoolStatsService:
             dict: Datos estructurados para gráficos
         """
         try:
-            # Obtener el pool con su analista
-            pool = Pool.objects.select_related('analista').get(id=pool_id)
-            
-            # Obtener análisis palinológicos con especies relacionadas
-            analisis = AnalisisPalinologico.objects.filter(
-                pool=pool
-            ).select_related('especie').order_by('especie__nombre_cientifico')
-            
-            print(f"Pool {pool_id} encontrado: {pool}")
-            print(f"Análisis encontrados: {analisis.count()}")
-            
-            if not analisis.exists():
-                return {
-                    'error': 'No hay análisis palinológicos para este pool',
-                    'status': 404
-                }
-            
-            # Calcular total de granos
-            total_granos = analisis.aggregate(total=Sum('cantidad_granos'))['total'] or 0
-            
-            # Preparar datos para gráficos
-            pie_chart_data = PoolStatsService._prepare_pie_chart_data(analisis, total_granos)
-            bar_chart_data = PoolStatsService._prepare_bar_chart_data(pie_chart_data)
-            scatter_plot_data = PoolStatsService._prepare_scatter_plot_data(analisis, pool)
-            
-            # Información del pool
-            pool_info = PoolStatsService._prepare_pool_info(pool, total_granos, len(pie_chart_data))
-            
-            return {
-                'pool_info': pool_info,
-                'pie_chart': pie_chart_data,
-                'bar_chart': bar_chart_data,
-                'scatter_plot': scatter_plot_data,
-                'status': 200
-            }
-            
+            # Obtener el pool con su analista y su composición
+            pool = Pool.objects.select_related('analista', 'composicion').get(id=pool_id)
+
+            return PoolStatsService._build_pool_stats(pool, ComposicionService.obtener(pool))
+
         except Pool.DoesNotExist:
             return {
                 'error': 'Pool no encontrado',
                 'status': 404
             }
         except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"Error en PoolStatsService: {str(e)}")
-            print(f"Traceback: {error_details}")
+            logger.exception("Error en PoolStatsService para el pool %s", pool_id)
             return {
                 'error': f'Error al procesar la solicitud: {str(e)}',
                 'status': 500
             }
     
     @staticmethod
-    def _prepare_pie_chart_data(analisis, total_granos):
-        """Prepara datos para gráfico de torta"""
-        pie_chart_data = []
-        
-        for analisis_item in analisis:
-            porcentaje = (analisis_item.cantidad_granos / total_granos * 100) if total_granos > 0 else 0
-            pie_chart_data.append({
-                'especie': analisis_item.especie.nombre_cientifico,
-                'nombre_comun': analisis_item.especie.nombre_comun or '',
-                'porcentaje': round(porcentaje, 2),
-                'cantidad': analisis_item.cantidad_granos
+    def get_bulk_pool_stats(pool_ids=None, fecha_desde=None, fecha_hasta=None, chunk_size=500):
+        """
+        Obtiene estadísticas de muchos pools usando consultas agrupadas
+
+        Los pools se recorren por bloques de ``chunk_size`` ordenados por id;
+        cada bloque cuesta una consulta (pools con su analista y su
+        composición), sin importar cuántos pools contenga.
+
+        Args:
+            pool_ids (list[int] | None): IDs de los pools, o None para todos
+            fecha_desde (date | None): Fecha de análisis mínima
+            fecha_hasta (date | None): Fecha de análisis máxima
+            chunk_size (int): Cantidad de pools por bloque
+
+        Yields:
+            tuple: (pool_id, dict) con el mismo resultado que get_pool_stats
+        """
+        pools = Pool.objects.select_related('analista', 'composicion').order_by('id')
+        if pool_ids is not None:
+            pools = pools.filter(id__in=pool_ids)
+        if fecha_desde:
+            pools = pools.filter(fecha_analisis__gte=fecha_desde)
+        if fecha_hasta:
+            pools = pools.filter(fecha_analisis__lte=fecha_hasta)
+
+        ultimo_id = 0
+        while True:
+            bloque = list(pools.filter(id__gt=ultimo_id)[:chunk_size])
+            if not bloque:
+                break
+            ultimo_id = bloque[-1].id
+
+            for pool in bloque:
+                yield pool.id, PoolStatsService._build_pool_stats(pool, ComposicionService.obtener(pool))
+
+    @staticmethod
+    def _build_pool_stats(pool, composicion):
+        """
+        Arma las estadísticas de un pool a partir de su composición
+
+        Args:
+            pool (Pool): Pool con su analista ya cargado
+            composicion (PoolComposicion | None): Composición precalculada del pool
+
+        Returns:
+            dict: Datos estructurados para gráficos
+        """
+        if composicion is None or not composicion.especies:
+            return {
+                'error': 'No hay análisis palinológicos para este pool',
+                'status': 404
+            }
+
+        detailed_data = []
+        cantidades_por_especie = {}
+        for item in composicion.especies:
+            detailed_data.append({
+                'especie': item['especie'],
+                'nombre_comun': item['nombre_comun'] or '',
+                'porcentaje': item['porcentaje'],
+                'cantidad': item['cantidad']
             })
-        
+            cantidades_por_especie[item['especie']] = item['cantidad']
+
+        pie_chart_data = PoolStatsService._prepare_pie_chart_data(detailed_data)
+        bar_chart_data = PoolStatsService._prepare_bar_chart_data(detailed_data)
+        scatter_plot_data = PoolStatsService._prepare_scatter_plot_data(cantidades_por_especie, pool)
+        pool_info = PoolStatsService._prepare_pool_info(
+            pool, composicion.total_granos, composicion.num_especies
+        )
+
+        return {
+            'pool_info': pool_info,
+            'pie_chart': pie_chart_data,
+            'bar_chart': bar_chart_data,
+            'scatter_plot': scatter_plot_data,
+            'status': 200
+        }
+
+    @staticmethod
+    def _prepare_pie_chart_data(detailed_data):
+        """Prepara datos para gráfico de torta"""
+        labels = [item['especie'] for item in detailed_data]
         return {
-            'labels': [item['especie'] for item in pie_chart_data],
+            'labels': labels,
             'datasets': [{
-                'data': [item['porcentaje'] for item in pie_chart_data],
+                'data': [item['porcentaje'] for item in detailed_data],
                 'backgroundColor': [
                     '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', 
                     '#9966FF', '#FF9F40', '#FF6384', '#C9CBCF'
                 ],
-                'labels': [item['especie'] for item in pie_chart_data]
+                'labels': labels
             }],
-            'detailed_data': pie_chart_data
+            'detailed_data': detailed_data
         }
     
     @staticmethod
-    def _prepare_bar_chart_data(pie_chart_data):
+    def _prepare_bar_chart_data(detailed_data):
         """Prepara datos para gráfico de barras"""
-        # pie_chart_data es la estructura completa, necesitamos detailed_data
-        detailed_data = pie_chart_data.get('detailed_data', [])
-        
         return {
             'labels': [item['especie'] for item in detailed_data],
             'datasets': [{
@@ -117,37 +194,23 @@ class PoolStatsService:
         }
     
     @staticmethod
-    def _prepare_scatter_plot_data(analisis, pool):
+    def _prepare_scatter_plot_data(cantidades_por_especie, pool):
         """Prepara datos para scatter plot"""
-        # Agrupar por especie y sumar cantidades
-        especies_por_mes = {}
-        
-        for analisis_item in analisis:
-            especie = analisis_item.especie.nombre_cientifico
-            cantidad = analisis_item.cantidad_granos
-            
-            if especie not in especies_por_mes:
-                especies_por_mes[especie] = cantidad
-            else:
-                especies_por_mes[especie] += cantidad
-        
-        # Crear puntos para el scatter plot
-        scatter_data = []
-        for especie, cantidad_total in especies_por_mes.items():
-            if pool.fecha_analisis:
-                mes = pool.fecha_analisis.month
-                nombre_mes = pool.fecha_analisis.strftime('%B')
-            else:
-                mes = 1
-                nombre_mes = 'Enero'
-            
-            scatter_data.append({
-                'x': especie,
-                'y': mes,
-                'nombre_mes': nombre_mes,
-                'cantidad': cantidad_total,
-                'radio': min(cantidad_total / 10, 20)  # Radio proporcional, máximo 20
-            })
+        # Todos los puntos del pool comparten el mes de su fecha de análisis
+        if pool.fecha_analisis:
+            mes = pool.fecha_analisis.month
+            nombre_mes = pool.fecha_analisis.strftime('%B')
+        else:
+            mes = 1
+            nombre_mes = 'Enero'
+
+        scatter_data = [{
+            'x': especie,
+            'y': mes,
+            'nombre_mes': nombre_mes,
+            'cantidad': cantidad_total,
+            'radio': min(cantidad_total / 10, 20)  # Radio proporcional, máximo 20
+        } for especie, cantidad_total in cantidades_por_especie.items()]
         
         return {
             'data': scatter_data,
@@ -169,23 +232,2109 @@ class PoolStatsService:
         }
 
 
-def get_pool_stats_response(pool_id):
+class _LoteComposicion:
+    """Cambios acumulados dentro de ComposicionService.en_lote()"""
+
+    def __init__(self):
+        self.pool_ids = set()
+        self.deltas = {}
+        self.composiciones = {}
+        # Pools de un borrado en curso (ver ComposicionService.lote_de_borrado)
+        self.pools_pendientes = set()
+
+    def registrar(self, pool_ids=(), deltas=None):
+        self.pool_ids.update(pool_ids)
+        for especie_id, (delta_analisis, delta_granos) in (deltas or {}).items():
+            previo_analisis, previo_granos = self.deltas.get(especie_id, (0, 0))
+            self.deltas[especie_id] = (previo_analisis + delta_analisis, previo_granos + delta_granos)
+
+    def aplicar(self):
+        ComposicionService.ajustar_resumenes_especies(self.deltas)
+        self.composiciones = ComposicionService.recalcular_pools(self.pool_ids)
+
+
+_lote_actual = ContextVar('lote_composicion', default=None)
+
+
+class ComposicionService:
     """
-    Función de conveniencia para obtener respuesta JSON de estadísticas del pool
-    
-    Args:
-        pool_id (int): ID del pool
-        
-    Returns:
-        JsonResponse: Respuesta HTTP con datos o error
+    Mantiene las tablas derivadas PoolComposicion y ResumenEspecie
+
+    Las señales de AnalisisPalinologico (ver signals.py) llaman a
+    registrar_cambios en cada alta, modificación o baja. Las escrituras
+    masivas (bulk_create, bulk_update, QuerySet.update) no disparan señales:
+    quien las use debe registrar los cambios a mano, idealmente dentro de
+    en_lote() para recalcular todo una sola vez al final.
     """
-    result = PoolStatsService.get_pool_stats(pool_id)
-    
-    if result.get('status') == 200:
-        # Remover el campo status antes de enviar la respuesta
-        result.pop('status')
-        return JsonResponse(result)
-    else:
-        status_code = result.get('status', 500)
-        error_message = result.get('error', 'Error desconocido')
-        return JsonResponse({'error': error_message}, status=status_code)
+
+    @staticmethod
+    @contextmanager
+    def en_lote():
+        """
+        Difiere los recálculos hasta el final del bloque
+
+        Dentro del bloque, registrar_cambios solo acumula pools y deltas por
+        especie; al salir sin errores se aplican con un UPDATE de resúmenes y
+        un recálculo de composiciones. Las composiciones resultantes quedan
+        en el atributo ``composiciones`` del lote.
+        """
+        lote = _lote_actual.get()
+        if lote is not None:
+            # Bloque anidado: lo aplica el bloque exterior
+            yield lote
+            return
+
+        lote = _LoteComposicion()
+        token = _lote_actual.set(lote)
+        try:
+            yield lote
+        finally:
+            _lote_actual.reset(token)
+        lote.aplicar()
+
+    @staticmethod
+    def lote_de_borrado(origin, pool_id):
+        """
+        Lote que junta los análisis borrados en cascada con uno o más pools
+
+        Acumula como en_lote(), pero el lote se guarda en el objeto que
+        origina el borrado (el pool o el QuerySet, que todas las señales de
+        ese borrado reciben como origin) en lugar del contexto: si el borrado
+        falla, se descarta con el objeto y no queda abierto en el hilo.
+        pre_delete de Pool lo abre y post_delete del último pool lo aplica
+        (cerrar_lote_de_borrado), dentro de la transacción del borrado.
+
+        Returns:
+            _LoteComposicion | None: None dentro de en_lote(), que ya junta los cambios
+        """
+        if _lote_actual.get() is not None:
+            return None
+        lote = getattr(origin, '_lote_composicion', None)
+        if lote is None or pool_id in lote.pools_pendientes:
+            # Un pool que ya estaba pendiente es un nuevo intento de un borrado que falló
+            lote = origin._lote_composicion = _LoteComposicion()
+        lote.pools_pendientes.add(pool_id)
+        return lote
+
+    @staticmethod
+    def cerrar_lote_de_borrado(origin, pool_id):
+        """Aplica el lote de lote_de_borrado cuando ya se borraron todos sus pools"""
+        lote = getattr(origin, '_lote_composicion', None)
+        if lote is None:
+            return
+        lote.pools_pendientes.discard(pool_id)
+        if not lote.pools_pendientes:
+            del origin._lote_composicion
+            lote.aplicar()
+
+    @staticmethod
+    def registrar_cambios(pool_ids=(), deltas=None):
+        """
+        Registra cambios en análisis palinológicos
+
+        Args:
+            pool_ids (iterable[int]): Pools cuya composición cambió
+            deltas (dict | None): {especie_id: (delta_analisis, delta_granos)}
+        """
+        lote = _lote_actual.get()
+        if lote is not None:
+            lote.registrar(pool_ids, deltas)
+            return
+        ComposicionService.ajustar_resumenes_especies(deltas or {})
+        ComposicionService.recalcular_pools(pool_ids)
+
+    @staticmethod
+    def obtener(pool):
+        """Devuelve la composición ya cargada del pool, o None si no tiene"""
+        try:
+            return pool.composicion
+        except PoolComposicion.DoesNotExist:
+            return None
+
+    @staticmethod
+    def recalcular_pools(pool_ids):
+        """
+        Recalcula la composición de los pools indicados a partir de sus análisis
+
+        Args:
+            pool_ids (iterable[int]): IDs de los pools a recalcular
+
+        Returns:
+            dict: {pool_id: PoolComposicion} con las composiciones guardadas
+        """
+        pool_ids = sorted(set(pool_ids))
+        if not pool_ids:
+            return {}
+
+        with transaction.atomic():
+            # Bloquear los pools serializa los recálculos concurrentes de un
+            # mismo pool; FOR NO KEY UPDATE no choca con las FK de los análisis
+            clasificaciones = ClasificacionService.bloquear(pool_ids)
+            existentes = list(clasificaciones)
+
+            filas_por_pool = defaultdict(list)
+            filas = AnalisisPalinologico.objects.filter(
+                pool_id__in=existentes
+            ).order_by('pool_id', 'especie__nombre_cientifico').values_list(
+                'pool_id', 'especie_id', 'especie__nombre_cientifico',
+                'especie__nombre_comun', 'cantidad_granos', 'marca_especial'
+            )
+            for pool_id, *fila in filas:
+                filas_por_pool[pool_id].append(fila)
+
+            composiciones = {
+                pool_id: ComposicionService._componer(pool_id, filas_por_pool[pool_id])
+                for pool_id in existentes
+            }
+            PoolComposicion.objects.bulk_create(
+                composiciones.values(),
+                update_conflicts=True,
+                unique_fields=['pool'],
+                update_fields=['total_granos', 'num_especies', 'especies', 'updated_at'],
+            )
+            ClasificacionService.guardar(
+                ClasificacionService.clasificar(
+                    (pool_id, especie_id, cantidad, marca)
+                    for pool_id, filas in filas_por_pool.items()
+                    for especie_id, _, _, cantidad, marca in filas
+                ),
+                clasificaciones
+            )
+
+        return composiciones
+
+    @staticmethod
+    def _componer(pool_id, filas):
+        """Arma la composición de un pool desde sus filas ordenadas por especie"""
+        total_granos = sum(fila[3] for fila in filas)
+        especies = [{
+            'especie_id': especie_id,
+            'especie': nombre_cientifico,
+            'nombre_comun': nombre_comun,
+            'cantidad': cantidad,
+            'porcentaje': round(cantidad / total_granos * 100, 2) if total_granos > 0 else 0
+        } for especie_id, nombre_cientifico, nombre_comun, cantidad, _ in filas]
+
+        return PoolComposicion(
+            pool_id=pool_id,
+            total_granos=total_granos,
+            num_especies=len(especies),
+            especies=especies
+        )
+
+    @staticmethod
+    def ajustar_resumenes_especies(deltas):
+        """
+        Suma los deltas a los totales de varias especies en un único UPDATE
+
+        Las especies que todavía no tienen resumen se calculan desde los análisis.
+
+        Args:
+            deltas (dict): {especie_id: (delta_analisis, delta_granos)}
+        """
+        deltas = {especie_id: delta for especie_id, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return
+
+        def caso(indice):
+            return Case(
+                *[When(especie_id=especie_id, then=Value(delta[indice])) for especie_id, delta in deltas.items()],
+                default=Value(0),
+                output_field=BigIntegerField()
+            )
+
+        with transaction.atomic():
+            existentes = set(
+                ResumenEspecie.objects.filter(especie_id__in=deltas).values_list('especie_id', flat=True)
+            )
+            ResumenEspecie.objects.filter(especie_id__in=existentes).update(
+                total_analisis=F('total_analisis') + caso(0),
+                total_granos=F('total_granos') + caso(1),
+                updated_at=timezone.now()
+            )
+            ComposicionService.recalcular_resumen_especies(set(deltas) - existentes)
+
+    @staticmethod
+    def recalcular_resumen_especies(especie_ids):
+        """
+        Recalcula desde cero los totales de las especies indicadas
+
+        Args:
+            especie_ids (iterable[int]): IDs de las especies a recalcular
+        """
+        especie_ids = sorted(set(especie_ids))
+        if not especie_ids:
+            return
+
+        totales = {
+            fila['especie_id']: fila
+            for fila in AnalisisPalinologico.objects.filter(especie_id__in=especie_ids)
+            .values('especie_id')
+            .annotate(total_analisis=Count('id'), total_granos=Sum('cantidad_granos'))
+            .order_by()
+        }
+        ResumenEspecie.objects.bulk_create(
+            [ResumenEspecie(
+                especie_id=especie_id,
+                total_analisis=totales.get(especie_id, {}).get('total_analisis', 0),
+                total_granos=totales.get(especie_id, {}).get('total_granos') or 0
+            ) for especie_id in especie_ids],
+            update_conflicts=True,
+            unique_fields=['especie'],
+            update_fields=['total_analisis', 'total_granos', 'updated_at'],
+        )
+
+
+class ClasificacionService:
+    """
+    Clasificación monofloral / multifloral de los pools
+
+    Un pool es monofloral de una especie si el porcentaje de su polen supera
+    el umbral de la especie (ReglaClasificacion), o UMBRAL_DEFECTO si no
+    tiene regla. Los porcentajes no cuentan las especies con marca especial,
+    igual que el reporte. Si varias especies superan su umbral gana la de
+    mayor porcentaje; si ninguna lo supera el pool es multifloral y su
+    especie dominante es la más abundante.
+
+    El resultado se guarda en Pool cada vez que ComposicionService recalcula
+    un pool, y al cambiar una regla se reclasifican solo los pools que tienen
+    esa especie. La clasificación de un lote de pools es vectorizada.
+    """
+    UMBRAL_DEFECTO = Decimal('45')
+    BLOQUE = 2000
+    CAMPOS = ('tipo_floral', 'especie_dominante_id', 'porcentaje_dominante')
+
+    @staticmethod
+    def bloquear(pool_ids):
+        """
+        Bloquea los pools (FOR NO KEY UPDATE) y lee su clasificación actual
+
+        Returns:
+            dict: {pool_id: (tipo_floral, especie_dominante_id, porcentaje_dominante)}
+                de los pools existentes, en orden de id
+        """
+        return {
+            pool_id: tuple(clasificacion)
+            for pool_id, *clasificacion in Pool.objects.select_for_update(no_key=True)
+            .filter(id__in=pool_ids).order_by('id').values_list('id', *ClasificacionService.CAMPOS)
+        }
+
+    @staticmethod
+    def clasificar(filas, umbrales=None):
+        """
+        Clasifica todos los pools de las filas con operaciones vectorizadas
+
+        Args:
+            filas (iterable): (pool_id, especie_id, cantidad_granos, marca_especial)
+                de los análisis palinológicos de los pools
+            umbrales (dict | None): {especie_id: umbral}; por defecto las reglas guardadas
+
+        Returns:
+            dict: {pool_id: (tipo_floral, especie_dominante_id, porcentaje_dominante)}
+                de los pools con al menos un grano sin marca especial
+        """
+        import numpy as np
+
+        filas = [(pool_id, especie_id, cantidad) for pool_id, especie_id, cantidad, marca in filas
+                 if cantidad and not marca]
+        if not filas:
+            return {}
+        if umbrales is None:
+            umbrales = dict(ReglaClasificacion.objects.values_list('especie_id', 'umbral'))
+
+        pools, especies, cantidades = (np.array(columna) for columna in zip(*filas))
+        unicos, grupo = np.unique(pools, return_inverse=True)
+        porcentajes = cantidades * 100 / np.bincount(grupo, weights=cantidades)[grupo]
+        especies_umbral, indices = np.unique(especies, return_inverse=True)
+        defecto = ClasificacionService.UMBRAL_DEFECTO
+        umbral = np.array([float(umbrales.get(especie, defecto)) for especie in especies_umbral.tolist()])[indices]
+        supera = porcentajes > umbral
+
+        # Dentro de cada pool, la última fila en orden (supera, porcentaje,
+        # -especie) es la ganadora: ante un empate gana el menor especie_id
+        orden = np.lexsort((-especies, porcentajes, supera, grupo))
+        ganadoras = orden[np.append(np.flatnonzero(np.diff(grupo[orden])), len(orden) - 1)]
+
+        centesimo = Decimal('0.01')
+        return {
+            int(pools[fila]): (
+                Pool.MONOFLORAL if supera[fila] else Pool.MULTIFLORAL,
+                int(especies[fila]),
+                Decimal(float(porcentajes[fila])).quantize(centesimo),
+            )
+            for fila in ganadoras.tolist()
+        }
+
+    @staticmethod
+    def guardar(clasificaciones, previas):
+        """
+        Guarda las clasificaciones que cambiaron
+
+        Args:
+            clasificaciones (dict): Resultado de clasificar()
+            previas (dict): Resultado de bloquear(); los pools que no están en
+                clasificaciones quedan sin clasificar
+
+        Returns:
+            int: Cantidad de pools actualizados
+        """
+        sin_clasificar = (None, None, None)
+        cambios = [
+            Pool(id=pool_id, **dict(zip(ClasificacionService.CAMPOS, nueva)))
+            for pool_id, previa in previas.items()
+            for nueva in [clasificaciones.get(pool_id, sin_clasificar)]
+            if nueva != previa
+        ]
+        # Sin updated_at: la clasificación es un dato derivado, no una edición del pool
+        Pool.objects.bulk_update(
+            cambios, ['tipo_floral', 'especie_dominante', 'porcentaje_dominante'],
+            batch_size=ClasificacionService.BLOQUE
+        )
+        return len(cambios)
+
+    @staticmethod
+    def reclasificar(pool_ids):
+        """
+        Reclasifica pools sin recalcular su composición (p. ej. al cambiar una regla)
+
+        Returns:
+            int: Cantidad de pools cuya clasificación cambió
+        """
+        pool_ids = sorted(set(pool_ids))
+        umbrales = dict(ReglaClasificacion.objects.values_list('especie_id', 'umbral'))
+        actualizados = 0
+        for inicio in range(0, len(pool_ids), ClasificacionService.BLOQUE):
+            with transaction.atomic():
+                previas = ClasificacionService.bloquear(pool_ids[inicio:inicio + ClasificacionService.BLOQUE])
+                filas = AnalisisPalinologico.objects.filter(pool_id__in=list(previas)).values_list(
+                    'pool_id', 'especie_id', 'cantidad_granos', 'marca_especial'
+                )
+                actualizados += ClasificacionService.guardar(
+                    ClasificacionService.clasificar(filas, umbrales), previas
+                )
+        return actualizados
+
+    @staticmethod
+    def reclasificar_especie(especie_id):
+        """Reclasifica los pools con conteos de la especie (al cambiar su regla)"""
+        return ClasificacionService.reclasificar(
+            AnalisisPalinologico.objects.filter(especie_id=especie_id).values_list('pool_id', flat=True).distinct()
+        )
+
+
+class _Acumulado:
+    """Histogramas de humedad y color de un grupo de análisis"""
+
+    def __init__(self):
+        self.cantidad = 0
+        self.humedades = defaultdict(int)
+        self.colores = defaultdict(int)
+
+    def sumar(self, cantidad, humedades, colores):
+        self.cantidad += cantidad
+        for valor, veces in humedades.items():
+            self.humedades[valor] += veces
+        for valor, veces in colores.items():
+            self.colores[valor] += veces
+
+
+class SerieFisicoQuimicaService:
+    """
+    Mantiene la tabla derivada SerieFisicoQuimica
+
+    Agregados mensuales y anuales de los análisis físico-químicos por
+    apiario, localidad, apicultor y total; el mes de un análisis es el de su
+    fecha_extraccion. Cada fila guarda el histograma exacto de humedades y
+    la distribución de colores, y de ahí salen promedio, mínimo, máximo y
+    p90: los años se arman sumando las filas de sus meses, sin volver a leer
+    análisis.
+
+    Las señales (ver signals.py) y la importación por temporada llaman a
+    recalcular con los meses y apiarios afectados; solo se recalculan esos
+    grupos. Las escrituras masivas que no disparan señales deben llamarlo a
+    mano, y reconstruir() rearma la tabla completa.
+    """
+    # Agrupación -> campo del apiario que la define
+    CAMPOS = {
+        SerieFisicoQuimica.APIARIO: 'id',
+        SerieFisicoQuimica.LOCALIDAD: 'localidad',
+        SerieFisicoQuimica.APICULTOR: 'apicultor_id',
+    }
+    CENTESIMO = Decimal('0.01')
+
+    @staticmethod
+    def claves_de_apiarios(apiario_ids):
+        """{agrupacion: set(claves)} de los apiarios indicados"""
+        claves = {agrupacion: set() for agrupacion in SerieFisicoQuimicaService.CAMPOS}
+        for fila in Apiario.objects.filter(id__in=apiario_ids).values(*SerieFisicoQuimicaService.CAMPOS.values()):
+            for agrupacion, campo in SerieFisicoQuimicaService.CAMPOS.items():
+                claves[agrupacion].add(str(fila[campo]))
+        return claves
+
+    @staticmethod
+    def recalcular(meses, apiario_ids=(), claves_extra=None):
+        """
+        Recalcula los grupos de los meses y apiarios indicados (y el total)
+
+        Args:
+            meses (iterable[date]): Fechas de extracción afectadas (vale cualquier día del mes)
+            apiario_ids (iterable[int]): Apiarios afectados; cubren también su localidad y apicultor
+            claves_extra (dict | None): {agrupacion: claves} adicionales, p. ej. la
+                localidad anterior de un apiario que cambió de localidad
+        """
+        meses = {fecha.replace(day=1) for fecha in meses if fecha}
+        if not meses:
+            return
+        claves = SerieFisicoQuimicaService.claves_de_apiarios(apiario_ids)
+        for agrupacion, extra in (claves_extra or {}).items():
+            claves[agrupacion] |= {str(clave) for clave in extra}
+        claves[SerieFisicoQuimica.TOTAL] = {''}
+
+        with transaction.atomic():
+            for agrupacion, valores in claves.items():
+                if valores:
+                    SerieFisicoQuimicaService._recalcular_meses(agrupacion, valores, meses)
+                    SerieFisicoQuimicaService._recalcular_anios(agrupacion, valores, {mes.year for mes in meses})
+
+    @staticmethod
+    def meses(analisis):
+        """Meses (primer día) con análisis en el queryset"""
+        return set(analisis.dates('fecha_extraccion', 'month'))
+
+    @staticmethod
+    def reconstruir():
+        """Rearma la tabla completa desde los análisis"""
+        meses = SerieFisicoQuimicaService.meses(AnalisisFisicoQuimico.objects.all())
+        with transaction.atomic():
+            SerieFisicoQuimica.objects.all().delete()
+            SerieFisicoQuimicaService.recalcular(meses, Apiario.objects.values_list('id', flat=True))
+
+    @staticmethod
+    def _recalcular_meses(agrupacion, claves, meses):
+        """Meses desde los análisis: dos consultas agrupadas (humedad y color)"""
+        desde = min(meses)
+        ultimo = max(meses)
+        hasta = date(ultimo.year + ultimo.month // 12, ultimo.month % 12 + 1, 1)
+        analisis = AnalisisFisicoQuimico.objects.filter(fecha_extraccion__gte=desde, fecha_extraccion__lt=hasta)
+        if agrupacion == SerieFisicoQuimica.TOTAL:
+            clave = Value('')
+        else:
+            campo = f'tambor__apiarios__{SerieFisicoQuimicaService.CAMPOS[agrupacion]}'
+            analisis = analisis.filter(**{f'{campo}__in': claves})
+            clave = F(campo)
+
+        acumulados = defaultdict(_Acumulado)
+        # COUNT(DISTINCT id): un tambor con dos apiarios de la misma localidad cuenta una vez
+        agrupados = analisis.annotate(clave_=clave, mes_=TruncMonth('fecha_extraccion'))
+        for fila in agrupados.values('clave_', 'mes_', 'humedad').annotate(total=Count('id', distinct=True)).order_by():
+            acumulado = acumulados[(str(fila['clave_']), SerieFisicoQuimicaService._fecha(fila['mes_']))]
+            acumulado.cantidad += fila['total']
+            if fila['humedad'] is not None:
+                acumulado.humedades[str(fila['humedad'].quantize(SerieFisicoQuimicaService.CENTESIMO))] += fila['total']
+        for fila in agrupados.filter(color__isnull=False).values('clave_', 'mes_', 'color').annotate(
+            total=Count('id', distinct=True)
+        ).order_by():
+            acumulado = acumulados[(str(fila['clave_']), SerieFisicoQuimicaService._fecha(fila['mes_']))]
+            acumulado.colores[str(fila['color'])] += fila['total']
+
+        SerieFisicoQuimicaService._guardar(
+            agrupacion, SerieFisicoQuimica.MES, claves, meses,
+            {grupo: acumulado for grupo, acumulado in acumulados.items() if grupo[1] in meses}
+        )
+
+    @staticmethod
+    def _recalcular_anios(agrupacion, claves, anios):
+        """Años sumando los histogramas de sus meses, ya guardados"""
+        inicios = {date(anio, 1, 1) for anio in anios}
+        acumulados = defaultdict(_Acumulado)
+        for clave, inicio, cantidad, humedades, colores in SerieFisicoQuimica.objects.filter(
+            agrupacion=agrupacion, periodo=SerieFisicoQuimica.MES, clave__in=claves,
+            inicio__gte=min(inicios), inicio__lt=date(max(anios) + 1, 1, 1)
+        ).values_list('clave', 'inicio', 'cantidad', 'humedades', 'colores'):
+            if inicio.year in anios:
+                acumulados[(clave, date(inicio.year, 1, 1))].sumar(cantidad, humedades, colores)
+        SerieFisicoQuimicaService._guardar(agrupacion, SerieFisicoQuimica.ANIO, claves, inicios, acumulados)
+
+    @staticmethod
+    def _guardar(agrupacion, periodo, claves, inicios, acumulados):
+        """Guarda los grupos con datos y borra los que quedaron vacíos"""
+        ahora = timezone.now()
+        SerieFisicoQuimica.objects.bulk_create(
+            [
+                SerieFisicoQuimicaService._fila(agrupacion, periodo, clave, inicio, acumulado, ahora)
+                for (clave, inicio), acumulado in acumulados.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['agrupacion', 'periodo', 'clave', 'inicio'],
+            update_fields=['cantidad', 'cantidad_humedad', 'humedad_promedio', 'humedad_minima',
+                           'humedad_maxima', 'humedad_p90', 'humedades', 'colores', 'updated_at'],
+        )
+        # Lo que no se acaba de escribir ya no tiene análisis
+        SerieFisicoQuimica.objects.filter(
+            agrupacion=agrupacion, periodo=periodo, clave__in=claves, inicio__in=inicios, updated_at__lt=ahora
+        ).delete()
+
+    @staticmethod
+    def _fila(agrupacion, periodo, clave, inicio, acumulado, ahora):
+        valores = sorted((Decimal(valor), veces) for valor, veces in acumulado.humedades.items())
+        cantidad_humedad = sum(veces for _, veces in valores)
+        fila = SerieFisicoQuimica(
+            agrupacion=agrupacion,
+            clave=clave,
+            periodo=periodo,
+            inicio=inicio,
+            cantidad=acumulado.cantidad,
+            cantidad_humedad=cantidad_humedad,
+            humedades={str(valor): veces for valor, veces in valores},
+            colores=dict(sorted(acumulado.colores.items(), key=lambda item: int(item[0]))),
+            updated_at=ahora,
+        )
+        if cantidad_humedad:
+            fila.humedad_promedio = (
+                sum(valor * veces for valor, veces in valores) / cantidad_humedad
+            ).quantize(Decimal('0.001'))
+            fila.humedad_minima = valores[0][0]
+            fila.humedad_maxima = valores[-1][0]
+            fila.humedad_p90 = SerieFisicoQuimicaService._percentil(valores, cantidad_humedad, Decimal('0.9'))
+        return fila
+
+    @staticmethod
+    def _percentil(valores, total, fraccion):
+        """Percentil con interpolación lineal (como percentile_cont) sobre un histograma ordenado"""
+        posicion = fraccion * (total - 1)
+        inferior = int(posicion)
+
+        def valor_en(rango):
+            acumulado = 0
+            for valor, veces in valores:
+                acumulado += veces
+                if rango < acumulado:
+                    return valor
+            return valores[-1][0]
+
+        bajo = valor_en(inferior)
+        alto = valor_en(inferior + 1) if inferior + 1 < total else bajo
+        return (bajo + (alto - bajo) * (posicion - inferior)).quantize(SerieFisicoQuimicaService.CENTESIMO)
+
+    @staticmethod
+    def _fecha(valor):
+        # TruncMonth sobre un DateField devuelve date; en algunos motores, datetime
+        return valor.date() if isinstance(valor, datetime) else valor
+
+    @staticmethod
+    def series(agrupacion, periodo, desde=None, hasta=None, claves=None):
+        """
+        Series listas para graficar, leídas solo de la tabla de agregados
+
+        Args:
+            agrupacion (str): SerieFisicoQuimica.APIARIO, LOCALIDAD, APICULTOR o TOTAL
+            periodo (str): SerieFisicoQuimica.MES o ANIO
+            desde (date | None): Incluye los períodos que empiezan en o después
+            hasta (date | None): Incluye los períodos que empiezan en o antes
+            claves (list[str] | None): Solo estos apiarios, localidades o apicultores
+
+        Returns:
+            list[dict]: Una serie por clave, con sus puntos ordenados por fecha
+        """
+        filas = SerieFisicoQuimica.objects.filter(agrupacion=agrupacion, periodo=periodo)
+        if desde:
+            filas = filas.filter(inicio__gte=desde)
+        if hasta:
+            filas = filas.filter(inicio__lte=hasta)
+        if claves:
+            filas = filas.filter(clave__in=claves)
+
+        series = {}
+        for fila in filas.order_by('clave', 'inicio'):
+            serie = series.setdefault(fila.clave, {'clave': fila.clave, 'nombre': fila.clave, 'puntos': []})
+            serie['puntos'].append({
+                'inicio': fila.inicio,
+                'cantidad': fila.cantidad,
+                'humedad': {
+                    'cantidad': fila.cantidad_humedad,
+                    'promedio': fila.humedad_promedio,
+                    'minima': fila.humedad_minima,
+                    'maxima': fila.humedad_maxima,
+                    'p90': fila.humedad_p90,
+                },
+                'colores': fila.colores,
+            })
+
+        # Nombres de apiarios y apicultores, en una consulta
+        ids = [int(clave) for clave in series if clave.isdigit()]
+        nombres = {}
+        if agrupacion == SerieFisicoQuimica.APIARIO:
+            nombres = dict(Apiario.objects.filter(id__in=ids).values_list('id', 'nombre_apiario'))
+        elif agrupacion == SerieFisicoQuimica.APICULTOR:
+            nombres = {
+                apicultor_id: f"{nombre} {apellido or ''}".strip()
+                for apicultor_id, nombre, apellido in Apicultor.objects.filter(id__in=ids).values_list(
+                    'id', 'nombre', 'apellido'
+                )
+            }
+        elif agrupacion == SerieFisicoQuimica.TOTAL:
+            nombres = {'': 'Total'}
+        for clave, serie in series.items():
+            serie['nombre'] = nombres.get(int(clave) if clave.isdigit() else clave, clave)
+        return list(series.values())
+
+
+class DashboardService:
+    """
+    Estadísticas generales del tablero (EstadisticasView) guardadas en la caché
+
+    Cada contador vive en su propia clave y las señales lo incrementan o
+    decrementan en cada alta o baja; las secciones agregadas se invalidan
+    cuando cambian los modelos de los que dependen. Los ajustes se aplican
+    al confirmarse la transacción de la escritura (transaction.on_commit):
+    una escritura revertida no toca el tablero. Todas las claves vencen a
+    los DASHBOARD_CACHE_TTL segundos, lo que corrige cualquier desvío (por
+    ejemplo, escrituras masivas que no disparan señales).
+
+    La caché tiene que ser compartida entre los workers: con una caché por
+    proceso (LocMemCache) cada worker tendría sus propios contadores y las
+    invalidaciones de uno no llegarían a los demás, así que el tablero se
+    calcula en cada request. Solo Redis y Memcached incrementan de forma
+    atómica entre procesos; con las demás cachés compartidas (base de
+    datos, archivos) los contadores se invalidan en lugar de ajustarse.
+    """
+
+    PREFIJO = 'dashboard'
+    DIAS_RECIENTES = 30
+
+    # Contadores totales: nombre -> modelo
+    TOTALES = {
+        'apicultores': Apicultor,
+        'apiarios': Apiario,
+        'tambores': MuestraTambor,
+        'muestras': Pool,
+        'palinologicos': AnalisisPalinologico,
+        'fisicoquimicos': AnalisisFisicoQuimico,
+    }
+    # Contadores de altas de los últimos DIAS_RECIENTES días
+    RECIENTES = {
+        'muestras': Pool,
+        'palinologicos': AnalisisPalinologico,
+        'fisicoquimicos': AnalisisFisicoQuimico,
+    }
+    SECCIONES = ('muestras_por_mes', 'analisis_por_especie', 'humedad_por_apiario')
+    MESES_RECIENTES = 12
+
+    BACKENDS_POR_PROCESO = (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.dummy.DummyCache',
+    )
+    BACKENDS_INCR_ATOMICO = (
+        'django.core.cache.backends.redis.RedisCache',
+        'django.core.cache.backends.memcached.PyMemcacheCache',
+        'django.core.cache.backends.memcached.PyLibMCCache',
+        'django_redis.cache.RedisCache',
+    )
+
+    @staticmethod
+    def _backend():
+        return settings.CACHES.get('default', {}).get('BACKEND', '')
+
+    @staticmethod
+    def cache_compartida():
+        """Si la caché es compartida entre procesos (ver la documentación de la clase)"""
+        return DashboardService._backend() not in DashboardService.BACKENDS_POR_PROCESO
+
+    @staticmethod
+    def _ttl():
+        ttl = getattr(settings, 'DASHBOARD_CACHE_TTL', 300)
+        # Lo leído de una réplica atrasada puede no incluir una escritura cuya
+        # invalidación ya ocurrió: se conserva menos tiempo
+        if leyendo_replica():
+            ttl = min(ttl, getattr(settings, 'REPLICA_CACHE_TTL', 60))
+        return ttl
+
+    @staticmethod
+    def _clave(*partes):
+        return ':'.join((DashboardService.PREFIJO,) + partes)
+
+    @staticmethod
+    def _claves_contadores():
+        return (
+            [DashboardService._clave('total', nombre) for nombre in DashboardService.TOTALES]
+            + [DashboardService._clave('recientes', nombre) for nombre in DashboardService.RECIENTES]
+        )
+
+    @staticmethod
+    def obtener(fresh=False):
+        """
+        Devuelve las estadísticas del tablero, calculando solo lo que falte en caché
+
+        Args:
+            fresh (bool): Ignorar la caché y recalcular todo
+
+        Returns:
+            tuple: (dict con la respuesta de EstadisticasView, edad en segundos)
+        """
+        clave_generado = DashboardService._clave('contadores', 'generado_en')
+        claves_contadores = DashboardService._claves_contadores()
+        claves_secciones = [DashboardService._clave(seccion) for seccion in DashboardService.SECCIONES]
+
+        compartida = DashboardService.cache_compartida()
+        en_cache = {}
+        if compartida and not fresh:
+            en_cache = cache.get_many(claves_contadores + claves_secciones + [clave_generado])
+        ahora = time.time()
+        nuevos = {}
+
+        if any(clave not in en_cache for clave in claves_contadores + [clave_generado]):
+            nuevos.update(DashboardService._calcular_contadores())
+            nuevos[clave_generado] = ahora
+        for seccion, clave in zip(DashboardService.SECCIONES, claves_secciones):
+            if clave not in en_cache:
+                nuevos[clave] = (getattr(DashboardService, f'_calcular_{seccion}')(), ahora)
+
+        if nuevos and compartida:
+            cache.set_many(nuevos, DashboardService._ttl())
+        valores = {**en_cache, **nuevos}
+
+        def contador(tipo, nombre):
+            return valores[DashboardService._clave(tipo, nombre)]
+
+        secciones = {seccion: valores[clave] for seccion, clave in zip(DashboardService.SECCIONES, claves_secciones)}
+        generado_en = min([valores[clave_generado]] + [generado for _, generado in secciones.values()])
+
+        datos = {
+            'estadisticas_generales': {
+                'total_apicultores': contador('total', 'apicultores'),
+                'total_apiarios': contador('total', 'apiarios'),
+                'total_tambores': contador('total', 'tambores'),
+                'total_muestras': contador('total', 'muestras'),
+                'total_analisis': {
+                    'palinologicos': contador('total', 'palinologicos'),
+                    'fisicoquimicos': contador('total', 'fisicoquimicos')
+                },
+                'ultimos_30_dias': {
+                    'muestras_nuevas': contador('recientes', 'muestras'),
+                    'analisis_nuevos': {
+                        'palinologicos': contador('recientes', 'palinologicos'),
+                        'fisicoquimicos': contador('recientes', 'fisicoquimicos')
+                    }
+                }
+            },
+            'muestras_por_mes': secciones['muestras_por_mes'][0],
+            'analisis_por_especie': secciones['analisis_por_especie'][0],
+            'humedad_por_apiario': secciones['humedad_por_apiario'][0]
+        }
+        return datos, int(ahora - generado_en)
+
+    @staticmethod
+    def _calcular_contadores():
+        fecha_limite = timezone.now() - timedelta(days=DashboardService.DIAS_RECIENTES)
+        contadores = {
+            DashboardService._clave('total', nombre): modelo.objects.count()
+            for nombre, modelo in DashboardService.TOTALES.items()
+        }
+        contadores.update({
+            DashboardService._clave('recientes', nombre): modelo.objects.filter(created_at__gte=fecha_limite).count()
+            for nombre, modelo in DashboardService.RECIENTES.items()
+        })
+        return contadores
+
+    @staticmethod
+    def _calcular_muestras_por_mes():
+        """Pools (muestras) analizados en los últimos meses con análisis, por fecha_analisis"""
+        filas = Pool.objects.filter(fecha_analisis__isnull=False).annotate(
+            mes=TruncMonth('fecha_analisis')
+        ).values('mes').annotate(total=Count('id')).order_by('-mes')[:DashboardService.MESES_RECIENTES]
+        return [{'mes': fila['mes'], 'total': fila['total']} for fila in list(filas)[::-1]]
+
+    @staticmethod
+    def _calcular_analisis_por_especie():
+        """Top 10 de especies, leído de los totales precalculados de ResumenEspecie"""
+        resumenes = ResumenEspecie.objects.filter(total_analisis__gt=0).select_related(
+            'especie'
+        ).order_by('-total_analisis')[:10]
+        return [{
+            'especie__nombre_cientifico': resumen.especie.nombre_cientifico,
+            'total': resumen.total_analisis,
+            'promedio_granos': resumen.total_granos / resumen.total_analisis
+        } for resumen in resumenes]
+
+    @staticmethod
+    def _calcular_humedad_por_apiario():
+        return list(AnalisisFisicoQuimico.objects.values(
+            'tambor__apiarios__nombre_apiario'
+        ).annotate(
+            promedio_humedad=Avg('humedad')
+        ).order_by('-promedio_humedad'))
+
+    @staticmethod
+    def registrar_alta(instance):
+        """Incrementa los contadores del modelo de la instancia recién creada"""
+        DashboardService._ajustar([instance], 1)
+
+    @staticmethod
+    def registrar_baja(instance):
+        """Decrementa los contadores del modelo de la instancia borrada"""
+        DashboardService._ajustar([instance], -1)
+
+    @staticmethod
+    def registrar_altas(instancias):
+        """Como registrar_alta, para instancias creadas con bulk_create"""
+        DashboardService._ajustar(instancias, 1)
+
+    @staticmethod
+    def _ajustar(instancias, delta):
+        if not DashboardService.cache_compartida():
+            return
+        limite = timezone.now() - timedelta(days=DashboardService.DIAS_RECIENTES)
+        deltas = defaultdict(int)
+        for instance in instancias:
+            modelo = type(instance)
+            claves = [DashboardService._clave('total', nombre)
+                      for nombre, m in DashboardService.TOTALES.items() if m is modelo]
+            creado = getattr(instance, 'created_at', None)
+            if creado and creado >= limite:
+                claves += [DashboardService._clave('recientes', nombre)
+                           for nombre, m in DashboardService.RECIENTES.items() if m is modelo]
+            for clave in claves:
+                deltas[clave] += delta
+        if deltas:
+            transaction.on_commit(lambda: DashboardService._aplicar_deltas(deltas), robust=True)
+
+    @staticmethod
+    def _aplicar_deltas(deltas):
+        if DashboardService._backend() not in DashboardService.BACKENDS_INCR_ATOMICO:
+            # get + set desde varios procesos perdería incrementos
+            cache.delete_many(list(deltas) + [DashboardService._clave('contadores', 'generado_en')])
+            return
+        for clave, valor in deltas.items():
+            try:
+                cache.incr(clave, valor)
+            except ValueError:
+                # La clave no está en caché: se recalcula en la próxima lectura
+                pass
+
+    @staticmethod
+    def invalidar(*secciones):
+        """
+        Borra de la caché las secciones indicadas, o todo el tablero si no se indica ninguna
+
+        Dentro de una transacción, el borrado espera a que se confirme: antes,
+        otro request podría volver a guardar los datos sin la escritura.
+        """
+        if not DashboardService.cache_compartida():
+            return
+        if secciones:
+            claves = [DashboardService._clave(seccion) for seccion in secciones]
+        else:
+            claves = (
+                DashboardService._claves_contadores()
+                + [DashboardService._clave('contadores', 'generado_en')]
+                + [DashboardService._clave(seccion) for seccion in DashboardService.SECCIONES]
+            )
+        transaction.on_commit(lambda: cache.delete_many(claves), robust=True)
+
+
+class ConteoPolenService:
+    """
+    Guarda de una sola vez el conteo completo de especies de un pool
+    """
+
+    @staticmethod
+    def guardar_conteos(pool_id, conteos):
+        """
+        Reemplaza los análisis palinológicos del pool por los del conteo
+
+        Las especies del conteo se crean o actualizan con bulk_create /
+        bulk_update sobre la clave única (pool, especie) y las que no
+        figuran se eliminan. El porcentaje se recalcula en el servidor.
+        Todo ocurre en una transacción, con el pool bloqueado para que dos
+        conteos simultáneos no se mezclen.
+
+        Args:
+            pool_id (int): ID del pool
+            conteos (list[dict]): Items con 'especie', 'cantidad_granos' y,
+                opcionalmente, 'marca_especial' (si falta, se conserva la actual)
+
+        Returns:
+            dict: Composición resultante y cantidad de filas creadas,
+            actualizadas y eliminadas
+        """
+        with transaction.atomic(), ComposicionService.en_lote() as lote:
+            pool = Pool.objects.select_for_update(no_key=True).get(pk=pool_id)
+            existentes = {
+                analisis.especie_id: analisis
+                for analisis in AnalisisPalinologico.objects.filter(pool=pool)
+            }
+
+            total_granos = sum(item['cantidad_granos'] for item in conteos)
+            ahora = timezone.now()
+            nuevos, modificados = [], []
+            deltas_especies = {}
+
+            for item in conteos:
+                especie_id = item['especie']
+                cantidad = item['cantidad_granos']
+                porcentaje = (
+                    Decimal(cantidad * 100 / total_granos).quantize(Decimal('0.01'))
+                    if total_granos > 0 else Decimal('0.00')
+                )
+                analisis = existentes.get(especie_id)
+                if analisis is None:
+                    nuevos.append(AnalisisPalinologico(
+                        pool=pool,
+                        especie_id=especie_id,
+                        cantidad_granos=cantidad,
+                        marca_especial=item.get('marca_especial') or None,
+                        porcentaje=porcentaje
+                    ))
+                    deltas_especies[especie_id] = (1, cantidad)
+                else:
+                    deltas_especies[especie_id] = (0, cantidad - analisis.cantidad_granos)
+                    analisis.cantidad_granos = cantidad
+                    analisis.porcentaje = porcentaje
+                    if 'marca_especial' in item:
+                        analisis.marca_especial = item['marca_especial'] or None
+                    analisis.updated_at = ahora
+                    modificados.append(analisis)
+
+            AnalisisPalinologico.objects.bulk_create(nuevos)
+            AnalisisPalinologico.objects.bulk_update(
+                modificados, ['cantidad_granos', 'marca_especial', 'porcentaje', 'updated_at']
+            )
+
+            # Las bajas pasan por delete(): sus señales se acumulan en el lote
+            especies_conteo = {item['especie'] for item in conteos}
+            eliminados, _ = AnalisisPalinologico.objects.filter(pool=pool).exclude(
+                especie_id__in=especies_conteo
+            ).delete()
+
+            # bulk_create/bulk_update no disparan señales: registrar a mano
+            lote.registrar([pool.id], deltas_especies)
+            DashboardService.registrar_altas(nuevos)
+            DashboardService.invalidar('analisis_por_especie')
+
+        composicion = lote.composiciones[pool.id]
+        return {
+            'pool': pool.id,
+            'total_granos': composicion.total_granos,
+            'num_especies': composicion.num_especies,
+            'especies': composicion.especies,
+            'creados': len(nuevos),
+            'actualizados': len(modificados),
+            'eliminados': eliminados
+        }
+
+
+class TamboresNoDisponibles(Exception):
+    """Alguno de los tambores pedidos ya está asignado o lo está tomando otro analista"""
+
+    def __init__(self, tambor_ids):
+        self.tambor_ids = tambor_ids
+        super().__init__(f"Tambores no disponibles: {tambor_ids}")
+
+
+class PoolService:
+    """
+    Operaciones de alta de pools
+    """
+
+    @staticmethod
+    def crear_con_tambores(datos_pool, tambor_ids, fecha_asociacion=None):
+        """
+        Crea un pool y le asigna sus tambores en una sola transacción
+
+        Los tambores se bloquean con SELECT ... FOR UPDATE SKIP LOCKED: si
+        otro analista está tomando alguno al mismo tiempo, o ya está asignado,
+        la operación completa se cancela en lugar de quedar a medias. El
+        número de registro se reserva recién después, en la misma
+        transacción: un conflicto o un error a mitad de camino no consume
+        números del contador.
+
+        Args:
+            datos_pool (dict): Campos validados del pool
+            tambor_ids (list[int]): IDs de los tambores a asignar
+            fecha_asociacion (date | None): Fecha de asociación; por defecto la
+                fecha de análisis del pool o la fecha actual
+
+        Returns:
+            Pool: El pool creado
+
+        Raises:
+            TamboresNoDisponibles: Si algún tambor no se pudo tomar
+        """
+        pool = Pool(**datos_pool)
+
+        with transaction.atomic():
+            disponibles = set(
+                MuestraTambor.objects.select_for_update(skip_locked=True)
+                .filter(id__in=tambor_ids, estado_analisis_palinologico=False)
+                .values_list('id', flat=True)
+            )
+            faltantes = sorted(set(tambor_ids) - disponibles)
+            if faltantes:
+                raise TamboresNoDisponibles(faltantes)
+
+            # El contador queda bloqueado solo hasta el fin de esta transacción, que es corta
+            Pool.asignar_numeros_registro([pool])
+            pool.save()
+            fecha_asociacion = fecha_asociacion or pool.fecha_analisis or timezone.localdate()
+            ContienePool.objects.bulk_create([
+                ContienePool(pool=pool, tambor_id=tambor_id, fecha_asociacion=fecha_asociacion)
+                for tambor_id in tambor_ids
+            ])
+            MuestraTambor.objects.filter(id__in=tambor_ids).update(
+                estado_analisis_palinologico=True,
+                updated_at=timezone.now()
+            )
+
+        return pool
+
+
+class ExportacionService:
+    """
+    Exportación masiva de resultados de análisis en CSV o NDJSON
+
+    Las filas se leen con values_list().iterator(chunk_size=...), que en
+    PostgreSQL usa un cursor del lado del servidor, y se escriben a medida
+    que llegan: la memoria no crece con la cantidad de filas y el cliente
+    recibe los primeros bytes enseguida. La lectura va dentro de una
+    transacción (ver modelos/conexiones.py), con el statement_timeout de
+    EXPORTACION_STATEMENT_TIMEOUT_MS. Detrás de PgBouncer en modo
+    transaction no hay cursor del servidor y el resultado se lee completo.
+    """
+    CHUNK_SIZE = 2000
+    FILAS_POR_ENVIO = 500
+    FORMATOS = {
+        'csv': 'text/csv; charset=utf-8',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    # (encabezado, columna) de cada exportación
+    COLUMNAS_PALINOLOGICO = [
+        ('id', 'id'),
+        ('pool_id', 'pool_id'),
+        ('pool_num_registro', 'pool__num_registro'),
+        ('fecha_analisis', 'pool__fecha_analisis'),
+        ('analista_id', 'pool__analista_id'),
+        ('especie_id', 'especie_id'),
+        ('nombre_cientifico', 'especie__nombre_cientifico'),
+        ('nombre_comun', 'especie__nombre_comun'),
+        ('familia', 'especie__familia'),
+        ('cantidad_granos', 'cantidad_granos'),
+        ('marca_especial', 'marca_especial'),
+        ('porcentaje', 'porcentaje'),
+        ('created_at', 'created_at'),
+    ]
+    COLUMNAS_FISICOQUIMICO = [
+        ('id', 'id'),
+        ('num_registro', 'num_registro'),
+        ('tambor_id', 'tambor_id'),
+        ('tambor_num_registro', 'tambor__num_registro'),
+        ('analista_id', 'analista_id'),
+        ('color', 'color'),
+        ('humedad', 'humedad'),
+        ('fecha_extraccion', 'fecha_extraccion'),
+        ('fecha_analisis', 'fecha_analisis'),
+        ('observaciones', 'observaciones'),
+        ('created_at', 'created_at'),
+    ]
+
+    @staticmethod
+    def analisis_palinologicos(fecha_desde=None, fecha_hasta=None, apiarios=None,
+                               apicultores=None, especies=None):
+        """
+        Análisis palinológicos filtrados por fecha de análisis del pool,
+        apiario o apicultor de sus tambores y especie
+        """
+        queryset = AnalisisPalinologico.objects.all()
+        if fecha_desde:
+            queryset = queryset.filter(pool__fecha_analisis__gte=fecha_desde)
+        if fecha_hasta:
+            queryset = queryset.filter(pool__fecha_analisis__lte=fecha_hasta)
+        # Por subconsulta, para no repetir filas cuando un pool tiene varios tambores
+        if apiarios:
+            queryset = queryset.filter(pool__in=Pool.objects.filter(tambores__apiarios__in=apiarios))
+        if apicultores:
+            queryset = queryset.filter(
+                pool__in=Pool.objects.filter(tambores__apiarios__apicultor__in=apicultores)
+            )
+        if especies:
+            queryset = queryset.filter(especie__in=especies)
+        return queryset
+
+    @staticmethod
+    def analisis_fisicoquimicos(fecha_desde=None, fecha_hasta=None, apiarios=None,
+                                apicultores=None, especies=None):
+        """
+        Análisis físico-químicos filtrados por fecha de análisis, apiario o
+        apicultor del tambor y especie (tambores de pools con esa especie)
+        """
+        queryset = AnalisisFisicoQuimico.objects.all()
+        if fecha_desde:
+            queryset = queryset.filter(fecha_analisis__gte=fecha_desde)
+        if fecha_hasta:
+            queryset = queryset.filter(fecha_analisis__lte=fecha_hasta)
+        if apiarios:
+            queryset = queryset.filter(tambor__in=MuestraTambor.objects.filter(apiarios__in=apiarios))
+        if apicultores:
+            queryset = queryset.filter(
+                tambor__in=MuestraTambor.objects.filter(apiarios__apicultor__in=apicultores)
+            )
+        if especies:
+            queryset = queryset.filter(
+                tambor__in=MuestraTambor.objects.filter(pools__analisis_palinologicos__especie__in=especies)
+            )
+        return queryset
+
+    @staticmethod
+    def _filas(queryset, columnas):
+        return iterar(
+            queryset.order_by('id').values_list(*[columna for _, columna in columnas]),
+            ExportacionService.CHUNK_SIZE,
+            timeout_ms=getattr(settings, 'EXPORTACION_STATEMENT_TIMEOUT_MS', None),
+        )
+
+    @staticmethod
+    def _generar_csv(queryset, columnas):
+        class _Eco:
+            # csv.writer escribe en un "archivo" que devuelve lo escrito
+            def write(self, valor):
+                return valor
+
+        writer = csv.writer(_Eco())
+        yield writer.writerow([encabezado for encabezado, _ in columnas])
+        bloque = []
+        for fila in ExportacionService._filas(queryset, columnas):
+            # Fechas y horas en ISO 8601, igual que en la API
+            bloque.append(writer.writerow([
+                valor.isoformat() if isinstance(valor, datetime) else valor for valor in fila
+            ]))
+            if len(bloque) >= ExportacionService.FILAS_POR_ENVIO:
+                yield ''.join(bloque)
+                bloque = []
+        if bloque:
+            yield ''.join(bloque)
+
+    @staticmethod
+    def _generar_ndjson(queryset, columnas):
+        encabezados = [encabezado for encabezado, _ in columnas]
+        bloque = []
+        for fila in ExportacionService._filas(queryset, columnas):
+            bloque.append(json.dumps(dict(zip(encabezados, fila)), cls=DjangoJSONEncoder) + '\n')
+            if len(bloque) >= ExportacionService.FILAS_POR_ENVIO:
+                yield ''.join(bloque)
+                bloque = []
+        if bloque:
+            yield ''.join(bloque)
+
+    @staticmethod
+    def respuesta(queryset, columnas, formato, nombre):
+        """
+        StreamingHttpResponse con las filas del queryset
+
+        Args:
+            queryset (QuerySet): Filas a exportar
+            columnas (list[tuple]): Pares (encabezado, columna)
+            formato (str): 'csv' o 'ndjson'
+            nombre (str): Nombre base del archivo descargado
+        """
+        if formato == 'csv':
+            contenido = ExportacionService._generar_csv(queryset, columnas)
+        else:
+            contenido = ExportacionService._generar_ndjson(queryset, columnas)
+        response = StreamingHttpResponse(contenido, content_type=ExportacionService.FORMATOS[formato])
+        response['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+        return response
+
+
+class ImportacionTemporadaService:
+    """
+    Alta masiva de una temporada: tambores, sus apiarios y sus análisis
+    físico-químicos, desde un CSV o un Excel
+
+    Cada fila describe un tambor:
+        tambor, fecha_extraccion, apiarios (ids separados por ';'),
+        analista (username o id), color, humedad, fecha_analisis,
+        num_registro_analisis, observaciones
+    Las columnas del análisis son opcionales; si la fila trae color o
+    humedad se crea el análisis físico-químico del tambor.
+
+    El archivo se lee de a bloques. Cada bloque se valida completo con una
+    consulta por tabla de referencia (tambores y análisis existentes,
+    apiarios, analistas) y sus filas válidas se guardan con bulk_create en
+    una transacción. Las filas con errores no se guardan y se informan con su
+    número de línea.
+    """
+    BATCH_SIZE = 1000
+    SEPARADOR_APIARIOS = ';'
+    COLUMNAS = [
+        'tambor', 'fecha_extraccion', 'apiarios', 'analista', 'color', 'humedad',
+        'fecha_analisis', 'num_registro_analisis', 'observaciones',
+    ]
+
+    @staticmethod
+    def leer_filas(archivo, nombre):
+        """
+        Itera las filas del archivo como (número de línea, dict), sin cargarlo entero
+
+        Args:
+            archivo: Archivo binario abierto
+            nombre (str): Nombre del archivo; la extensión define el formato
+        """
+        if nombre.lower().endswith('.xlsx'):
+            try:
+                from openpyxl import load_workbook
+            except ImportError:
+                raise ValueError('Para importar archivos .xlsx hace falta instalar openpyxl')
+            hoja = load_workbook(archivo, read_only=True, data_only=True).active
+            filas = hoja.iter_rows(values_only=True)
+            encabezados = [str(valor or '').strip() for valor in next(filas, ())]
+            for numero, valores in enumerate(filas, start=2):
+                yield numero, dict(zip(encabezados, valores))
+        elif nombre.lower().endswith('.csv'):
+            lector = csv.DictReader(io.TextIOWrapper(archivo, encoding='utf-8-sig', newline=''))
+            for numero, fila in enumerate(lector, start=2):
+                yield numero, fila
+        else:
+            raise ValueError('El archivo debe ser .csv o .xlsx')
+
+    @staticmethod
+    def importar(filas, batch_size=None, dry_run=False):
+        """
+        Valida e importa las filas de una temporada
+
+        Args:
+            filas (iterable): Pares (número de línea, dict) de leer_filas
+            batch_size (int | None): Filas por bloque
+            dry_run (bool): Solo validar, sin guardar
+
+        Returns:
+            dict: Cantidad de filas leídas, objetos creados y errores por fila
+        """
+        batch_size = batch_size or ImportacionTemporadaService.BATCH_SIZE
+        resultado = {
+            'filas': 0,
+            'tambores_creados': 0,
+            'asignaciones_creadas': 0,
+            'analisis_creados': 0,
+            'errores': [],
+            'dry_run': dry_run,
+        }
+        # num_registro ya usados en el archivo -> línea donde aparecieron
+        vistos = {'tambor': {}, 'num_registro_analisis': {}}
+
+        bloque = []
+        for numero, fila in filas:
+            bloque.append((numero, fila))
+            if len(bloque) >= batch_size:
+                ImportacionTemporadaService._importar_bloque(bloque, vistos, dry_run, resultado)
+                bloque = []
+        if bloque:
+            ImportacionTemporadaService._importar_bloque(bloque, vistos, dry_run, resultado)
+        return resultado
+
+    @staticmethod
+    def _importar_bloque(bloque, vistos, dry_run, resultado):
+        resultado['filas'] += len(bloque)
+        filas = [
+            (numero, {columna: ImportacionTemporadaService._texto(fila.get(columna))
+                      for columna in ImportacionTemporadaService.COLUMNAS})
+            for numero, fila in bloque
+        ]
+
+        # Referencias del bloque completo: una consulta por tabla
+        tambores = {fila['tambor'] for _, fila in filas if fila['tambor']}
+        registros_analisis = {fila['num_registro_analisis'] for _, fila in filas if fila['num_registro_analisis']}
+        apiario_ids = set()
+        analistas = set()
+        for _, fila in filas:
+            apiario_ids.update(ImportacionTemporadaService._ids(fila['apiarios']) or ())
+            if fila['analista']:
+                analistas.add(fila['analista'])
+
+        tambores_existentes = set(
+            MuestraTambor.objects.filter(num_registro__in=tambores).values_list('num_registro', flat=True)
+        )
+        analisis_existentes = set(
+            AnalisisFisicoQuimico.objects.filter(num_registro__in=registros_analisis)
+            .values_list('num_registro', flat=True)
+        )
+        apiarios_existentes = set(Apiario.objects.filter(id__in=apiario_ids).values_list('id', flat=True))
+        analista_ids = {int(valor) for valor in analistas if valor.isdigit()}
+        analistas_por_clave = {}
+        for analista_id, username in Analista.objects.filter(
+            Q(username__in=analistas) | Q(id__in=analista_ids)
+        ).values_list('id', 'username'):
+            analistas_por_clave[username] = analista_id
+            analistas_por_clave.setdefault(str(analista_id), analista_id)
+
+        nuevos_tambores, asignaciones, nuevos_analisis = [], [], []
+        for numero, fila in filas:
+            errores = {}
+            datos = ImportacionTemporadaService._validar_fila(fila, errores)
+
+            tambor = fila['tambor']
+            if tambor in tambores_existentes:
+                errores['tambor'] = f"Ya existe un tambor con num_registro '{tambor}'."
+            elif tambor in vistos['tambor']:
+                errores['tambor'] = f"Tambor repetido en el archivo (línea {vistos['tambor'][tambor]})."
+
+            faltantes = sorted(set(datos.get('apiarios') or ()) - apiarios_existentes)
+            if faltantes:
+                errores['apiarios'] = f"Apiarios inexistentes: {faltantes}"
+
+            registro = fila['num_registro_analisis']
+            if registro in analisis_existentes:
+                errores['num_registro_analisis'] = f"Ya existe un análisis con num_registro '{registro}'."
+            elif registro and registro in vistos['num_registro_analisis']:
+                errores['num_registro_analisis'] = (
+                    f"num_registro repetido en el archivo (línea {vistos['num_registro_analisis'][registro]})."
+                )
+
+            con_analisis = datos.get('color') is not None or datos.get('humedad') is not None
+            if con_analisis and fila['analista'] and fila['analista'] not in analistas_por_clave:
+                errores['analista'] = f"Analista inexistente: '{fila['analista']}'."
+
+            if errores:
+                resultado['errores'].append({'fila': numero, 'errores': errores})
+                continue
+
+            vistos['tambor'][tambor] = numero
+            if registro:
+                vistos['num_registro_analisis'][registro] = numero
+
+            muestra = MuestraTambor(num_registro=tambor, fecha_de_extraccion=datos['fecha_extraccion'])
+            nuevos_tambores.append(muestra)
+            asignaciones += [(muestra, apiario_id) for apiario_id in datos['apiarios']]
+            if con_analisis:
+                nuevos_analisis.append((muestra, AnalisisFisicoQuimico(
+                    analista_id=analistas_por_clave[fila['analista']],
+                    color=datos['color'],
+                    humedad=datos['humedad'],
+                    fecha_extraccion=datos['fecha_extraccion'],
+                    fecha_analisis=datos['fecha_analisis'],
+                    num_registro=registro or None,
+                    observaciones=fila['observaciones'] or None,
+                )))
+
+        if dry_run or not nuevos_tambores:
+            return
+
+        try:
+            with transaction.atomic():
+                MuestraTambor.objects.bulk_create(nuevos_tambores)
+                relaciones = TamborApiario.objects.bulk_create([
+                    TamborApiario(tambor_id=muestra.id, apiario_id=apiario_id)
+                    for muestra, apiario_id in asignaciones
+                ])
+                for muestra, analisis in nuevos_analisis:
+                    analisis.tambor_id = muestra.id
+                analisis = AnalisisFisicoQuimico.objects.bulk_create([analisis for _, analisis in nuevos_analisis])
+                con_analisis = {muestra.id for muestra, _ in nuevos_analisis}
+                SerieFisicoQuimicaService.recalcular(
+                    {a.fecha_extraccion for a in analisis},
+                    {apiario_id for muestra, apiario_id in asignaciones if muestra.id in con_analisis},
+                )
+        except IntegrityError as e:
+            # Otro proceso dio de alta los mismos num_registro mientras se validaba
+            logger.warning("Bloque de importación descartado: %s", e)
+            # Nada del bloque se guardó: sus num_registro no cuentan como vistos para los bloques siguientes
+            for _, analisis in nuevos_analisis:
+                if analisis.num_registro:
+                    vistos['num_registro_analisis'].pop(analisis.num_registro, None)
+            for muestra in nuevos_tambores:
+                numero = vistos['tambor'].pop(muestra.num_registro)
+                resultado['errores'].append({'fila': numero, 'errores': {'non_field_errors': str(e)}})
+            return
+
+        resultado['tambores_creados'] += len(nuevos_tambores)
+        resultado['asignaciones_creadas'] += len(relaciones)
+        resultado['analisis_creados'] += len(analisis)
+
+        # bulk_create no emite señales: el tablero se actualiza acá
+        DashboardService.registrar_altas(nuevos_tambores + analisis)
+        DashboardService.invalidar('humedad_por_apiario')
+
+    @staticmethod
+    def _validar_fila(fila, errores):
+        """Convierte los valores de la fila y anota los errores por columna"""
+        datos = {}
+        if not fila['tambor']:
+            errores['tambor'] = 'Este campo es requerido.'
+        elif len(fila['tambor']) > 50:
+            errores['tambor'] = 'Debe tener como máximo 50 caracteres.'
+
+        for columna in ('fecha_extraccion', 'fecha_analisis'):
+            try:
+                datos[columna] = parse_date(fila[columna]) if fila[columna] else None
+            except ValueError:
+                datos[columna] = None
+            if fila[columna] and datos[columna] is None:
+                errores[columna] = 'Fecha inválida; usar el formato AAAA-MM-DD.'
+
+        datos['apiarios'] = ImportacionTemporadaService._ids(fila['apiarios'])
+        if datos['apiarios'] is None:
+            errores['apiarios'] = "Debe ser una lista de ids separados por ';'."
+            datos['apiarios'] = []
+
+        datos['color'] = None
+        if fila['color']:
+            try:
+                datos['color'] = int(Decimal(fila['color']).to_integral_exact())
+            except (InvalidOperation, ValueError):
+                errores['color'] = 'Debe ser un número entero.'
+
+        datos['humedad'] = None
+        if fila['humedad']:
+            try:
+                humedad = Decimal(fila['humedad'].replace(',', '.'))
+                if not humedad.is_finite() or humedad.as_tuple().exponent < -2 or humedad.copy_abs() >= 1000:
+                    raise InvalidOperation
+                datos['humedad'] = humedad
+            except InvalidOperation:
+                errores['humedad'] = 'Debe ser un número con hasta 3 enteros y 2 decimales.'
+
+        if datos['color'] is not None or datos['humedad'] is not None:
+            if not fila['analista']:
+                errores['analista'] = 'Es requerido cuando la fila trae un análisis.'
+            if not fila['fecha_extraccion']:
+                errores['fecha_extraccion'] = 'Es requerida cuando la fila trae un análisis.'
+        if len(fila['num_registro_analisis']) > 50:
+            errores['num_registro_analisis'] = 'Debe tener como máximo 50 caracteres.'
+        return datos
+
+    @staticmethod
+    def _texto(valor):
+        # Normaliza lo que devuelven csv y openpyxl a texto sin espacios
+        if valor is None:
+            return ''
+        if isinstance(valor, datetime):
+            return valor.date().isoformat()
+        if isinstance(valor, date):
+            return valor.isoformat()
+        if isinstance(valor, float) and valor.is_integer():
+            return str(int(valor))
+        return str(valor).strip()
+
+    @staticmethod
+    def _ids(valor):
+        """Ids enteros de una lista separada por ';', o None si alguno no es válido"""
+        try:
+            return [int(item) for item in valor.split(ImportacionTemporadaService.SEPARADOR_APIARIOS) if item.strip()]
+        except ValueError:
+            return None
+
+
+class ReportePoolService:
+    """
+    Reportes PDF de pools con caché en disco
+
+    Cada PDF se guarda con el hash de todo lo que lo define como nombre: la
+    versión del formato, el updated_at del pool, de su analista, de su
+    composición, de las especies contadas, de sus tambores y de sus análisis
+    físico-químicos, los apiarios de cada tambor con el updated_at del
+    apiario y de su apicultor, y el tipo elegido en el pedido. Si nada
+    cambió el archivo ya existe y se sirve desde el disco; cualquier cambio
+    da otra clave, así que nunca hace falta invalidar. Los lotes grandes se
+    renderizan en procesos de trabajo.
+
+    Los datos de texto libre del encabezado (solicitante, observacion,
+    fecha_cosecha) llegan en un GET sin autenticación: esos PDF se
+    renderizan en cada pedido (renderizar_sin_cache) y no se guardan.
+
+    Los archivos sin usar hace más de REPORTES_PDF_MAX_DIAS días se borran,
+    y si el directorio supera REPORTES_PDF_MAX_MB se borran los de uso más
+    antiguo (la fecha de modificación se renueva en cada uso).
+    """
+    # Subir al cambiar el diseño del reporte, para no servir PDFs viejos
+    VERSION = 2
+    # Datos del pedido que pueden ser parte de un PDF guardado
+    EXTRAS_CACHEABLES = ('tipo',)
+
+    @staticmethod
+    def _directorio():
+        directorio = Path(getattr(settings, 'REPORTES_PDF_DIR', Path(settings.BASE_DIR) / 'reportes_cache'))
+        directorio.mkdir(parents=True, exist_ok=True)
+        return directorio
+
+    @staticmethod
+    def _claves(pool_ids, extras):
+        """Clave de caché de cada pool existente, en dos consultas"""
+        especies_actualizadas = AnalisisPalinologico.objects.filter(pool=OuterRef('pk')).values('pool').annotate(
+            actualizada=Max('especie__updated_at')
+        ).values('actualizada')
+        filas = Pool.objects.filter(id__in=pool_ids).annotate(
+            analista_actualizado=Max('analista__updated_at'),
+            composicion_actualizada=Max('composicion__updated_at'),
+            especies_actualizadas=Subquery(especies_actualizadas),
+            tambores_actualizados=Max('tambores__updated_at'),
+            total_tambores=Count('tambores', distinct=True),
+            fisicoquimicos_actualizados=Max('tambores__analisis_fisicoquimicos__updated_at'),
+            total_fisicoquimicos=Count('tambores__analisis_fisicoquimicos', distinct=True),
+        ).values_list(
+            'id', 'updated_at', 'tipo_floral', 'especie_dominante_id', 'porcentaje_dominante',
+            'analista_actualizado', 'composicion_actualizada', 'especies_actualizadas',
+            'tambores_actualizados', 'total_tambores', 'fisicoquimicos_actualizados', 'total_fisicoquimicos'
+        )
+
+        # Un tambor que pasa a otro apiario cambia la clave aunque no cambie nada más
+        apiarios = defaultdict(list)
+        for pool_id, *apiario in ContienePool.objects.filter(pool_id__in=pool_ids).order_by(
+            'pool_id', 'tambor_id', 'tambor__apiarios__id'
+        ).values_list(
+            'pool_id', 'tambor_id', 'tambor__apiarios__id',
+            'tambor__apiarios__updated_at', 'tambor__apiarios__apicultor__updated_at'
+        ):
+            apiarios[pool_id].append(apiario)
+
+        return {
+            fila[0]: hashlib.sha256(json.dumps(
+                [ReportePoolService.VERSION, fila, apiarios[fila[0]], extras], cls=DjangoJSONEncoder, sort_keys=True
+            ).encode()).hexdigest()
+            for fila in filas
+        }
+
+    @staticmethod
+    def datos_reportes(pool_ids, extras=None):
+        """
+        Datos de los reportes de varios pools, con un número fijo de consultas
+
+        Args:
+            pool_ids (list[int]): IDs de los pools
+            extras (dict | None): solicitante, observacion, fecha_cosecha y tipo
+                opcionales que se muestran en el encabezado
+
+        Returns:
+            dict: {pool_id: datos} con tipos simples, listos para renderizar_reporte
+        """
+        extras = extras or {}
+        datos = {}
+        for pool in Pool.objects.filter(id__in=pool_ids).select_related('analista', 'especie_dominante'):
+            datos[pool.id] = {
+                'pool': {
+                    'id': pool.id,
+                    'num_registro': pool.num_registro,
+                    'fecha_analisis': pool.fecha_analisis.isoformat() if pool.fecha_analisis else None,
+                    'analista': f"{pool.analista.nombres} {pool.analista.apellidos or ''}".strip(),
+                    'observaciones': pool.observaciones,
+                },
+                'tambores': [],
+                'especies': [],
+                'marcas': [],
+                'fisicoquimicos': [],
+                'total_granos': 0,
+                **extras,
+                'tipo': ReportePoolService._tipo_floral(pool, extras.get('tipo')),
+            }
+
+        # Conteos: las especies con marca especial no aportan al porcentaje de la miel
+        for pool_id, nombre_cientifico, nombre_comun, familia, cantidad, marca in (
+            AnalisisPalinologico.objects.filter(pool_id__in=datos).order_by('pool_id', 'id').values_list(
+                'pool_id', 'especie__nombre_cientifico', 'especie__nombre_comun',
+                'especie__familia', 'cantidad_granos', 'marca_especial'
+            )
+        ):
+            especie = {
+                'nombre_cientifico': nombre_cientifico,
+                'nombre_comun': nombre_comun,
+                'familia': familia,
+                'cantidad': cantidad,
+            }
+            if marca:
+                datos[pool_id]['marcas'].append({**especie, 'marca_especial': marca})
+            elif cantidad:
+                datos[pool_id]['especies'].append(especie)
+                datos[pool_id]['total_granos'] += cantidad
+
+        for reporte in datos.values():
+            total = reporte['total_granos']
+            for especie in reporte['especies']:
+                especie['porcentaje'] = especie['cantidad'] / total * 100
+            reporte['especies'].sort(key=lambda especie: -especie['cantidad'])
+
+        # Tambores con sus apiarios y apicultores, y sus análisis físico-químicos
+        pools_por_tambor = defaultdict(list)
+        tambores = {}
+        for pool_id, tambor_id, num_registro, fecha in ContienePool.objects.filter(
+            pool_id__in=datos
+        ).order_by('pool_id', 'tambor_id').values_list(
+            'pool_id', 'tambor_id', 'tambor__num_registro', 'tambor__fecha_de_extraccion'
+        ):
+            pools_por_tambor[tambor_id].append(pool_id)
+            tambores[(pool_id, tambor_id)] = {
+                'id': tambor_id,
+                'num_registro': num_registro,
+                'fecha_de_extraccion': fecha.isoformat() if fecha else None,
+                'apiarios': [],
+                'apicultores': [],
+            }
+            datos[pool_id]['tambores'].append(tambores[(pool_id, tambor_id)])
+
+        for tambor_id, apiario, nombre, apellido in TamborApiario.objects.filter(
+            tambor_id__in=pools_por_tambor
+        ).order_by('tambor_id', 'apiario_id').values_list(
+            'tambor_id', 'apiario__nombre_apiario', 'apiario__apicultor__nombre', 'apiario__apicultor__apellido'
+        ):
+            apicultor = f"{nombre} {apellido or ''}".strip()
+            for pool_id in pools_por_tambor[tambor_id]:
+                tambor = tambores[(pool_id, tambor_id)]
+                tambor['apiarios'].append(apiario)
+                if apicultor not in tambor['apicultores']:
+                    tambor['apicultores'].append(apicultor)
+        for tambor in tambores.values():
+            tambor['apiarios'] = ', '.join(tambor['apiarios'])
+            tambor['apicultores'] = ', '.join(tambor['apicultores'])
+
+        for tambor_id, tambor, num_registro, fecha, color, humedad, nombres, apellidos in (
+            AnalisisFisicoQuimico.objects.filter(tambor_id__in=pools_por_tambor).order_by('tambor_id', 'id')
+            .values_list('tambor_id', 'tambor__num_registro', 'num_registro', 'fecha_analisis',
+                         'color', 'humedad', 'analista__nombres', 'analista__apellidos')
+        ):
+            analisis = {
+                'tambor': tambor,
+                'num_registro': num_registro,
+                'fecha_analisis': fecha.isoformat() if fecha else None,
+                'color': color,
+                'humedad': str(humedad) if humedad is not None else None,
+                'analista': f"{nombres} {apellidos or ''}".strip(),
+            }
+            for pool_id in pools_por_tambor[tambor_id]:
+                datos[pool_id]['fisicoquimicos'].append(analisis)
+
+        return datos
+
+    @staticmethod
+    def _tipo_floral(pool, tipo_elegido=None):
+        """Tipo guardado por ClasificacionService; el analista puede fijar el tipo"""
+        if pool.tipo_floral is None:
+            return {'tipo': tipo_elegido or 'N/A', 'descripcion': 'Sin datos suficientes'}
+        especie = pool.especie_dominante.nombre_cientifico if pool.especie_dominante else 'N/A'
+        porcentaje = pool.porcentaje_dominante
+        if pool.tipo_floral == Pool.MONOFLORAL:
+            descripcion = f"Miel monofloral de {especie} ({porcentaje:.1f}%)"
+        else:
+            descripcion = f"Miel multifloral - Especie dominante: {especie} ({porcentaje:.1f}%)"
+        return {'tipo': tipo_elegido or pool.tipo_floral, 'descripcion': descripcion}
+
+    @staticmethod
+    def obtener_pdfs(pool_ids, extras=None):
+        """
+        Rutas de los PDF de los pools, renderizando solo los que no están en caché
+
+        Args:
+            pool_ids (list[int]): IDs de los pools
+            extras (dict | None): Datos opcionales del encabezado; solo se
+                usan los de EXTRAS_CACHEABLES
+
+        Returns:
+            dict: {pool_id: Path} de los pools existentes
+        """
+        from .reportes_pdf import renderizar_reporte
+
+        extras = {
+            clave: valor for clave, valor in (extras or {}).items()
+            if valor and clave in ReportePoolService.EXTRAS_CACHEABLES
+        }
+        directorio = ReportePoolService._directorio()
+        rutas = {
+            pool_id: directorio / f'{clave}.pdf'
+            for pool_id, clave in ReportePoolService._claves(pool_ids, extras).items()
+        }
+        faltantes = []
+        for pool_id, ruta in rutas.items():
+            try:
+                # Marca el uso, para que la poda borre primero los que no se piden
+                os.utime(ruta)
+            except FileNotFoundError:
+                faltantes.append(pool_id)
+        if not faltantes:
+            return rutas
+
+        # Un lote grande puede superar el statement_timeout general
+        with transaccion_lectura(getattr(settings, 'EXPORTACION_STATEMENT_TIMEOUT_MS', None),
+                                 using=router.db_for_read(Pool)):
+            datos = ReportePoolService.datos_reportes(faltantes, extras)
+        pendientes = [datos[pool_id] for pool_id in faltantes]
+        workers = getattr(settings, 'REPORTES_PDF_WORKERS', 1)
+        if workers > 1 and len(faltantes) >= getattr(settings, 'REPORTES_PDF_PARALELO_DESDE', 8):
+            with ProcessPoolExecutor(max_workers=min(workers, len(faltantes))) as executor:
+                for pool_id, contenido in zip(faltantes, executor.map(renderizar_reporte, pendientes, chunksize=4)):
+                    ReportePoolService._guardar(rutas[pool_id], contenido)
+        else:
+            for pool_id, reporte in zip(faltantes, pendientes):
+                ReportePoolService._guardar(rutas[pool_id], renderizar_reporte(reporte))
+        ReportePoolService.podar(directorio, conservar=set(rutas.values()))
+        return rutas
+
+    @staticmethod
+    def renderizar_sin_cache(pool_id, extras):
+        """
+        PDF de un pool con todos los datos del encabezado, sin guardarlo en el disco
+
+        Returns:
+            bytes | None: El PDF, o None si el pool no existe
+        """
+        from .reportes_pdf import renderizar_reporte
+
+        extras = {clave: valor for clave, valor in (extras or {}).items() if valor}
+        datos = ReportePoolService.datos_reportes([pool_id], extras)
+        if pool_id not in datos:
+            return None
+        return renderizar_reporte(datos[pool_id])
+
+    @staticmethod
+    def podar(directorio=None, conservar=()):
+        """
+        Borra los PDF sin usar hace más de REPORTES_PDF_MAX_DIAS días y, si el
+        directorio sigue superando REPORTES_PDF_MAX_MB, los de uso más antiguo
+
+        Args:
+            conservar (set[Path]): Archivos que no se borran (los del pedido en curso)
+
+        Returns:
+            int: Cantidad de archivos borrados
+        """
+        directorio = Path(directorio or ReportePoolService._directorio())
+        limite = time.time() - getattr(settings, 'REPORTES_PDF_MAX_DIAS', 30) * 86400
+        maximo = getattr(settings, 'REPORTES_PDF_MAX_MB', 500) * 1024 * 1024
+
+        archivos = []
+        for entrada in os.scandir(directorio):
+            try:
+                info = entrada.stat()
+            except FileNotFoundError:
+                continue
+            archivos.append((info.st_mtime, info.st_size, Path(entrada.path)))
+        archivos.sort()
+
+        borrados = 0
+        total = sum(tamanio for _, tamanio, _ in archivos)
+        for modificado, tamanio, ruta in archivos:
+            # Los .tmp viejos son de escrituras que no terminaron
+            if modificado >= limite and total <= maximo:
+                break
+            if ruta in conservar:
+                continue
+            try:
+                ruta.unlink()
+            except FileNotFoundError:
+                pass
+            total -= tamanio
+            borrados += 1
+        return borrados
+
+    @staticmethod
+    def _guardar(ruta, contenido):
+        # Escritura atómica: otro proceso nunca lee un PDF a medio escribir
+        temporal = ruta.with_name(f'{ruta.name}.{os.getpid()}.tmp')
+        temporal.write_bytes(contenido)
+        os.replace(temporal, ruta)
+
+    @staticmethod
+    def comprimir(rutas, nombres):
+        """
+        ZIP con los PDF indicados, en un archivo temporal
+
+        Args:
+            rutas (dict): {pool_id: Path}
+            nombres (dict): {pool_id: nombre del archivo dentro del ZIP}
+        """
+        archivo = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+        # Los PDF ya vienen comprimidos
+        with zipfile.ZipFile(archivo, 'w', compression=zipfile.ZIP_STORED) as zip_file:
+            for pool_id, ruta in rutas.items():
+                zip_file.write(ruta, nombres[pool_id])
+        archivo.seek(0)
+        return archivo
+
+
+class SimilitudService:
+    """
+    Pools con espectro polínico parecido, sobre una matriz en memoria
+
+    Cada proceso arma una vez la matriz pool × especie desde PoolComposicion
+    y en cada consulta solo lee las composiciones con updated_at posterior a
+    la última lectura (menos un margen, por transacciones que confirman
+    tarde). Los borrados no dejan filas que leer: cada composición borrada
+    incrementa el contador CONTADOR_BORRADOS (ver signals.py), y si cambió
+    desde la última consulta se quitan de la matriz los pools que ya no
+    están en la tabla.
+    """
+    # Las composiciones se escriben con la hora de la transacción, que puede
+    # confirmar después de una lectura: se relee este margen hacia atrás
+    MARGEN_RELECTURA = timedelta(minutes=1)
+    CONTADOR_BORRADOS = 'composiciones_borradas'
+
+    _matriz = None
+
+    @staticmethod
+    def _cantidades(especies):
+        return {especie['especie_id']: especie['cantidad'] for especie in especies if especie['cantidad'] > 0}
+
+    @staticmethod
+    def _leer(matriz, queryset):
+        ultima = matriz.actualizada_hasta
+        cambios = []
+        for pool_id, especies, actualizada in iterar(
+            queryset.values_list('pool_id', 'especies', 'updated_at'), ExportacionService.CHUNK_SIZE
+        ):
+            cambios.append((pool_id, SimilitudService._cantidades(especies)))
+            if ultima is None or actualizada > ultima:
+                ultima = actualizada
+        matriz.actualizar(cambios)
+        matriz.actualizada_hasta = ultima
+
+    @staticmethod
+    def matriz():
+        """Matriz del proceso, al día con PoolComposicion"""
+        from .similitud import MatrizComposiciones
+
+        # Se lee antes que las composiciones: un borrado posterior se ve en la próxima consulta
+        borrados = ContadorRegistro.objects.filter(
+            nombre=SimilitudService.CONTADOR_BORRADOS
+        ).values_list('ultimo_valor', flat=True).first() or 0
+
+        matriz = SimilitudService._matriz
+        if matriz is not None:
+            with matriz.lock:
+                if matriz.actualizada_hasta is not None:
+                    SimilitudService._leer(matriz, PoolComposicion.objects.filter(
+                        updated_at__gte=matriz.actualizada_hasta - SimilitudService.MARGEN_RELECTURA
+                    ))
+                if borrados != matriz.borrados:
+                    vigentes = set(PoolComposicion.objects.values_list('pool_id', flat=True))
+                    matriz.quitar([pool_id for pool_id in matriz.fila_por_pool if pool_id not in vigentes])
+                    matriz.borrados = borrados
+                return matriz
+
+        matriz = MatrizComposiciones()
+        SimilitudService._leer(matriz, PoolComposicion.objects.all())
+        matriz.borrados = borrados
+        SimilitudService._matriz = matriz
+        return matriz
+
+    @staticmethod
+    def similares_a_pool(pool_id, k=10, metrica='coseno'):
+        """
+        Los k pools con composición más parecida a la del pool indicado
+
+        Returns:
+            list[dict] | None: Resultados, o None si el pool no tiene composición
+        """
+        composicion = PoolComposicion.objects.filter(pool_id=pool_id).values_list('especies', flat=True).first()
+        if composicion is None:
+            return None
+        return SimilitudService.similares_a_perfil(
+            SimilitudService._cantidades(composicion), k, metrica, excluir=pool_id
+        )
+
+    @staticmethod
+    def similares_a_perfil(cantidades, k=10, metrica='coseno', excluir=None):
+        """
+        Los k pools con composición más parecida a un perfil de referencia
+
+        Args:
+            cantidades (dict): {especie_id: cantidad de granos}
+            k (int): Cantidad de resultados
+            metrica (str): 'coseno' o 'bray-curtis'
+            excluir (int | None): Pool a dejar fuera de los resultados
+
+        Returns:
+            list[dict]: pool_id, num_registro y similitud, de mayor a menor
+        """
+        matriz = SimilitudService.matriz()
+        vector, norma = matriz.vector(cantidades)
+        resultados = matriz.similares(vector, norma, k, metrica, excluir=excluir)
+        registros = dict(
+            Pool.objects.filter(id__in=[pool_id for pool_id, _ in resultados]).values_list('id', 'num_registro')
+        )
+        return [{
+            'pool_id': pool_id,
+            'num_registro': registros.get(pool_id),
+            'similitud': round(similitud, 4),
+        } for pool_id, similitud in resultados if pool_id in registros]
+
+
+class MapaApiariosService:
+    """
+    Resultados agregados por celda de geohash, para mapas de calor regionales
+
+    Cada sección es una consulta agrupada por Substr(geohash, 1, precisión)
+    sobre los apiarios de la caja: cuatro consultas en total sin importar
+    cuántos apiarios, tambores o pools haya. Un tambor o pool con apiarios en
+    varias celdas cuenta en cada una de ellas.
+    """
+    PRECISION_DEFECTO = 5
+    PRECISIONES = range(1, 9)
+    ESPECIES_POR_CELDA = 3
+
+    @staticmethod
+    def celdas(caja=None, precision=None):
+        """
+        Args:
+            caja (tuple | None): (lat_min, lon_min, lat_max, lon_max); None para todo el mapa
+            precision (int | None): Largo del prefijo de geohash (1 a 8)
+
+        Returns:
+            list[dict]: Una entrada por celda con apiarios, ordenadas por celda
+        """
+        from .geo import caja_geohash, q_caja
+
+        precision = precision or MapaApiariosService.PRECISION_DEFECTO
+
+        def filtrados(queryset, prefijo=''):
+            condicion = Q(**{f'{prefijo}geohash__isnull': False})
+            if caja is not None:
+                condicion &= q_caja(caja, prefijo)
+            # Un solo filter(): el annotate reutiliza el mismo JOIN
+            return queryset.filter(condicion).annotate(celda=Substr(f'{prefijo}geohash', 1, precision))
+
+        celdas = {}
+        for fila in filtrados(Apiario.objects).values('celda').annotate(
+            apiarios=Count('id'), colmenas=Sum('cant_colmenas')
+        ).order_by('celda'):
+            lat_min, lon_min, lat_max, lon_max = caja_geohash(fila['celda'])
+            celdas[fila['celda']] = {
+                'celda': fila['celda'],
+                'caja': [lat_min, lon_min, lat_max, lon_max],
+                'centro': [(lat_min + lat_max) / 2, (lon_min + lon_max) / 2],
+                'apiarios': fila['apiarios'],
+                'colmenas': fila['colmenas'],
+                'analisis_fisicoquimicos': 0,
+                'humedad_promedio': None,
+                'pools': 0,
+                'pools_monoflorales': 0,
+                'especies_dominantes': [],
+            }
+
+        for fila in filtrados(AnalisisFisicoQuimico.objects, 'tambor__apiarios__').values('celda').annotate(
+            total=Count('id', distinct=True), humedad=Avg('humedad')
+        ).order_by():
+            celdas[fila['celda']]['analisis_fisicoquimicos'] = fila['total']
+            celdas[fila['celda']]['humedad_promedio'] = (
+                round(float(fila['humedad']), 2) if fila['humedad'] is not None else None
+            )
+
+        pools = filtrados(Pool.objects, 'tambores__apiarios__')
+        for fila in pools.values('celda').annotate(
+            total=Count('id', distinct=True),
+            monoflorales=Count('id', filter=Q(tipo_floral=Pool.MONOFLORAL), distinct=True),
+        ).order_by():
+            celdas[fila['celda']]['pools'] = fila['total']
+            celdas[fila['celda']]['pools_monoflorales'] = fila['monoflorales']
+
+        for fila in pools.filter(especie_dominante__isnull=False).values(
+            'celda', 'especie_dominante_id', 'especie_dominante__nombre_cientifico'
+        ).annotate(total=Count('id', distinct=True)).order_by('celda', '-total', 'especie_dominante_id'):
+            especies = celdas[fila['celda']]['especies_dominantes']
+            if len(especies) < MapaApiariosService.ESPECIES_POR_CELDA:
+                especies.append({
+                    'especie_id': fila['especie_dominante_id'],
+                    'especie': fila['especie_dominante__nombre_cientifico'],
+                    'pools': fila['total'],
+                })
+
+        return list(celdas.values())
+
+
+class EstadisticasApiarioService:
+    """
+    Estadísticas de apiarios en una sola consulta, sin importar cuántos sean
+
+    Cada métrica es una subconsulta agregada y correlacionada por apiario que
+    parte de tambor_apiario (índice por id_apiario): las uniones de una
+    métrica no se cruzan con las de las otras, así que los COUNT(DISTINCT)
+    no recorren el producto de tambores × pools × análisis.
+    """
+    CAMPOS = (
+        'total_tambores', 'total_muestras', 'analisis_palinologicos',
+        'especies_encontradas', 'promedio_humedad', 'promedio_color',
+    )
+
+    @staticmethod
+    def _metrica(agregado):
+        return Subquery(
+            TamborApiario.objects.filter(apiario=OuterRef('pk')).order_by().values('apiario').annotate(
+                valor=agregado
+            ).values('valor')
+        )
+
+    @staticmethod
+    def anotar(queryset):
+        """Agrega al queryset de apiarios una anotación por cada campo de CAMPOS"""
+        metrica = EstadisticasApiarioService._metrica
+        return queryset.annotate(
+            total_tambores=Coalesce(metrica(Count('tambor_id')), 0),
+            total_muestras=Coalesce(metrica(Count('tambor__pools', distinct=True)), 0),
+            analisis_palinologicos=Coalesce(
+                metrica(Count('tambor__pools__analisis_palinologicos', distinct=True)), 0
+            ),
+            especies_encontradas=Coalesce(
+                metrica(Count('tambor__pools__analisis_palinologicos__especie', distinct=True)), 0
+            ),
+            promedio_humedad=metrica(Avg('tambor__analisis_fisicoquimicos__humedad')),
+            promedio_color=metrica(Avg('tambor__analisis_fisicoquimicos__color')),
+        )
+
+    @staticmethod
+    def estadisticas(apiario_id):
+        """Estadísticas de un apiario, o None si no existe"""
+        return EstadisticasApiarioService.anotar(
+            Apiario.objects.filter(pk=apiario_id)
+        ).values(*EstadisticasApiarioService.CAMPOS).first()
+
+    @staticmethod
+    def por_apicultor(apicultor_id):
+        """Estadísticas de todos los apiarios del apicultor, en una consulta"""
+        return list(EstadisticasApiarioService.anotar(
+            Apiario.objects.filter(apicultor_id=apicultor_id)
+        ).order_by('id').values('id', 'nombre_apiario', *EstadisticasApiarioService.CAMPOS))
+
+
+def get_pool_stats_response(pool_id):
+    """
+    Función de conveniencia para obtener respuesta JSON de estadísticas del pool
+    
+    Args:
+        pool_id (int): ID del pool
+        
+    Returns:
+        JsonResponse: Respuesta HTTP con datos o error
+    """
+    result = PoolStatsService.get_pool_stats(pool_id)
+    
+    if result.get('status') == 200:
+        # Remover el campo status antes de enviar la respuesta
+        result.pop('status')
+        return JsonResponse(result)
+    else:
+        status_code = result.get('status', 500)
+        error_message = result.get('error', 'Error desconocido')
+        return JsonResponse({'error': error_message}, status=status_code)
+
+
+def get_bulk_pool_stats_response(pool_ids=None, fecha_desde=None, fecha_hasta=None):
+    """
+    Respuesta en streaming con las estadísticas de muchos pools
+
+    El cuerpo es un objeto JSON indexado por id de pool; cada valor es
+    exactamente lo que devuelve el endpoint individual para ese pool
+    (las estadísticas o el objeto ``{'error': ...}``).
+
+    Args:
+        pool_ids (list[int] | None): IDs de los pools, o None para todos
+        fecha_desde (date | None): Fecha de análisis mínima
+        fecha_hasta (date | None): Fecha de análisis máxima
+
+    Returns:
+        StreamingHttpResponse: Respuesta HTTP con los datos de cada pool
+    """
+    def generar():
+        yield '{'
+        separador = ''
+        for pool_id, result in PoolStatsService.get_bulk_pool_stats(pool_ids, fecha_desde, fecha_hasta):
+            if result.pop('status') != 200:
+                result = {'error': result.get('error', 'Error desconocido')}
+            yield f'{separador}"{pool_id}": {json.dumps(result, cls=DjangoJSONEncoder)}'
+            separador = ', '
+        yield '}'
+
+    return StreamingHttpResponse(generar(), content_type='application/json')
@@ -0,0 +1,266 @@
+"""
+Señales que mantienen al día los datos derivados: las tablas PoolComposicion,
+ResumenEspecie y SerieFisicoQuimica, la clasificación floral de los pools,
+los contadores del tablero guardados en caché y el contador de composiciones
+borradas que consulta la matriz de similitud.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models.Apicultor_model import Apicultor
+from .models.Apiario_model import Apiario
+from .models.TamborApiario_model import TamborApiario
+from .models.Pool_model import Pool
+from .models.Especie_model import Especie
+from .models.AnalisisPalinologico_model import AnalisisPalinologico
+from .models.AnalisisFisicoQuimico_model import AnalisisFisicoQuimico
+from .models.PoolComposicion_model import PoolComposicion
+from .models.ResumenEspecie_model import ResumenEspecie
+from .models.ContadorRegistro_model import ContadorRegistro
+from .models.ReglaClasificacion_model import ReglaClasificacion
+from .services import (
+    ClasificacionService, ComposicionService, DashboardService, SerieFisicoQuimicaService, SimilitudService,
+)
+
+
+def _borrado_desde(origin, *modelos):
+    """True si el borrado viene en cascada desde alguno de los modelos"""
+    if origin is None:
+        return False
+    modelo = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(modelo, modelos)
+
+
+@receiver(pre_save, sender=AnalisisPalinologico)
+def recordar_analisis_previo(sender, instance, raw=False, **kwargs):
+    """Guarda pool, especie y cantidad previas para poder ajustar los totales"""
+    instance._valores_previos = None
+    if instance.pk and not raw:
+        instance._valores_previos = sender.objects.filter(pk=instance.pk).values_list(
+            'pool_id', 'especie_id', 'cantidad_granos'
+        ).first()
+
+
+@receiver(post_save, sender=AnalisisPalinologico)
+def actualizar_tras_guardar_analisis(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    deltas = {instance.especie_id: (1, instance.cantidad_granos)}
+    pool_ids = {instance.pool_id}
+
+    previos = getattr(instance, '_valores_previos', None)
+    if previos:
+        pool_id, especie_id, cantidad = previos
+        delta_analisis, delta_granos = deltas.get(especie_id, (0, 0))
+        deltas[especie_id] = (delta_analisis - 1, delta_granos - cantidad)
+        pool_ids.add(pool_id)
+
+    ComposicionService.registrar_cambios(pool_ids, deltas)
+
+
+@receiver(post_delete, sender=AnalisisPalinologico)
+def actualizar_tras_borrar_analisis(sender, instance, origin=None, **kwargs):
+    deltas = {instance.especie_id: (-1, -instance.cantidad_granos)}
+    if not _borrado_desde(origin, Pool):
+        ComposicionService.registrar_cambios([instance.pool_id], deltas)
+        return
+    # Si se borra el pool, su composición se borra con él: solo cambian los resúmenes
+    lote = getattr(origin, '_lote_composicion', None)
+    if lote is not None:
+        lote.registrar(deltas=deltas)
+    else:
+        ComposicionService.registrar_cambios(deltas=deltas)
+
+
+@receiver(pre_delete, sender=Pool)
+def agrupar_borrado_de_pool(sender, instance, origin=None, **kwargs):
+    """Los análisis del pool se borran en cascada: sus cambios se aplican juntos al final"""
+    if origin is not None:
+        ComposicionService.lote_de_borrado(origin, instance.pk)
+
+
+@receiver(post_delete, sender=Pool)
+def aplicar_borrado_de_pool(sender, instance, origin=None, **kwargs):
+    # Los análisis se borran antes que el pool: sus señales ya corrieron
+    if origin is not None:
+        ComposicionService.cerrar_lote_de_borrado(origin, instance.pk)
+
+
+@receiver(post_delete, sender=PoolComposicion)
+def registrar_composicion_borrada(sender, instance, **kwargs):
+    """La matriz de similitud de cada proceso ve el contador y quita los pools borrados"""
+    ContadorRegistro.reservar(SimilitudService.CONTADOR_BORRADOS)
+
+
+@receiver(pre_save, sender=Especie)
+def recordar_nombres_especie(sender, instance, raw=False, **kwargs):
+    instance._nombres_previos = None
+    if instance.pk and not raw:
+        instance._nombres_previos = sender.objects.filter(pk=instance.pk).values_list(
+            'nombre_cientifico', 'nombre_comun'
+        ).first()
+
+
+@receiver(post_save, sender=Especie)
+def actualizar_tras_guardar_especie(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        ResumenEspecie.objects.get_or_create(especie=instance)
+        return
+
+    # Las composiciones guardan los nombres: refrescarlas solo si cambiaron
+    previos = getattr(instance, '_nombres_previos', None)
+    if previos and previos != (instance.nombre_cientifico, instance.nombre_comun):
+        ComposicionService.recalcular_pools(
+            AnalisisPalinologico.objects.filter(especie=instance).values_list('pool_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=ReglaClasificacion)
+@receiver(post_delete, sender=ReglaClasificacion)
+def reclasificar_tras_cambiar_regla(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ClasificacionService.reclasificar_especie(instance.especie_id)
+
+
+# --- Series físico-químicas ---
+
+def _apiarios_de_tambores(tambor_ids):
+    return set(TamborApiario.objects.filter(tambor_id__in=tambor_ids).values_list('apiario_id', flat=True))
+
+
+@receiver(pre_save, sender=AnalisisFisicoQuimico)
+def recordar_fisicoquimico_previo(sender, instance, raw=False, **kwargs):
+    """Guarda tambor y fecha previos: el análisis puede cambiar de grupo"""
+    instance._valores_previos = None
+    if instance.pk and not raw:
+        instance._valores_previos = sender.objects.filter(pk=instance.pk).values_list(
+            'tambor_id', 'fecha_extraccion'
+        ).first()
+
+
+@receiver(post_save, sender=AnalisisFisicoQuimico)
+def actualizar_series_tras_guardar_fisicoquimico(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    tambores, meses = {instance.tambor_id}, {instance.fecha_extraccion}
+    previos = getattr(instance, '_valores_previos', None)
+    if previos:
+        tambores.add(previos[0])
+        meses.add(previos[1])
+    SerieFisicoQuimicaService.recalcular(meses, _apiarios_de_tambores(tambores))
+
+
+@receiver(pre_delete, sender=AnalisisFisicoQuimico)
+def recordar_apiarios_fisicoquimico(sender, instance, **kwargs):
+    # En post_delete la relación del tambor con sus apiarios puede haberse borrado en cascada
+    instance._apiarios_previos = _apiarios_de_tambores([instance.tambor_id])
+
+
+@receiver(post_delete, sender=AnalisisFisicoQuimico)
+def actualizar_series_tras_borrar_fisicoquimico(sender, instance, **kwargs):
+    SerieFisicoQuimicaService.recalcular(
+        [instance.fecha_extraccion], getattr(instance, '_apiarios_previos', ())
+    )
+
+
+@receiver(pre_save, sender=TamborApiario)
+def recordar_tambor_apiario_previo(sender, instance, raw=False, **kwargs):
+    instance._valores_previos = None
+    if instance.pk and not raw:
+        instance._valores_previos = sender.objects.filter(pk=instance.pk).values_list(
+            'tambor_id', 'apiario_id'
+        ).first()
+
+
+@receiver(post_save, sender=TamborApiario)
+@receiver(post_delete, sender=TamborApiario)
+def actualizar_series_tras_cambiar_tambor_apiario(sender, instance, raw=False, origin=None, **kwargs):
+    if raw:
+        return
+    # Si se borra el apiario (o su apicultor), sus propias señales recalculan
+    if _borrado_desde(origin, Apiario, Apicultor):
+        return
+    tambores, apiarios = {instance.tambor_id}, {instance.apiario_id}
+    previos = getattr(instance, '_valores_previos', None)
+    if previos:
+        tambores.add(previos[0])
+        apiarios.add(previos[1])
+    meses = SerieFisicoQuimicaService.meses(AnalisisFisicoQuimico.objects.filter(tambor_id__in=tambores))
+    SerieFisicoQuimicaService.recalcular(meses, apiarios)
+
+
+def _claves_apiario(apiario_id):
+    """{agrupacion: claves} guardadas del apiario, para recalcular sus grupos anteriores"""
+    return SerieFisicoQuimicaService.claves_de_apiarios([apiario_id])
+
+
+@receiver(pre_save, sender=Apiario)
+def recordar_grupos_apiario(sender, instance, raw=False, **kwargs):
+    instance._claves_previas = None
+    if instance.pk and not raw:
+        instance._claves_previas = _claves_apiario(instance.pk)
+
+
+@receiver(post_save, sender=Apiario)
+def actualizar_series_tras_guardar_apiario(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    previas = getattr(instance, '_claves_previas', None)
+    if not previas or previas == _claves_apiario(instance.pk):
+        return
+    # Cambió la localidad o el apicultor: recalcular los grupos viejos y los nuevos
+    meses = SerieFisicoQuimicaService.meses(AnalisisFisicoQuimico.objects.filter(tambor__apiarios=instance))
+    SerieFisicoQuimicaService.recalcular(meses, [instance.pk], previas)
+
+
+@receiver(pre_delete, sender=Apiario)
+def recordar_series_apiario(sender, instance, **kwargs):
+    instance._claves_previas = _claves_apiario(instance.pk)
+    instance._meses_previos = SerieFisicoQuimicaService.meses(
+        AnalisisFisicoQuimico.objects.filter(tambor__apiarios=instance)
+    )
+
+
+@receiver(post_delete, sender=Apiario)
+def actualizar_series_tras_borrar_apiario(sender, instance, **kwargs):
+    SerieFisicoQuimicaService.recalcular(
+        getattr(instance, '_meses_previos', ()), claves_extra=getattr(instance, '_claves_previas', None)
+    )
+
+
+# --- Tablero de estadísticas (caché) ---
+
+MODELOS_CONTADOS = set(DashboardService.TOTALES.values())
+# Modelo -> secciones del tablero que dependen de él
+SECCIONES_POR_MODELO = {
+    AnalisisPalinologico: ['analisis_por_especie'],
+    Especie: ['analisis_por_especie'],
+    Pool: ['muestras_por_mes'],
+    AnalisisFisicoQuimico: ['humedad_por_apiario'],
+    TamborApiario: ['humedad_por_apiario'],
+    Apiario: ['humedad_por_apiario'],
+}
+
+
+@receiver(post_save)
+def actualizar_tablero_tras_guardar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created and sender in MODELOS_CONTADOS:
+        DashboardService.registrar_alta(instance)
+    if sender in SECCIONES_POR_MODELO:
+        DashboardService.invalidar(*SECCIONES_POR_MODELO[sender])
+
+
+@receiver(post_delete)
+def actualizar_tablero_tras_borrar(sender, instance, **kwargs):
+    if sender in MODELOS_CONTADOS:
+        DashboardService.registrar_baja(instance)
+    if sender in SECCIONES_POR_MODELO:
+        DashboardService.invalidar(*SECCIONES_POR_MODELO[sender])
+
@@ -0,0 +1,162 @@
+"""
+Matriz densa pool × especie para buscar pools con espectro polínico parecido.
+
+Solo usa NumPy: guarda la proporción de granos de cada especie en cada pool
+(filas que suman 1) y responde los k más parecidos por similitud coseno o
+Bray–Curtis con operaciones vectorizadas sobre toda la matriz. Las filas se
+agregan o reemplazan de a una, así que mantenerla al día cuesta lo que
+cambió y no reconstruir la matriz. La carga desde la base la hace
+SimilitudService.
+"""
+import threading
+
+import numpy as np
+
+
+# Filas por bloque al calcular Bray–Curtis, para acotar la memoria temporal
+BLOQUE_FILAS = 8192
+
+
+class MatrizComposiciones:
+    """Proporciones por especie de cada pool, con índices por pool y por especie"""
+
+    def __init__(self):
+        self._datos = np.zeros((0, 0), dtype=np.float32)
+        self._normas = np.zeros(0, dtype=np.float32)
+        self._pool_ids = np.zeros(0, dtype=np.int64)
+        self._filas = 0
+        self.fila_por_pool = {}
+        self.columna_por_especie = {}
+        # updated_at más reciente ya incorporado a la matriz
+        self.actualizada_hasta = None
+        # Valor del contador de composiciones borradas cuando se armó o depuró
+        self.borrados = None
+        self.lock = threading.RLock()
+
+    @property
+    def cantidad_pools(self):
+        return len(self.fila_por_pool)
+
+    def _reservar(self, filas, columnas):
+        """Agranda la matriz al doble de lo necesario, para no copiar en cada alta"""
+        cap_filas, cap_columnas = self._datos.shape
+        if filas <= cap_filas and columnas <= cap_columnas:
+            return
+        nuevas_filas = max(filas, cap_filas * 2 if filas > cap_filas else cap_filas, 16)
+        nuevas_columnas = max(columnas, cap_columnas * 2 if columnas > cap_columnas else cap_columnas, 16)
+        datos = np.zeros((nuevas_filas, nuevas_columnas), dtype=np.float32)
+        datos[:cap_filas, :cap_columnas] = self._datos
+        self._datos = datos
+        self._normas = np.resize(self._normas, nuevas_filas)
+        self._pool_ids = np.resize(self._pool_ids, nuevas_filas)
+
+    def vector(self, cantidades):
+        """
+        Vector de proporciones para un perfil {especie_id: cantidad}
+
+        Las especies que ningún pool tiene no ocupan columna, pero cuentan en
+        el total y en la norma: un perfil con mucho polen desconocido se
+        parece menos a todos.
+
+        Returns:
+            tuple: (vector, norma); la norma es 0 si el perfil no tiene granos
+        """
+        vector = np.zeros(self._datos.shape[1], dtype=np.float32)
+        total = sum(cantidades.values())
+        if total <= 0:
+            return vector, 0.0
+        cuadrados = 0.0
+        for especie_id, cantidad in cantidades.items():
+            proporcion = cantidad / total
+            cuadrados += proporcion * proporcion
+            columna = self.columna_por_especie.get(especie_id)
+            if columna is not None:
+                vector[columna] = proporcion
+        return vector, float(np.sqrt(cuadrados))
+
+    def actualizar(self, composiciones):
+        """
+        Agrega o reemplaza las filas de los pools indicados
+
+        Args:
+            composiciones (iterable): Pares (pool_id, {especie_id: cantidad})
+        """
+        with self.lock:
+            for pool_id, cantidades in composiciones:
+                for especie_id in cantidades:
+                    if especie_id not in self.columna_por_especie:
+                        self.columna_por_especie[especie_id] = len(self.columna_por_especie)
+
+                fila = self.fila_por_pool.get(pool_id)
+                if fila is None:
+                    fila = self._filas
+                    self._reservar(fila + 1, len(self.columna_por_especie))
+                    self.fila_por_pool[pool_id] = fila
+                    self._pool_ids[fila] = pool_id
+                    self._filas += 1
+                else:
+                    self._reservar(self._filas, len(self.columna_por_especie))
+
+                vector, norma = self.vector(cantidades)
+                self._datos[fila] = vector
+                self._normas[fila] = norma
+
+    def quitar(self, pool_ids):
+        """
+        Saca de la matriz los pools indicados (p. ej. los borrados)
+
+        Sus filas quedan en cero y con norma 0, así que no participan de las
+        búsquedas; no se compacta la matriz para no copiarla.
+        """
+        with self.lock:
+            for pool_id in pool_ids:
+                fila = self.fila_por_pool.pop(pool_id, None)
+                if fila is not None:
+                    self._datos[fila] = 0
+                    self._normas[fila] = 0
+
+    def similares(self, vector, norma, k, metrica='coseno', excluir=None):
+        """
+        Los k pools más parecidos al vector, de mayor a menor similitud
+
+        Args:
+            vector (ndarray): Proporciones por especie (ver vector())
+            norma (float): Norma euclídea del perfil completo
+            k (int): Cantidad de resultados
+            metrica (str): 'coseno' o 'bray-curtis' (1 - distancia de Bray–Curtis)
+            excluir (int | None): Pool a dejar fuera (el de la consulta)
+
+        Returns:
+            list[tuple]: Pares (pool_id, similitud)
+        """
+        with self.lock:
+            filas = self._filas
+            if filas == 0 or norma <= 0:
+                return []
+            columnas = len(vector)
+            datos = self._datos[:filas, :columnas]
+            normas = self._normas[:filas]
+            pool_ids = self._pool_ids[:filas].copy()
+
+            if metrica == 'coseno':
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    puntajes = (datos @ vector) / (normas * norma)
+            else:
+                # Con proporciones que suman 1, 1 - BC es la suma de los mínimos
+                puntajes = np.empty(filas, dtype=np.float32)
+                for inicio in range(0, filas, BLOQUE_FILAS):
+                    bloque = datos[inicio:inicio + BLOQUE_FILAS]
+                    puntajes[inicio:inicio + BLOQUE_FILAS] = np.minimum(bloque, vector).sum(axis=1)
+
+            # Pools sin granos, quitados o el propio pool no participan
+            puntajes = np.where(normas > 0, puntajes, -np.inf)
+            if excluir is not None and excluir in self.fila_por_pool:
+                puntajes[self.fila_por_pool[excluir]] = -np.inf
+
+        validos = int(np.isfinite(puntajes).sum())
+        k = min(k, validos)
+        if k <= 0:
+            return []
+        mejores = np.argpartition(-puntajes, k - 1)[:k]
+        mejores = mejores[np.argsort(-puntajes[mejores], kind='stable')]
+        return [(int(pool_ids[fila]), float(puntajes[fila])) for fila in mejores]
@@ -0,0 +1,1588 @@
+"""
+Tests de la API de modelos.
+
+crear_datos() arma filas de todos los modelos con el ORM, pasando por las
+señales igual que la aplicación, así que las tablas derivadas
+(PoolComposicion, ResumenEspecie, SerieFisicoQuimica, clasificación) quedan
+al día. Los tests de consultas fijan cuántas cuesta cada endpoint.
+"""
+import csv
+import importlib
+import io
+import json
+import math
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.apps import apps as django_apps
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Avg, Sum
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.http import StreamingHttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from . import instrumentacion
+from .models import (
+    AnalisisFisicoQuimico, AnalisisPalinologico, Analista, Apiario, Apicultor, ContadorRegistro, ContienePool,
+    Especie, MuestraTambor, Pool, PoolComposicion, ReglaClasificacion, ResumenEspecie, SerieFisicoQuimica, TamborApiario,
+)
+from .conexiones import iterar
+from .geo import RADIO_TIERRA_KM, caja_geohash, caja_radio, codificar_geohash, parsear_bbox, parsear_punto
+from .instrumentacion import PresupuestoExcedido, contenido, medir, presupuesto
+from .management.commands.verificar_presupuestos import endpoints
+from .pagination import KeysetCursorPagination
+from .replicas import ALIAS as ALIAS_REPLICA, RouterReplica, leyendo_replica
+from .salud import Readiness, readiness
+from .services import (
+    ComposicionService, DashboardService, EstadisticasApiarioService, ExportacionService,
+    ImportacionTemporadaService, ReportePoolService, SimilitudService,
+)
+from .urls import router
+from .views import ANOTACIONES_POOL, AnotacionesViewSetMixin, LecturaRapidaViewSetMixin, PoolViewSet
+
+
+ESPECIES_POR_POOL = 4
+
+
+def crear_datos(cantidad):
+    """
+    `cantidad` filas de cada modelo, relacionadas entre sí
+
+    Cada pool tiene un tambor de un apiario, un análisis físico-químico en
+    su tambor y ESPECIES_POR_POOL análisis palinológicos. Se puede llamar
+    varias veces: los valores únicos siguen la numeración existente.
+    """
+    inicio = Apicultor.objects.count()
+    especies = list(Especie.objects.order_by('id'))
+    while len(especies) < inicio + cantidad + ESPECIES_POR_POOL:
+        numero = len(especies) + 1
+        especies.append(Especie.objects.create(
+            nombre_cientifico=f'Especie prueba {numero}', nombre_comun=f'Común {numero}', familia='Fabaceae'
+        ))
+
+    pools = []
+    for i in range(inicio, inicio + cantidad):
+        apicultor = Apicultor.objects.create(nombre=f'Apicultor {i}', apellido='Prueba')
+        apiario = Apiario.objects.create(
+            apicultor=apicultor, nombre_apiario=f'Apiario {i}', cant_colmenas=20 + i,
+            localidad=f'Localidad {i % 3}', latitud=Decimal('-38.000000') + i, longitud=Decimal('-57.500000'),
+        )
+        analista = Analista.objects.create(nombres=f'Analista {i}', apellidos='Prueba', username=f'analista-{i}')
+        tambor = MuestraTambor.objects.create(num_registro=f'T-{i:05d}', fecha_de_extraccion=date(2024, 1 + i % 12, 10))
+        TamborApiario.objects.create(tambor=tambor, apiario=apiario)
+        AnalisisFisicoQuimico.objects.create(
+            analista=analista, tambor=tambor, color=30 + i, humedad=Decimal('17.20') + i % 5,
+            fecha_extraccion=tambor.fecha_de_extraccion,
+            fecha_analisis=tambor.fecha_de_extraccion + timedelta(days=20),
+        )
+        pool = Pool.objects.create(analista=analista, fecha_analisis=date(2024, 1 + i % 12, 28))
+        ContienePool.objects.create(pool=pool, tambor=tambor)
+        for j, especie in enumerate(especies[i:i + ESPECIES_POR_POOL]):
+            AnalisisPalinologico.objects.create(pool=pool, especie=especie, cantidad_granos=100 * (j + 1))
+        ReglaClasificacion.objects.create(especie=especies[i], umbral=Decimal('45.00'))
+        pools.append(pool)
+    return pools
+
+
+def consultas(client, url):
+    """(consultas, response) de un GET, contando también las del cuerpo en streaming"""
+    with medir() as medicion:
+        response = client.get(url)
+        if response.streaming:
+            response.contenido = b''.join(response.streaming_content)
+    return medicion.consultas, response
+
+
+def listados():
+    """URL del listado de cada viewset del router, también con todas sus anotaciones"""
+    urls = [f'/api/{prefijo}/' for prefijo, _, _ in router.registry]
+    urls += [f'/api/{prefijo}/?with={",".join(ANOTACIONES_POOL)}' for prefijo in ('pools', 'muestras')]
+    return urls
+
+
+class ConsultasTestCase(TestCase):
+    """Cada test arranca con la caché vacía: el tablero y las lecturas no dependen del orden"""
+
+    def setUp(self):
+        cache.clear()
+
+
+class PoolStatsTests(ConsultasTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pools = crear_datos(3)
+
+    def test_stats_de_un_pool_en_una_consulta(self):
+        pool = self.pools[0]
+        # El pool con su analista y su composición precalculada
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/pool/{pool.id}/stats/')
+        self.assertEqual(response.status_code, 200)
+        info = response.json()['pool_info']
+        self.assertEqual(info['total_especies'], ESPECIES_POR_POOL)
+        self.assertEqual(info['total_granos'], sum(100 * (j + 1) for j in range(ESPECIES_POR_POOL)))
+
+    def test_stats_de_pool_inexistente(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/pool/999999/stats/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_stats_de_muchos_pools_no_depende_de_la_cantidad(self):
+        # Un bloque de pools y la consulta que confirma que no hay más
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/pools/stats/')
+            cuerpo = b''.join(response.streaming_content)
+        self.assertEqual(len(json.loads(cuerpo)), 3)
+
+        crear_datos(5)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/pools/stats/')
+            b''.join(response.streaming_content)
+
+    def test_stats_de_muchos_pools_iguales_al_endpoint_individual(self):
+        response = self.client.get('/api/pools/stats/?ids=' + ','.join(str(pool.id) for pool in self.pools))
+        lote = json.loads(b''.join(response.streaming_content))
+        for pool in self.pools:
+            individual = self.client.get(f'/api/pool/{pool.id}/stats/').json()
+            self.assertEqual(lote[str(pool.id)], individual)
+
+
+class BorradoPoolTests(ConsultasTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pools = crear_datos(4)
+
+    def assertResumenesAlDia(self):
+        for resumen in ResumenEspecie.objects.all():
+            analisis = AnalisisPalinologico.objects.filter(especie_id=resumen.especie_id)
+            self.assertEqual(resumen.total_analisis, analisis.count())
+            self.assertEqual(resumen.total_granos, sum(analisis.values_list('cantidad_granos', flat=True)))
+
+    def _updates_de_resumenes(self, borrar):
+        with CaptureQueriesContext(connection) as consultas:
+            borrar()
+        return [q['sql'] for q in consultas.captured_queries
+                if q['sql'].startswith('UPDATE') and 'resumen_especie' in q['sql']]
+
+    def test_borrar_un_pool_ajusta_los_resumenes_una_vez(self):
+        updates = self._updates_de_resumenes(self.pools[0].delete)
+        self.assertEqual(len(updates), 1)
+        self.assertResumenesAlDia()
+
+    def test_borrar_varios_pools_ajusta_los_resumenes_una_vez(self):
+        ids = [pool.id for pool in self.pools[1:]]
+        updates = self._updates_de_resumenes(Pool.objects.filter(id__in=ids).delete)
+        self.assertEqual(len(updates), 1)
+        self.assertResumenesAlDia()
+
+    def test_borrado_dentro_de_en_lote_usa_el_lote_exterior(self):
+        with ComposicionService.en_lote():
+            self.pools[0].delete()
+            # Todavía sin aplicar: lo aplica el lote exterior
+            self.assertEqual(ResumenEspecie.objects.get(especie_id=1).total_analisis, 1)
+        self.assertResumenesAlDia()
+
+
+def cargar_settings(**entorno):
+    """Una copia de apicola_lab/settings.py ejecutada con las variables de entorno dadas"""
+    variables = ('REDIS_URL', 'CACHE_BACKEND', 'CACHE_LOCATION', 'DB_POOLER', 'DB_REPORTING_HOST')
+    limpio = {clave: valor for clave, valor in os.environ.items() if clave not in variables}
+    spec = importlib.util.spec_from_file_location(
+        'settings_de_prueba', os.path.join(django_settings.BASE_DIR, 'apicola_lab', 'settings.py')
+    )
+    modulo = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(os.environ, {**limpio, **entorno}, clear=True):
+        spec.loader.exec_module(modulo)
+    return modulo
+
+
+class ConexionesSettingsTests(unittest.TestCase):
+    def test_pgbouncer_en_modo_transaction_desactiva_los_cursores_del_servidor(self):
+        databases = cargar_settings(DB_POOLER='transaction', DB_REPORTING_HOST='replica').DATABASES
+        for alias in ('default', 'reporting'):
+            with self.subTest(alias=alias):
+                self.assertTrue(databases[alias]['DISABLE_SERVER_SIDE_CURSORS'])
+                # PgBouncer rechaza el parámetro de conexión 'options'
+                self.assertNotIn('options', databases[alias]['OPTIONS'])
+
+    def test_sin_pooler_conserva_los_cursores_y_el_timeout(self):
+        default = cargar_settings(DB_STATEMENT_TIMEOUT_MS='30000').DATABASES['default']
+        self.assertFalse(default.get('DISABLE_SERVER_SIDE_CURSORS', False))
+        self.assertEqual(default['OPTIONS']['options'], '-c statement_timeout=30000')
+
+
+class DashboardTests(ConsultasTestCase):
+    def setUp(self):
+        super().setUp()
+        crear_datos(2)
+        self.analista = Analista.objects.first()
+
+    def _total_muestras(self):
+        return self.client.get('/api/estadisticas/').json()['estadisticas_generales']['total_muestras']
+
+    def test_con_cache_por_proceso_no_guarda_el_tablero(self):
+        self.client.get('/api/estadisticas/')
+        self.assertEqual(cache.get_many(DashboardService._claves_contadores()), {})
+
+    def test_redis_url_configura_una_cache_compartida(self):
+        self.assertEqual(cargar_settings().CACHES['default']['BACKEND'],
+                         'django.core.cache.backends.locmem.LocMemCache')
+        caches = cargar_settings(REDIS_URL='redis://redis:6379/1').CACHES
+        self.assertEqual(caches['default'], {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://redis:6379/1',
+        })
+        with override_settings(CACHES=caches):
+            self.assertTrue(DashboardService.cache_compartida())
+
+    def test_escritura_revertida_no_cambia_los_contadores(self):
+        with tempfile.TemporaryDirectory() as directorio, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directorio,
+        }}):
+            self.assertEqual(self._total_muestras(), 2)
+            try:
+                with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+                    Pool.objects.create(analista=self.analista, fecha_analisis=date(2024, 5, 1))
+                    raise IntegrityError('revertir')
+            except IntegrityError:
+                pass
+            self.assertEqual(self._total_muestras(), 2)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Pool.objects.create(analista=self.analista, fecha_analisis=date(2024, 5, 1))
+            self.assertEqual(self._total_muestras(), 3)
+
+
+class ListadosTests(ConsultasTestCase):
+    """Los listados no hacen consultas por fila, por ninguno de los dos caminos"""
+
+    def assertConsultasFijas(self):
+        urls = listados()
+        crear_datos(2)
+        pocas = {url: consultas(self.client, url) for url in urls}
+        crear_datos(6)
+        for url in urls:
+            with self.subTest(url=url):
+                muchas, response = consultas(self.client, url)
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(len(response.content), len(pocas[url][1].content))
+                self.assertEqual(muchas, pocas[url][0])
+
+    def test_listados_con_consultas_fijas(self):
+        self.assertConsultasFijas()
+
+    def test_listados_con_serializers_de_drf_con_consultas_fijas(self):
+        with mock.patch('modelos.views.compilar', return_value=None):
+            self.assertConsultasFijas()
+
+
+class PaginacionTests(ConsultasTestCase):
+    def setUp(self):
+        super().setUp()
+        crear_datos(5)
+
+    def test_los_listados_se_paginan_siempre(self):
+        with mock.patch.object(KeysetCursorPagination, 'page_size', 2):
+            datos = self.client.get('/api/apiarios/').json()
+        self.assertEqual(len(datos['results']), 2)
+        self.assertIsNotNone(datos['next'])
+
+    def test_page_size_no_supera_max_page_size(self):
+        with mock.patch.object(KeysetCursorPagination, 'max_page_size', 3):
+            datos = self.client.get('/api/analisis-palinologicos/?page_size=100000').json()
+        self.assertEqual(len(datos['results']), 3)
+
+    def test_siguiendo_next_se_recorre_todo_sin_repetir(self):
+        # Una tabla intermedia sin created_at y un listado con ?fields=&expand=
+        for url, modelo in (('/api/tambor-apiario/?page_size=2', TamborApiario),
+                            ('/api/analisis-palinologicos/?page_size=3&fields=id,pool&expand=pool', AnalisisPalinologico)):
+            with self.subTest(url=url):
+                ids = []
+                while url:
+                    datos = self.client.get(url).json()
+                    ids += [fila['id'] for fila in datos['results']]
+                    url = datos['next']
+                self.assertEqual(sorted(ids), sorted(modelo.objects.values_list('id', flat=True)))
+
+    def _recorrer(self, url):
+        filas = []
+        while url:
+            datos = self.client.get(url).json()
+            filas += datos['results']
+            url = datos['next']
+        return filas
+
+    def test_el_cursor_guarda_created_at_e_id_sin_offset(self):
+        # Filas importadas en bloque comparten created_at
+        Especie.objects.update(created_at=Especie.objects.earliest('created_at').created_at)
+        ids = [fila['id'] for fila in self._recorrer('/api/especies/?page_size=2')]
+        self.assertEqual(ids, sorted(Especie.objects.values_list('id', flat=True), reverse=True))
+
+        siguiente = self.client.get('/api/especies/?page_size=2').json()['next']
+        with CaptureQueriesContext(connection) as capturadas:
+            pagina = self.client.get(siguiente).json()
+        self.assertEqual([fila['id'] for fila in pagina['results']], ids[2:4])
+        self.assertFalse(any('OFFSET' in consulta['sql'] for consulta in capturadas.captured_queries))
+
+        anterior = self.client.get(pagina['previous']).json()
+        self.assertEqual([fila['id'] for fila in anterior['results']], ids[:2])
+        self.assertIsNone(anterior['previous'])
+
+    def test_cursor_invalido(self):
+        siguiente = self.client.get('/api/especies/?page_size=2').json()['next']
+        cursor = siguiente.split('cursor=')[1].split('&')[0]
+        self.assertEqual(self.client.get(siguiente.replace(cursor, 'cD1bIngiXQ%3D%3D')).status_code, 404)
+
+    def test_near_pagina_por_distancia(self):
+        apicultor = Apicultor.objects.create(nombre='Cercano', apellido='Prueba')
+        # A 0, 55.6 y 111.2 km del punto; los de crear_datos quedan a más de 150 km
+        for i, latitud in enumerate(('-32.000000', '-31.500000', '-31.000000')):
+            Apiario.objects.create(apicultor=apicultor, nombre_apiario=f'ap{2 - i}', cant_colmenas=10,
+                                   localidad='Cerca', latitud=Decimal(latitud), longitud=Decimal('-60.000000'))
+        for url in ('/api/apiarios/?near=-31.0,-60.0&radius_km=150&page_size=2',
+                    '/api/apiarios/?near=-31.0,-60.0&radius_km=150&page_size=2&fields=id,nombre_apiario'):
+            with self.subTest(url=url):
+                filas = self._recorrer(url)
+                self.assertEqual([fila['nombre_apiario'] for fila in filas], ['ap0', 'ap1', 'ap2'])
+        distancias = [fila['distancia_km'] for fila in self._recorrer(
+            '/api/apiarios/?near=-31.0,-60.0&radius_km=150&page_size=2')]
+        self.assertEqual(distancias, sorted(distancias))
+        self.assertAlmostEqual(distancias[2], 111.2, places=1)
+
+
+class LecturaRapidaTests(ConsultasTestCase):
+    """El serializer compilado responde los mismos bytes que el de DRF"""
+
+    def setUp(self):
+        super().setUp()
+        crear_datos(3)
+
+    def _urls(self):
+        urls = []
+        for prefijo, viewset, _ in router.registry:
+            if not issubclass(viewset, LecturaRapidaViewSetMixin):
+                continue
+            pk = viewset.queryset.model.objects.values_list('pk', flat=True).first()
+            urls += [f'/api/{prefijo}/', f'/api/{prefijo}/{pk}/']
+            if issubclass(viewset, AnotacionesViewSetMixin):
+                anotaciones = ','.join(viewset.anotaciones)
+                urls += [f'/api/{prefijo}/?with={anotaciones}', f'/api/{prefijo}/{pk}/?with={anotaciones}']
+        return urls
+
+    def test_misma_respuesta_que_los_serializers_de_drf(self):
+        urls = self._urls()
+        rapidas = {url: self.client.get(url) for url in urls}
+        with mock.patch('modelos.views.compilar', return_value=None):
+            for url in urls:
+                with self.subTest(url=url):
+                    drf = self.client.get(url)
+                    self.assertEqual(rapidas[url].status_code, 200)
+                    self.assertEqual(rapidas[url].content, drf.content)
+
+
+class ReportePdfTests(ConsultasTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = crear_datos(2)[0]
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        ajustes = override_settings(REPORTES_PDF_DIR=self.directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _clave(self):
+        return ReportePoolService._claves([self.pool.id], {})[self.pool.id]
+
+    def _archivos(self):
+        return sorted(os.listdir(self.directorio.name))
+
+    def test_la_clave_cambia_con_especies_apiarios_y_apicultores(self):
+        tambor_apiario = TamborApiario.objects.get(tambor__pools=self.pool)
+        cambios = (
+            lambda: AnalisisPalinologico.objects.filter(pool=self.pool).first().especie.save(),
+            lambda: tambor_apiario.apiario.save(),
+            lambda: tambor_apiario.apiario.apicultor.save(),
+        )
+        for cambio in cambios:
+            anterior = self._clave()
+            cambio()
+            self.assertNotEqual(self._clave(), anterior)
+
+    def test_la_clave_cambia_si_el_tambor_pasa_a_otro_apiario(self):
+        anterior = self._clave()
+        tambor_apiario = TamborApiario.objects.get(tambor__pools=self.pool)
+        tambor_apiario.apiario = Apiario.objects.exclude(id=tambor_apiario.apiario_id).first()
+        tambor_apiario.save()
+        self.assertNotEqual(self._clave(), anterior)
+
+    def test_texto_libre_no_se_guarda_en_la_cache(self):
+        response = self.client.get(f'/api/pools/{self.pool.id}/reporte.pdf?solicitante=Cooperativa&tipo=MONOFLORAL')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(self._archivos(), [])
+
+        self.client.get(f'/api/pools/{self.pool.id}/reporte.pdf?tipo=MONOFLORAL')
+        self.assertEqual(len(self._archivos()), 1)
+
+    def test_poda_por_antiguedad_y_por_tamanio(self):
+        ahora = time.time()
+        for numero, dias in enumerate((40, 3, 2, 1)):
+            ruta = os.path.join(self.directorio.name, f'{numero}.pdf')
+            with open(ruta, 'wb') as archivo:
+                archivo.write(b'x' * 400 * 1024)
+            os.utime(ruta, (ahora - dias * 86400, ahora - dias * 86400))
+
+        with override_settings(REPORTES_PDF_MAX_DIAS=30, REPORTES_PDF_MAX_MB=1):
+            self.assertEqual(ReportePoolService.podar(), 2)
+        # El vencido y, por tamaño, el de uso más antiguo
+        self.assertEqual(self._archivos(), ['2.pdf', '3.pdf'])
+
+
+class SeriesFisicoQuimicasTests(ConsultasTestCase):
+    def _series(self):
+        return sorted(SerieFisicoQuimica.objects.values_list(
+            'agrupacion', 'periodo', 'clave', 'inicio', 'cantidad', 'cantidad_humedad', 'humedad_promedio',
+            'humedad_minima', 'humedad_maxima', 'humedad_p90', 'humedades', 'colores',
+        ), key=repr)
+
+    def test_la_migracion_arma_las_mismas_series_que_las_senales(self):
+        crear_datos(14)
+        # Un tambor en dos apiarios de la misma localidad cuenta una vez en ella
+        tambor = MuestraTambor.objects.first()
+        TamborApiario.objects.create(tambor=tambor, apiario=Apiario.objects.filter(localidad='Localidad 0').last())
+        esperadas = self._series()
+
+        SerieFisicoQuimica.objects.all().delete()
+        migracion = importlib.import_module('modelos.migrations.0012_poblar_series_fisicoquimicas')
+        migracion.poblar_series(django_apps, None)
+        self.assertEqual(self._series(), esperadas)
+
+    def test_muestras_por_mes_cuenta_pools(self):
+        pools = crear_datos(3)
+        Pool.objects.filter(id=pools[0].id).update(fecha_analisis=pools[1].fecha_analisis)
+        datos, _ = DashboardService.obtener()
+        self.assertEqual([fila['total'] for fila in datos['muestras_por_mes']], [2, 1])
+
+
+@override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=True)
+class PresupuestoConsultasTests(TransactionTestCase):
+    """
+    Con varias filas por modelo un N+1 nuevo supera el presupuesto y el
+    middleware lo hace fallar. Sin la transacción de TestCase: dentro de ella
+    cada transaction.atomic() suma consultas SAVEPOINT que en producción no hay.
+    """
+
+    def setUp(self):
+        cache.clear()
+        crear_datos(4)
+
+    def test_todos_los_endpoints_dentro_de_su_presupuesto(self):
+        pruebas, vacios = endpoints(page_size=50)
+        self.assertEqual(vacios, [])
+        for viewset, accion, url in pruebas:
+            with self.subTest(url=url):
+                self.assertIsNotNone(presupuesto(viewset, accion), 'sin presupuesto_consultas')
+                response = self.client.get(url)
+                contenido(response)
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=False, DEBUG=False)
+    def test_sin_modo_estricto_solo_guarda_el_sql_de_lo_que_excede(self):
+        mediciones = []
+        medicion_original = instrumentacion.Medicion
+
+        def registrar(*args, **kwargs):
+            mediciones.append(medicion_original(*args, **kwargs))
+            return mediciones[-1]
+
+        with mock.patch.object(instrumentacion, 'Medicion', side_effect=registrar):
+            self.client.get('/api/especies/')
+            self.assertGreater(mediciones[-1].consultas, 0)
+            self.assertEqual(mediciones[-1].sentencias, [])
+
+            with mock.patch.dict(PoolViewSet.presupuesto_consultas, {'list': 1}), \
+                    self.assertLogs('modelos.instrumentacion', 'WARNING') as logs:
+                self.client.get('/api/pools/')
+        medicion = mediciones[-1]
+        self.assertEqual(len(medicion.sentencias), medicion.consultas - 1)
+        self.assertIn(medicion.sentencias[0], logs.output[0])
+
+    def test_cuenta_las_consultas_del_cuerpo_en_streaming(self):
+        with mock.patch.dict(PoolViewSet.presupuesto_consultas, {'stats': 0}):
+            response = self.client.get('/api/pools/stats/')
+            self.assertTrue(response.streaming)
+            with self.assertRaises(PresupuestoExcedido):
+                contenido(response)
+
+
+class ContadorRegistroTests(ConsultasTestCase):
+    def test_reserva_un_bloque_consecutivo(self):
+        numeros = ContadorRegistro.reservar('prueba', 5)
+        self.assertEqual(list(numeros), [1, 2, 3, 4, 5])
+        self.assertEqual(list(ContadorRegistro.reservar('prueba', 3)), [6, 7, 8])
+        self.assertEqual(list(ContadorRegistro.reservar('prueba', 0)), [])
+        self.assertEqual(ContadorRegistro.objects.get(nombre='prueba').ultimo_valor, 8)
+
+    def test_los_pools_no_reutilizan_numeros(self):
+        analista = Analista.objects.create(nombres='Analista', apellidos='Prueba', username='contador')
+        pools = [Pool(analista=analista, fecha_analisis=date(2024, 1, 1)) for _ in range(4)]
+        pools[1].num_registro = 'PROPIO'
+        Pool.asignar_numeros_registro(pools)
+        self.assertEqual(pools[1].num_registro, 'PROPIO')
+        Pool.objects.bulk_create(pools)
+        # Un número ya asignado no vuelve a salir aunque se borre el pool
+        Pool.objects.filter(num_registro=pools[-1].num_registro).delete()
+        nuevo = Pool.objects.create(analista=analista, fecha_analisis=date(2024, 1, 2))
+
+        numeros = [pool.num_registro for pool in pools if pool.num_registro != 'PROPIO'] + [nuevo.num_registro]
+        self.assertEqual(len(set(numeros)), 4)
+        self.assertEqual([int(numero) for numero in numeros], sorted(int(numero) for numero in numeros))
+        self.assertEqual(int(nuevo.num_registro), int(numeros[-2]) + 1)
+
+    def test_la_migracion_arranca_en_el_mayor_num_registro(self):
+        analista = Analista.objects.create(nombres='Analista', apellidos='Prueba', username='contador')
+        for numero in ('00007', '00042', 'EXT-99'):
+            Pool.objects.create(analista=analista, fecha_analisis=date(2024, 1, 1), num_registro=numero)
+        sin_numero = Pool.objects.create(analista=analista, fecha_analisis=date(2024, 1, 1))
+        Pool.objects.filter(pk=sin_numero.pk).update(num_registro=None)
+        ContadorRegistro.objects.all().delete()
+
+        migracion = importlib.import_module('modelos.migrations.0007_contador_registro')
+        migracion.inicializar_contador_pool(django_apps, None)
+        self.assertEqual(list(ContadorRegistro.reservar('pool')), [43])
+
+
+class PoolConTamboresTests(ConsultasTestCase):
+    URL = '/api/pools/with-tambores/'
+
+    def setUp(self):
+        super().setUp()
+        self.analista = Analista.objects.create(nombres='Analista', apellidos='Prueba', username='alta-pool')
+        self.tambores = [
+            MuestraTambor.objects.create(num_registro=f'T-ALTA-{i}', fecha_de_extraccion=date(2024, 1, 10))
+            for i in range(3)
+        ]
+        ContadorRegistro.reservar('pool', 10)
+
+    def _crear(self, tambores):
+        return self.client.post(self.URL, {
+            'analista': self.analista.id, 'fecha_analisis': '2024-02-01',
+            'tambor_ids': [tambor.id for tambor in tambores],
+        }, content_type='application/json')
+
+    def _contador(self):
+        return ContadorRegistro.objects.get(nombre='pool').ultimo_valor
+
+    def test_crea_el_pool_y_toma_los_tambores(self):
+        response = self._crear(self.tambores[:2])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['num_registro'], '00011')
+        pool = Pool.objects.get(id=response.json()['id'])
+        self.assertEqual(sorted(pool.tambores.values_list('id', flat=True)), [t.id for t in self.tambores[:2]])
+        self.assertEqual(
+            list(MuestraTambor.objects.order_by('id').values_list('estado_analisis_palinologico', flat=True)),
+            [True, True, False],
+        )
+
+    def test_conflicto_si_un_tambor_ya_esta_asignado(self):
+        self.assertEqual(self._crear(self.tambores[:1]).status_code, 201)
+        contador = self._contador()
+
+        response = self._crear(self.tambores)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['tambores_no_disponibles'], [self.tambores[0].id])
+        self.assertEqual(Pool.objects.count(), 1)
+        self.assertFalse(MuestraTambor.objects.filter(id=self.tambores[1].id, estado_analisis_palinologico=True).exists())
+        # El conflicto no consume números de registro
+        self.assertEqual(self._contador(), contador)
+
+    def test_conflicto_si_otro_analista_bloquea_un_tambor(self):
+        # SKIP LOCKED saltea la fila que otra transacción tiene bloqueada
+        bloqueado = self.tambores[2]
+        with mock.patch.object(MuestraTambor.objects, 'select_for_update',
+                               return_value=MuestraTambor.objects.exclude(id=bloqueado.id)):
+            response = self._crear(self.tambores)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['tambores_no_disponibles'], [bloqueado.id])
+        self.assertFalse(Pool.objects.exists())
+        self.assertEqual(self._contador(), 10)
+
+    def test_un_error_a_mitad_de_camino_deshace_todo(self):
+        with mock.patch.object(ContienePool.objects, 'bulk_create', side_effect=IntegrityError('falla')):
+            with self.assertRaises(IntegrityError):
+                self._crear(self.tambores[:2])
+        self.assertFalse(Pool.objects.exists())
+        self.assertFalse(MuestraTambor.objects.filter(estado_analisis_palinologico=True).exists())
+        self.assertEqual(self._contador(), 10)
+
+
+class ConteosPoolTests(ConsultasTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = crear_datos(1)[0]
+        self.url = f'/api/pools/{self.pool.id}/analisis-palinologicos/bulk/'
+        # El pool cuenta las cuatro primeras especies (100, 200, 300 y 400 granos); la quinta no
+        self.especies = list(Especie.objects.order_by('id').values_list('id', flat=True))
+
+    def _guardar(self, conteos):
+        return self.client.post(self.url, {'conteos': conteos}, content_type='application/json')
+
+    def _resumenes(self):
+        return dict(ResumenEspecie.objects.values_list('especie_id', 'total_granos'))
+
+    def test_crea_actualiza_y_elimina_en_un_pedido(self):
+        e = self.especies
+        response = self._guardar([
+            {'especie': e[0], 'cantidad_granos': 150, 'marca_especial': '#'},
+            {'especie': e[1], 'cantidad_granos': 200},
+            {'especie': e[4], 'cantidad_granos': 50},
+        ])
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        self.assertEqual((datos['creados'], datos['actualizados'], datos['eliminados']), (1, 2, 2))
+        self.assertEqual((datos['total_granos'], datos['num_especies']), (400, 3))
+
+        analisis = {a.especie_id: a for a in AnalisisPalinologico.objects.filter(pool=self.pool)}
+        self.assertEqual(sorted(analisis), [e[0], e[1], e[4]])
+        self.assertEqual((analisis[e[0]].cantidad_granos, analisis[e[0]].marca_especial), (150, '#'))
+        self.assertEqual(analisis[e[0]].porcentaje, Decimal('37.50'))
+        self.assertEqual(analisis[e[4]].porcentaje, Decimal('12.50'))
+
+    def test_composicion_y_resumenes_quedan_como_recalculados(self):
+        e = self.especies
+        self._guardar([
+            {'especie': e[0], 'cantidad_granos': 150},
+            {'especie': e[4], 'cantidad_granos': 50},
+        ])
+        self.pool.refresh_from_db()
+        guardada = PoolComposicion.objects.get(pool=self.pool)
+        resumenes = self._resumenes()
+        self.assertEqual(resumenes[e[2]], 0)
+        self.assertEqual(resumenes[e[4]], 50)
+
+        ComposicionService.recalcular_pools([self.pool.id])
+        ComposicionService.recalcular_resumen_especies(e)
+        recalculada = PoolComposicion.objects.get(pool=self.pool)
+        self.assertEqual(
+            (guardada.total_granos, guardada.num_especies, guardada.especies),
+            (recalculada.total_granos, recalculada.num_especies, recalculada.especies),
+        )
+        self.assertEqual(resumenes, self._resumenes())
+        self.assertEqual(
+            dict(ResumenEspecie.objects.values_list('especie_id', 'total_analisis'))[e[0]], 1
+        )
+        self.assertEqual(self.pool.especie_dominante_id, e[0])
+
+    def test_especies_repetidas_o_inexistentes(self):
+        e = self.especies
+        for conteos, mensaje in (
+            ([{'especie': e[0], 'cantidad_granos': 1}, {'especie': e[0], 'cantidad_granos': 2}], 'una sola vez'),
+            ([{'especie': 999999, 'cantidad_granos': 1}], 'Especies inexistentes: [999999]'),
+        ):
+            with self.subTest(mensaje=mensaje):
+                response = self._guardar(conteos)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(mensaje, str(response.json()['conteos']))
+        # Un conteo rechazado no toca el pool
+        self.assertEqual(AnalisisPalinologico.objects.filter(pool=self.pool).count(), ESPECIES_POR_POOL)
+
+
+class ImportacionTemporadaTests(ConsultasTestCase):
+    URL = '/api/importaciones/temporada/'
+    ENCABEZADO = ImportacionTemporadaService.COLUMNAS
+
+    def setUp(self):
+        super().setUp()
+        crear_datos(2)
+        self.apiarios = list(Apiario.objects.order_by('id').values_list('id', flat=True))
+        self.analista = Analista.objects.order_by('id').first()
+
+    def _fila(self, tambor, apiarios=None, analista='', color='', humedad='', registro='', **extra):
+        fila = {
+            'tambor': tambor, 'fecha_extraccion': '2024-12-05',
+            'apiarios': ';'.join(str(a) for a in (apiarios if apiarios is not None else self.apiarios[:1])),
+            'analista': analista, 'color': color, 'humedad': humedad, 'fecha_analisis': '2024-12-20',
+            'num_registro_analisis': registro, 'observaciones': '',
+        }
+        fila.update(extra)
+        return fila
+
+    def _csv(self, filas):
+        salida = io.StringIO()
+        escritor = csv.DictWriter(salida, fieldnames=self.ENCABEZADO)
+        escritor.writeheader()
+        escritor.writerows(filas)
+        return SimpleUploadedFile('temporada.csv', salida.getvalue().encode('utf-8'), content_type='text/csv')
+
+    def _importar(self, filas, batch_size=None):
+        archivo = self._csv(filas)
+        return ImportacionTemporadaService.importar(
+            ImportacionTemporadaService.leer_filas(archivo, archivo.name), batch_size=batch_size
+        )
+
+    def _errores(self, resultado):
+        return {error['fila']: sorted(error['errores']) for error in resultado['errores']}
+
+    def test_filas_validas(self):
+        response = self.client.post(self.URL, {'archivo': self._csv([
+            self._fila('N-1', apiarios=self.apiarios, analista=self.analista.username, color='34',
+                       humedad='17,5', registro='FQ-1'),
+            self._fila('N-2', analista=str(self.analista.id), humedad='18.2'),
+            self._fila('N-3'),
+        ])})
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        self.assertEqual(datos['errores'], [])
+        self.assertEqual(
+            (datos['filas'], datos['tambores_creados'], datos['asignaciones_creadas'], datos['analisis_creados']),
+            (3, 3, 4, 2),
+        )
+        analisis = AnalisisFisicoQuimico.objects.get(num_registro='FQ-1')
+        self.assertEqual((analisis.tambor.num_registro, analisis.color, analisis.humedad), ('N-1', 34, Decimal('17.50')))
+        self.assertEqual(sorted(MuestraTambor.objects.get(num_registro='N-1').apiarios.values_list('id', flat=True)),
+                         self.apiarios)
+
+    def test_dry_run_no_guarda(self):
+        response = self.client.post(self.URL + '?dry_run=1', {'archivo': self._csv([self._fila('N-1')])})
+        self.assertEqual(response.json()['tambores_creados'], 0)
+        self.assertFalse(MuestraTambor.objects.filter(num_registro='N-1').exists())
+
+    def test_filas_invalidas_se_informan_por_linea(self):
+        resultado = self._importar([
+            self._fila('N-1', fecha_extraccion='05/12/2024'),
+            self._fila('N-2', apiarios=[999999]),
+            self._fila('N-3', humedad='17.555', color='rojo'),
+            self._fila('N-4', humedad='18'),
+            self._fila('N-5', analista='nadie', color='40'),
+            self._fila('', apiarios='x'),
+            self._fila('N-7'),
+        ])
+        self.assertEqual(self._errores(resultado), {
+            2: ['fecha_extraccion'],
+            3: ['apiarios'],
+            4: ['color', 'humedad'],
+            5: ['analista'],
+            6: ['analista'],
+            7: ['apiarios', 'tambor'],
+        })
+        # Las filas válidas del mismo bloque se guardan igual
+        self.assertEqual(resultado['tambores_creados'], 1)
+        self.assertTrue(MuestraTambor.objects.filter(num_registro='N-7').exists())
+
+    def test_duplicados_en_la_base_y_en_el_archivo(self):
+        existente = MuestraTambor.objects.order_by('id').first().num_registro
+        AnalisisFisicoQuimico.objects.filter(id=AnalisisFisicoQuimico.objects.order_by('id').first().id).update(
+            num_registro='FQ-VIEJO'
+        )
+        analista = self.analista.username
+        resultado = self._importar([
+            self._fila(existente),
+            self._fila('N-3', analista=analista, color='30', registro='FQ-VIEJO'),
+            self._fila('N-1', analista=analista, color='30', registro='FQ-1'),
+            self._fila('N-1', analista=analista, color='30', registro='FQ-1'),
+            self._fila('N-2', analista=analista, color='30', registro='FQ-1'),
+        ], batch_size=2)
+        errores = {error['fila']: error['errores'] for error in resultado['errores']}
+        self.assertEqual(self._errores(resultado), {
+            2: ['tambor'], 3: ['num_registro_analisis'], 5: ['num_registro_analisis', 'tambor'],
+            6: ['num_registro_analisis'],
+        })
+        self.assertIn('Ya existe', errores[2]['tambor'])
+        # Dentro del bloque, el repetido cita la línea original; en los siguientes ya está en la base
+        self.assertIn('línea 4', errores[5]['tambor'])
+        self.assertIn('línea 4', errores[5]['num_registro_analisis'])
+        self.assertIn('Ya existe', errores[6]['num_registro_analisis'])
+        self.assertEqual(resultado['tambores_creados'], 1)
+
+    def test_un_bloque_descartado_no_marca_sus_numeros_como_vistos(self):
+        bulk_create = MuestraTambor.objects.bulk_create
+        llamadas = []
+
+        def falla_la_primera(objetos, *args, **kwargs):
+            llamadas.append(objetos)
+            if len(llamadas) == 1:
+                raise IntegrityError('duplicate key value violates unique constraint')
+            return bulk_create(objetos, *args, **kwargs)
+
+        analista = self.analista.username
+        with mock.patch.object(MuestraTambor.objects, 'bulk_create', side_effect=falla_la_primera):
+            resultado = self._importar([
+                self._fila('N-1', analista=analista, color='30', registro='FQ-1'),
+                self._fila('N-1', analista=analista, color='30', registro='FQ-1'),
+            ], batch_size=1)
+        self.assertEqual(self._errores(resultado), {2: ['non_field_errors']})
+        self.assertEqual(resultado['tambores_creados'], 1)
+        self.assertTrue(AnalisisFisicoQuimico.objects.filter(num_registro='FQ-1', tambor__num_registro='N-1').exists())
+
+    @unittest.skipUnless(importlib.util.find_spec('openpyxl'), 'openpyxl no está instalado')
+    def test_xlsx(self):
+        from openpyxl import Workbook
+
+        libro = Workbook()
+        hoja = libro.active
+        hoja.append(self.ENCABEZADO)
+        # Excel devuelve fechas y números, no texto
+        hoja.append(['X-1', date(2024, 12, 5), str(self.apiarios[0]), self.analista.username, 34.0, 17.5,
+                     date(2024, 12, 20), 'FQ-X', None])
+        hoja.append(['X-2', 'no es fecha', self.apiarios[1], None, None, None, None, None, None])
+        contenido_xlsx = io.BytesIO()
+        libro.save(contenido_xlsx)
+
+        response = self.client.post(self.URL, {'archivo': SimpleUploadedFile('temporada.xlsx', contenido_xlsx.getvalue())})
+        datos = response.json()
+        self.assertEqual((datos['tambores_creados'], datos['analisis_creados']), (1, 1))
+        self.assertEqual(self._errores(datos), {3: ['fecha_extraccion']})
+        analisis = AnalisisFisicoQuimico.objects.get(num_registro='FQ-X')
+        self.assertEqual((analisis.fecha_extraccion, analisis.color, analisis.humedad),
+                         (date(2024, 12, 5), 34, Decimal('17.50')))
+
+    def test_extension_no_soportada(self):
+        archivo = SimpleUploadedFile('temporada.txt', b'tambor\n')
+        self.assertEqual(self.client.post(self.URL, {'archivo': archivo}).status_code, 400)
+
+
+class ClasificacionTests(ConsultasTestCase):
+    """Monofloral si el porcentaje de la especie supera su umbral (45 % si no tiene regla)"""
+
+    def setUp(self):
+        super().setUp()
+        self.analista = Analista.objects.create(nombres='Analista', apellidos='Prueba', username='clasificacion')
+        self.especies = [
+            Especie.objects.create(nombre_cientifico=f'Clasificada {i}', familia='Fabaceae') for i in range(4)
+        ]
+
+    def _pool(self, *cantidades, marcadas=0):
+        """Pool con las cantidades de granos de cada especie; la última especie, con marca especial"""
+        pool = Pool.objects.create(analista=self.analista, fecha_analisis=date(2024, 1, 1))
+        for especie, cantidad in zip(self.especies, cantidades):
+            AnalisisPalinologico.objects.create(pool=pool, especie=especie, cantidad_granos=cantidad)
+        if marcadas:
+            AnalisisPalinologico.objects.create(
+                pool=pool, especie=self.especies[-1], cantidad_granos=marcadas, marca_especial='#'
+            )
+        return pool
+
+    def _clasificacion(self, pool):
+        pool.refresh_from_db()
+        return pool.tipo_floral, pool.especie_dominante_id, pool.porcentaje_dominante
+
+    def test_umbral_por_defecto_estricto(self):
+        a = self.especies[0]
+        en_el_umbral = self._pool(45, 30, 25)
+        encima = self._pool(46, 29, 25)
+        self.assertEqual(self._clasificacion(en_el_umbral), (Pool.MULTIFLORAL, a.id, Decimal('45.00')))
+        self.assertEqual(self._clasificacion(encima), (Pool.MONOFLORAL, a.id, Decimal('46.00')))
+
+    def test_los_granos_con_marca_especial_no_cuentan(self):
+        pool = self._pool(46, 29, 25, marcadas=1000)
+        self.assertEqual(self._clasificacion(pool), (Pool.MONOFLORAL, self.especies[0].id, Decimal('46.00')))
+
+    def test_la_regla_de_la_especie_reemplaza_el_umbral(self):
+        a, b = self.especies[:2]
+        pool = self._pool(44, 31, 25)
+        self.assertEqual(self._clasificacion(pool)[0], Pool.MULTIFLORAL)
+
+        # B supera su propio umbral aunque A sea más abundante
+        regla = ReglaClasificacion.objects.create(especie=b, umbral=Decimal('30.00'))
+        self.assertEqual(self._clasificacion(pool), (Pool.MONOFLORAL, b.id, Decimal('31.00')))
+
+        regla.umbral = Decimal('31.00')
+        regla.save()
+        self.assertEqual(self._clasificacion(pool), (Pool.MULTIFLORAL, a.id, Decimal('44.00')))
+
+        # Si las dos superan su umbral gana la de mayor porcentaje
+        ReglaClasificacion.objects.create(especie=a, umbral=Decimal('40.00'))
+        regla.umbral = Decimal('20.00')
+        regla.save()
+        self.assertEqual(self._clasificacion(pool), (Pool.MONOFLORAL, a.id, Decimal('44.00')))
+
+    def test_borrar_la_regla_vuelve_al_umbral_por_defecto(self):
+        a = self.especies[0]
+        pool = self._pool(45, 30, 25)
+        otro = self._pool(50, 50)
+        regla = ReglaClasificacion.objects.create(especie=a, umbral=Decimal('40.00'))
+        self.assertEqual(self._clasificacion(pool)[0], Pool.MONOFLORAL)
+
+        regla.delete()
+        self.assertEqual(self._clasificacion(pool), (Pool.MULTIFLORAL, a.id, Decimal('45.00')))
+        # 50 % de cada una: supera el umbral y ante el empate gana el menor especie_id
+        self.assertEqual(self._clasificacion(otro), (Pool.MONOFLORAL, a.id, Decimal('50.00')))
+
+
+class SimilitudTests(ConsultasTestCase):
+    def setUp(self):
+        super().setUp()
+        # La matriz es del proceso: no debe quedar la de otro test
+        SimilitudService._matriz = None
+        self.addCleanup(setattr, SimilitudService, '_matriz', None)
+        self.analista = Analista.objects.create(nombres='Analista', apellidos='Prueba', username='similitud')
+        self.especies = [
+            Especie.objects.create(nombre_cientifico=f'Similar {i}', familia='Fabaceae') for i in range(3)
+        ]
+
+    def _pool(self, *cantidades):
+        pool = Pool.objects.create(analista=self.analista, fecha_analisis=date(2024, 1, 1))
+        for especie, cantidad in zip(self.especies, cantidades):
+            if cantidad:
+                AnalisisPalinologico.objects.create(pool=pool, especie=especie, cantidad_granos=cantidad)
+        return pool
+
+    def _perfil(self, *cantidades):
+        return {especie.id: cantidad for especie, cantidad in zip(self.especies, cantidades) if cantidad}
+
+    @staticmethod
+    def _coseno(a, b):
+        a = [x / sum(a) for x in a]
+        b = [x / sum(b) for x in b]
+        return sum(x * y for x, y in zip(a, b)) / (sum(x * x for x in a) ** 0.5 * sum(y * y for y in b) ** 0.5)
+
+    @staticmethod
+    def _bray_curtis(a, b):
+        return sum(min(x / sum(a), y / sum(b)) for x, y in zip(a, b))
+
+    def test_top_k_ordenado_con_las_dos_metricas(self):
+        composiciones = [(90, 10, 0), (50, 50, 0), (10, 10, 80), (0, 0, 100), (80, 20, 0)]
+        pools = [self._pool(*composicion) for composicion in composiciones]
+        perfil = (85, 15, 0)
+        for metrica, calcular in (('coseno', self._coseno), ('bray-curtis', self._bray_curtis)):
+            with self.subTest(metrica=metrica):
+                esperados = sorted(
+                    ((pool.id, round(calcular(perfil, composicion), 4)) for pool, composicion in zip(pools, composiciones)),
+                    key=lambda par: -par[1],
+                )[:3]
+                resultados = SimilitudService.similares_a_perfil(self._perfil(*perfil), k=3, metrica=metrica)
+                self.assertEqual([r['pool_id'] for r in resultados], [pool_id for pool_id, _ in esperados])
+                for resultado, (_, similitud) in zip(resultados, esperados):
+                    self.assertAlmostEqual(resultado['similitud'], similitud, places=3)
+                self.assertEqual(resultados[0]['num_registro'], pools[0].num_registro)
+
+    def test_excluir_deja_fuera_al_propio_pool(self):
+        pool = self._pool(90, 10, 0)
+        otros = [self._pool(90, 10, 0), self._pool(10, 90, 0)]
+        resultados = SimilitudService.similares_a_pool(pool.id, k=10)
+        self.assertEqual([r['pool_id'] for r in resultados], [otros[0].id, otros[1].id])
+        self.assertAlmostEqual(resultados[0]['similitud'], 1.0, places=3)
+
+        response = self.client.get(f'/api/pools/{pool.id}/similares/?k=1&metrica=bray-curtis')
+        self.assertEqual([r['pool_id'] for r in response.json()['resultados']], [otros[0].id])
+
+    def test_un_borrado_y_un_alta_entre_consultas(self):
+        pools = [self._pool(90, 10, 0), self._pool(50, 50, 0), self._pool(10, 90, 0)]
+        perfil = self._perfil(90, 10, 0)
+        self.assertEqual(len(SimilitudService.similares_a_perfil(perfil, k=3)), 3)
+
+        # La cantidad de composiciones no cambia, pero una fila de la matriz ya no existe
+        pools[0].delete()
+        nuevo = self._pool(85, 15, 0)
+        resultados = SimilitudService.similares_a_perfil(perfil, k=3)
+        self.assertEqual([r['pool_id'] for r in resultados], [nuevo.id, pools[1].id, pools[2].id])
+        self.assertEqual(SimilitudService.matriz().cantidad_pools, 3)
+
+
+def haversine_km(latitud, longitud, otra_latitud, otra_longitud):
+    lat1, lon1, lat2, lon2 = map(math.radians, (latitud, longitud, otra_latitud, otra_longitud))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(math.sqrt(a), 1.0))
+
+
+def destino(latitud, longitud, rumbo, distancia):
+    """Punto a `distancia` km del dado, con el rumbo en grados"""
+    lat, lon, rumbo = math.radians(latitud), math.radians(longitud), math.radians(rumbo)
+    angulo = distancia / RADIO_TIERRA_KM
+    lat2 = math.asin(math.sin(lat) * math.cos(angulo) + math.cos(lat) * math.sin(angulo) * math.cos(rumbo))
+    lon2 = lon + math.atan2(math.sin(rumbo) * math.sin(angulo) * math.cos(lat),
+                            math.cos(angulo) - math.sin(lat) * math.sin(lat2))
+    return math.degrees(lat2), (math.degrees(lon2) + 540) % 360 - 180
+
+
+class GeoTests(TestCase):
+    def test_geohash_de_puntos_conocidos(self):
+        self.assertEqual(codificar_geohash(42.6, -5.6, 5), 'ezs42')
+        self.assertEqual(codificar_geohash(Decimal('57.64911'), Decimal('10.40744'), 11), 'u4pruydqqvj')
+        self.assertIsNone(codificar_geohash(None, -5.6))
+
+    def test_la_celda_contiene_al_punto(self):
+        for latitud, longitud in ((-38.0021, -57.5575), (89.9, 179.99), (-90.0, -180.0), (0.0, 0.0)):
+            for precision in (1, 5, 12):
+                with self.subTest(punto=(latitud, longitud), precision=precision):
+                    lat_min, lon_min, lat_max, lon_max = caja_geohash(codificar_geohash(latitud, longitud, precision))
+                    self.assertTrue(lat_min <= latitud <= lat_max and lon_min <= longitud <= lon_max)
+        # Cada carácter más achica la celda: ~5 km con 5 caracteres
+        lat_min, lon_min, lat_max, lon_max = caja_geohash('ezs42')
+        self.assertAlmostEqual(lat_max - lat_min, 180 / 2 ** 12)
+        self.assertAlmostEqual(lon_max - lon_min, 360 / 2 ** 13)
+
+    def test_parsear_bbox(self):
+        self.assertEqual(parsear_bbox('-60,-39,-57,-37'), (-39.0, -60.0, -37.0, -57.0))
+        # lon_min > lon_max: cruza el antimeridiano
+        self.assertEqual(parsear_bbox('170,-10,-170,10'), (-10.0, 170.0, 10.0, -170.0))
+        for valor in ('1,2,3', '1,2,3,4,5', 'a,b,c,d', '-60,10,-57,5', '-60,-91,-57,0', '-181,0,0,1', 'nan,0,1,1', ''):
+            with self.subTest(valor=valor), self.assertRaises(ValueError):
+                parsear_bbox(valor)
+
+    def test_parsear_punto(self):
+        self.assertEqual(parsear_punto('-31.5,-60'), (-31.5, -60.0))
+        for valor in ('-31.5', '91,0', '0,181', 'x,y'):
+            with self.subTest(valor=valor), self.assertRaises(ValueError):
+                parsear_punto(valor)
+
+    def test_caja_radio_contiene_el_circulo(self):
+        for latitud, longitud, radio in ((-38, -57.5, 50), (60, 10, 800), (85, 0, 300), (-89.5, 45, 100),
+                                         (0, 179.9, 50), (10, -179.5, 200)):
+            lat_min, lon_min, lat_max, lon_max = caja_radio(latitud, longitud, radio)
+            for rumbo in range(0, 360, 5):
+                lat, lon = destino(latitud, longitud, rumbo, radio * 0.999)
+                with self.subTest(centro=(latitud, longitud), radio=radio, rumbo=rumbo):
+                    self.assertTrue(lat_min <= lat <= lat_max)
+                    self.assertTrue(lon_min <= lon <= lon_max)
+
+    def test_caja_radio_en_los_polos_y_el_antimeridiano(self):
+        self.assertEqual(caja_radio(89.5, 0, 100)[1::2], (-180.0, 180.0))
+        self.assertEqual(caja_radio(89.5, 0, 100)[2], 90.0)
+        self.assertEqual(caja_radio(0, 179.9, 50)[1::2], (-180.0, 180.0))
+        lat_min, lon_min, lat_max, lon_max = caja_radio(-38, -57.5, 50)
+        self.assertLess(lon_max - lon_min, 2)
+
+
+class ApiariosGeoTests(ConsultasTestCase):
+    def setUp(self):
+        super().setUp()
+        self.apicultor = Apicultor.objects.create(nombre='Geo', apellido='Prueba')
+
+    def _apiario(self, nombre, latitud, longitud):
+        return Apiario.objects.create(
+            apicultor=self.apicultor, nombre_apiario=nombre, cant_colmenas=10, localidad='Geo',
+            latitud=Decimal(str(latitud)), longitud=Decimal(str(longitud)),
+        )
+
+    def _nombres(self, url):
+        return sorted(fila['nombre_apiario'] for fila in self.client.get(url).json()['results'])
+
+    def test_el_radio_filtra_por_distancia_exacta(self):
+        centro = (-38.0, -57.5)
+        # Dentro de la caja del círculo pero fuera del radio: en diagonal
+        puntos = {'cerca': destino(*centro, 90, 49), 'borde': destino(*centro, 0, 49.9),
+                  'diagonal': destino(*centro, 45, 60), 'lejos': destino(*centro, 180, 51)}
+        for nombre, (latitud, longitud) in puntos.items():
+            self._apiario(nombre, round(latitud, 6), round(longitud, 6))
+
+        response = self.client.get('/api/apiarios/?near=-38.0,-57.5&radius_km=50')
+        filas = response.json()['results']
+        self.assertEqual([fila['nombre_apiario'] for fila in filas], ['cerca', 'borde'])
+        for fila in filas:
+            esperada = haversine_km(*centro, float(fila['latitud']), float(fila['longitud']))
+            self.assertAlmostEqual(fila['distancia_km'], esperada, places=2)
+
+    def test_radio_que_cruza_el_antimeridiano(self):
+        self._apiario('este', 0, 179.95)
+        self._apiario('oeste', 0, -179.95)
+        self._apiario('lejos', 0, 170)
+        self.assertEqual(self._nombres('/api/apiarios/?near=0,179.99&radius_km=50'), ['este', 'oeste'])
+
+    def test_bbox_que_cruza_el_antimeridiano(self):
+        self._apiario('este', 5, 175)
+        self._apiario('oeste', -5, -175)
+        self._apiario('centro', 0, 0)
+        self.assertEqual(self._nombres('/api/apiarios/?bbox=170,-10,-170,10'), ['este', 'oeste'])
+        self.assertEqual(self._nombres('/api/apiarios/?bbox=-10,-10,10,10'), ['centro'])
+
+    def test_parametros_invalidos(self):
+        for url in ('/api/apiarios/?bbox=1,2,3', '/api/apiarios/?near=100,0&radius_km=5',
+                    '/api/apiarios/?near=0,0', '/api/apiarios/?near=0,0&radius_km=0',
+                    '/api/apiarios/celdas/?precision=9'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 400)
+
+    def test_celdas_agrupan_por_prefijo_de_geohash(self):
+        crear_datos(3)
+        self._apiario('vecino', -38.000001, -57.500001)
+        celdas = self.client.get('/api/apiarios/celdas/?precision=4').json()
+        esperadas = {}
+        for geohash, colmenas in Apiario.objects.values_list('geohash', 'cant_colmenas'):
+            celda = esperadas.setdefault(geohash[:4], [0, 0])
+            celda[0] += 1
+            celda[1] += colmenas
+        self.assertEqual({c['celda']: [c['apiarios'], c['colmenas']] for c in celdas}, esperadas)
+        self.assertEqual(sum(c['pools'] for c in celdas), 3)
+        lat_min, lon_min, lat_max, lon_max = celdas[0]['caja']
+        self.assertEqual(celdas[0]['centro'], [(lat_min + lat_max) / 2, (lon_min + lon_max) / 2])
+
+        # Con bbox solo cuentan los apiarios de la caja
+        celdas = self.client.get('/api/apiarios/celdas/?precision=4&bbox=-58,-38.5,-57,-36.5').json()
+        self.assertEqual(sum(c['apiarios'] for c in celdas), 2)
+
+
+class ReplicaTests(ConsultasTestCase):
+    """
+    Qué base elegiría RouterReplica en cada lectura. La réplica no existe en
+    los tests: el router anota su decisión y las consultas van a default.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.pool = crear_datos(2)[0]
+        self.apiario = Apiario.objects.order_by('id').first()
+        self.elegidas = []
+        db_for_read = RouterReplica.db_for_read
+
+        def anotar(router, model, **hints):
+            self.elegidas.append(db_for_read(router, model, **hints))
+            return None
+
+        parche = mock.patch.object(RouterReplica, 'db_for_read', anotar)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def _bases(self, url, metodo='get', **kwargs):
+        self.elegidas.clear()
+        response = getattr(self.client, metodo)(url, **kwargs)
+        contenido(response)
+        self.assertLess(response.status_code, 400)
+        return set(self.elegidas)
+
+    def _con_replica(self):
+        return mock.patch('modelos.replicas.replica_configurada', return_value=True)
+
+    def test_sin_alias_reporting_todo_va_a_default(self):
+        self.assertNotIn(ALIAS_REPLICA, django_settings.DATABASES)
+        self.assertEqual(self._bases(f'/api/apiarios/{self.apiario.id}/estadisticas/'), {None})
+        self.assertFalse(leyendo_replica())
+
+    def test_las_acciones_de_reportes_leen_de_la_replica(self):
+        with self._con_replica():
+            self.assertEqual(self._bases(f'/api/apiarios/{self.apiario.id}/estadisticas/'), {ALIAS_REPLICA})
+            # También mientras se envía una respuesta en streaming
+            self.assertEqual(self._bases('/api/pools/stats/'), {ALIAS_REPLICA})
+            # Las acciones que no lo declaran, no
+            self.assertEqual(self._bases(f'/api/apiarios/{self.apiario.id}/'), {None})
+            self.assertFalse(leyendo_replica())
+
+    def test_despues_de_escribir_el_cliente_lee_de_default(self):
+        url = f'/api/apiarios/{self.apiario.id}/estadisticas/'
+        with self._con_replica():
+            self.assertEqual(self._bases('/api/especies/', 'post', data={
+                'nombre_cientifico': 'Especie nueva', 'familia': 'Fabaceae',
+            }, content_type='application/json'), {None})
+            self.assertEqual(self._bases(url), {None})
+
+            # Otro cliente sigue leyendo de la réplica
+            otro = self.client_class()
+            otro.cookies[django_settings.SESSION_COOKIE_NAME] = 'otro-cliente'
+            self.elegidas.clear()
+            self.assertEqual(otro.get(url).status_code, 200)
+            self.assertEqual(set(self.elegidas), {ALIAS_REPLICA})
+
+            # Una escritura fallida no cuenta
+            cache.clear()
+            self.client.post('/api/especies/', {}, content_type='application/json')
+            self.assertEqual(self._bases(url), {ALIAS_REPLICA})
+
+    def test_las_escrituras_y_migraciones_no_van_a_la_replica(self):
+        router = RouterReplica()
+        self.assertEqual(router.db_for_write(Pool), 'default')
+        self.assertFalse(router.allow_migrate(ALIAS_REPLICA, 'modelos'))
+        self.assertTrue(router.allow_migrate('default', 'modelos'))
+
+
+class SaludTests(TestCase):
+    """Health checks que SaludMiddleware responde antes que el resto"""
+
+    def setUp(self):
+        readiness.reiniciar()
+        self.addCleanup(readiness.reiniciar)
+
+    def test_live_no_toca_la_base_ni_la_cache(self):
+        with mock.patch('modelos.salud.cache') as cache_salud, self.assertNumQueries(0):
+            for url in ('/health/live', '/health/'):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['status'], 'healthy')
+        cache_salud.set.assert_not_called()
+
+    def test_ready_verifica_base_cache_y_migraciones(self):
+        response = self.client.get('/health/ready')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.assertEqual(response.json()['checks'], {'db': 'ok', 'cache': 'ok', 'migraciones': 'ok'})
+
+    def test_ready_responde_503_si_falla_la_base(self):
+        with mock.patch.object(Readiness, '_verificar_base', return_value='OperationalError'), \
+                self.assertLogs('modelos.salud', 'WARNING'):
+            response = self.client.get('/health/ready')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['status'], 'unavailable')
+        self.assertEqual(response.json()['checks']['db'], 'OperationalError')
+
+    @override_settings(SALUD_TTL=30, SALUD_TTL_FALLA=1)
+    def test_el_resultado_se_reutiliza_durante_el_ttl(self):
+        ahora = [1000.0]
+        with mock.patch('modelos.salud.time.monotonic', side_effect=lambda: ahora[0]), \
+                mock.patch.object(Readiness, '_verificar_base', wraps=Readiness._verificar_base) as base:
+            self.assertEqual(self.client.get('/health/ready').status_code, 200)
+            ahora[0] += 29
+            self.assertEqual(self.client.get('/health/ready').status_code, 200)
+            self.assertEqual(base.call_count, 1)
+            ahora[0] += 2
+            self.client.get('/health/ready')
+            self.assertEqual(base.call_count, 2)
+
+            # Una falla se conserva solo SALUD_TTL_FALLA: la recuperación se ve enseguida
+            base.side_effect = lambda alias: 'OperationalError'
+            ahora[0] += 31
+            with self.assertLogs('modelos.salud', 'WARNING'):
+                self.assertEqual(self.client.get('/health/ready').status_code, 503)
+            base.side_effect = None
+            ahora[0] += 0.5
+            self.assertEqual(self.client.get('/health/ready').status_code, 503)
+            ahora[0] += 1
+            self.assertEqual(self.client.get('/health/ready').status_code, 200)
+
+
+class ExportacionTests(ConsultasTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pools = crear_datos(3)
+        # Un pool con dos tambores de apiarios distintos no repite sus filas
+        ContienePool.objects.create(pool=self.pools[0], tambor=MuestraTambor.objects.get(num_registro='T-00001'))
+
+    def _exportar(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return response, contenido(response).decode()
+
+    def _csv(self, url):
+        response, texto = self._exportar(url)
+        filas = list(csv.reader(io.StringIO(texto)))
+        return response, filas[0], filas[1:]
+
+    def _ndjson(self, url):
+        response, texto = self._exportar(url)
+        return response, [json.loads(linea) for linea in texto.splitlines()]
+
+    def test_csv_de_analisis_palinologicos(self):
+        response, encabezado, filas = self._csv('/api/export/analisis-palinologicos.csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="analisis-palinologicos.csv"')
+        self.assertEqual(encabezado, [encabezado for encabezado, _ in ExportacionService.COLUMNAS_PALINOLOGICO])
+        self.assertEqual([int(fila[0]) for fila in filas],
+                         list(AnalisisPalinologico.objects.order_by('id').values_list('id', flat=True)))
+
+        analisis = AnalisisPalinologico.objects.select_related('pool', 'especie').order_by('id').first()
+        fila = dict(zip(encabezado, filas[0]))
+        self.assertEqual(fila['pool_id'], str(analisis.pool_id))
+        self.assertEqual(fila['fecha_analisis'], analisis.pool.fecha_analisis.isoformat())
+        self.assertEqual(fila['nombre_cientifico'], analisis.especie.nombre_cientifico)
+        self.assertEqual(fila['cantidad_granos'], str(analisis.cantidad_granos))
+        self.assertEqual(fila['created_at'], analisis.created_at.isoformat())
+
+    def test_ndjson_de_analisis_fisicoquimicos(self):
+        response, filas = self._ndjson('/api/export/analisis-fisicoquimicos.ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="analisis-fisicoquimicos.ndjson"')
+        analisis = list(AnalisisFisicoQuimico.objects.select_related('tambor').order_by('id'))
+        self.assertEqual([fila['id'] for fila in filas], [a.id for a in analisis])
+        for fila, a in zip(filas, analisis):
+            self.assertEqual(list(fila), [encabezado for encabezado, _ in ExportacionService.COLUMNAS_FISICOQUIMICO])
+            self.assertEqual(fila['tambor_num_registro'], a.tambor.num_registro)
+            self.assertEqual(Decimal(fila['humedad']), a.humedad)
+            self.assertEqual(fila['fecha_analisis'], a.fecha_analisis.isoformat())
+
+    def test_filtros(self):
+        pool, otro = self.pools[0], self.pools[1]
+        apiario = Apiario.objects.get(nombre_apiario='Apiario 1')
+        especie = AnalisisPalinologico.objects.filter(pool=pool).order_by('id').first().especie
+        casos = {
+            'fecha_desde=2024-02-01&fecha_hasta=2024-02-28':
+                AnalisisPalinologico.objects.filter(pool=otro),
+            # Los pools de los tambores del apiario: el suyo y el que comparte el tambor T-00001
+            f'apiario={apiario.id}': AnalisisPalinologico.objects.filter(pool__in=[pool, otro]),
+            f'apicultor={apiario.apicultor_id}': AnalisisPalinologico.objects.filter(pool__in=[pool, otro]),
+            f'especie={especie.id}': AnalisisPalinologico.objects.filter(especie=especie),
+        }
+        for parametros, esperados in casos.items():
+            for formato in ('csv', 'ndjson'):
+                with self.subTest(parametros=parametros, formato=formato):
+                    url = f'/api/export/analisis-palinologicos.{formato}?{parametros}'
+                    if formato == 'csv':
+                        ids = [int(fila[0]) for fila in self._csv(url)[2]]
+                    else:
+                        ids = [fila['id'] for fila in self._ndjson(url)[1]]
+                    self.assertEqual(ids, sorted(esperados.values_list('id', flat=True)))
+
+        _, filas = self._ndjson(f'/api/export/analisis-fisicoquimicos.ndjson?especie={especie.id}')
+        self.assertEqual({fila['tambor_num_registro'] for fila in filas}, {'T-00000', 'T-00001'})
+
+    def test_filtros_invalidos(self):
+        for parametros in ('fecha_desde=ayer', 'fecha_hasta=2024-13-01', 'apiario=1,dos'):
+            with self.subTest(parametros=parametros):
+                response = self.client.get(f'/api/export/analisis-palinologicos.csv?{parametros}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_se_envia_por_partes_dentro_de_una_transaccion(self):
+        with mock.patch.object(ExportacionService, 'FILAS_POR_ENVIO', 2):
+            response = self.client.get('/api/export/analisis-palinologicos.ndjson')
+            partes = [parte.decode() for parte in response.streaming_content]
+        filas = AnalisisPalinologico.objects.count()
+        self.assertEqual(len(partes), math.ceil(filas / 2))
+        self.assertEqual(sum(parte.count('\n') for parte in partes), filas)
+
+        # TestCase ya corre en una transacción: iterar() abre un savepoint propio
+        afuera = len(connection.savepoint_ids)
+        dentro = {len(connection.savepoint_ids) for _ in iterar(Especie.objects.all(), chunk_size=2)}
+        self.assertEqual(dentro, {afuera + 1})
+        self.assertEqual(len(connection.savepoint_ids), afuera)
+
+
+class AnotacionesPoolTests(ConsultasTestCase):
+    """?with= da lo mismo que el cálculo por pool que hacía ListaMuestras, en consultas fijas"""
+    URLS = [f'/api/{prefijo}/?with={",".join(ANOTACIONES_POOL)}' for prefijo in ('muestras', 'pools')]
+
+    def setUp(self):
+        super().setUp()
+        crear_datos(3)
+        # Un pool sin análisis y otro con un análisis agregado después de crearlo
+        Pool.objects.create(analista=Analista.objects.first(), fecha_analisis=date(2024, 6, 1))
+        especie = Especie.objects.create(nombre_cientifico='Especie agregada', familia='Asteraceae')
+        AnalisisPalinologico.objects.create(pool=Pool.objects.order_by('id').first(), especie=especie, cantidad_granos=7)
+
+    @staticmethod
+    def por_pool(pool):
+        analisis = AnalisisPalinologico.objects.filter(pool=pool)
+        return {
+            'conteo_analisis': analisis.count(),
+            'total_granos': analisis.aggregate(total=Sum('cantidad_granos'))['total'] or 0,
+            'num_especies': analisis.values('especie').distinct().count(),
+            'analista_nombre': f'{pool.analista.nombres} {pool.analista.apellidos}',
+        }
+
+    def test_igual_al_calculo_por_pool(self):
+        esperado = {pool.id: self.por_pool(pool) for pool in Pool.objects.select_related('analista')}
+        for url in self.URLS:
+            with self.subTest(url=url):
+                filas = self.client.get(url).json()['results']
+                self.assertEqual(
+                    {fila['id']: {nombre: fila[nombre] for nombre in ANOTACIONES_POOL} for fila in filas}, esperado
+                )
+
+    def test_consultas_fijas_por_listado(self):
+        # Los pools con sus anotaciones en una consulta, y los ids de sus tambores en otra
+        for url in self.URLS:
+            with self.subTest(url=url):
+                with self.assertNumQueries(2):
+                    self.client.get(url)
+                crear_datos(3)
+                with self.assertNumQueries(2):
+                    filas = self.client.get(url).json()['results']
+                self.assertEqual(len(filas), Pool.objects.count())
+
+    def test_anotacion_desconocida(self):
+        response = self.client.get('/api/pools/?with=total_granos,otra')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('otra', str(response.json()['with']))
+
+
+class CamposLivianosTests(ConsultasTestCase):
+    """?fields= y ?expand= dan los mismos valores que el listado completo, en consultas fijas"""
+    URL = '/api/analisis-palinologicos/'
+
+    def setUp(self):
+        super().setUp()
+        crear_datos(3)
+
+    def _completo(self):
+        return {fila['id']: fila for fila in self.client.get(self.URL).json()['results']}
+
+    def test_fields_igual_al_listado_completo(self):
+        completo = self._completo()
+        with self.assertNumQueries(1):
+            filas = self.client.get(f'{self.URL}?fields=id,pool,especie,cantidad_granos,porcentaje').json()['results']
+        self.assertEqual(sorted(fila['id'] for fila in filas), sorted(completo))
+        for fila in filas:
+            anterior = completo[fila['id']]
+            self.assertEqual(fila, {
+                'id': anterior['id'], 'pool': anterior['pool']['id'], 'especie': anterior['especie']['id'],
+                'cantidad_granos': anterior['cantidad_granos'], 'porcentaje': anterior['porcentaje'],
+            })
+
+    def test_expand_incluye_cada_relacionado_una_vez(self):
+        completo = self._completo()
+        datos = self.client.get(f'{self.URL}?fields=id,cantidad_granos&expand=pool,especie').json()
+        for fila in datos['results']:
+            self.assertEqual(fila['pool'], completo[fila['id']]['pool']['id'])
+        for relacion in ('pool', 'especie'):
+            with self.subTest(relacion=relacion):
+                esperados = {fila[relacion]['id']: fila[relacion] for fila in completo.values()}
+                incluidos = datos['included'][relacion]
+                self.assertEqual(len(incluidos), len(esperados))
+                self.assertEqual({objeto['id']: objeto for objeto in incluidos}, esperados)
+
+    def test_consultas_fijas(self):
+        urls = {f'{self.URL}?fields=id,pool': 1, f'{self.URL}?fields=id&expand=pool,especie': 3}
+        for url, cantidad in urls.items():
+            with self.subTest(url=url), self.assertNumQueries(cantidad):
+                self.client.get(url)
+        crear_datos(4)
+        for url, cantidad in urls.items():
+            with self.subTest(url=url), self.assertNumQueries(cantidad):
+                self.client.get(url)
+
+    @override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=True)
+    def test_expand_entra_en_el_presupuesto(self):
+        for url in ('/api/analisis-palinologicos/?expand=pool,especie',
+                    '/api/analisis-fisicoquimicos/?fields=id&expand=analista,tambor',
+                    '/api/pools/?expand=analista,especie_dominante', '/api/muestras/?expand=analista'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_campos_desconocidos(self):
+        for parametros, clave in (('fields=id,otro', 'fields'), ('expand=analista', 'expand')):
+            with self.subTest(parametros=parametros):
+                response = self.client.get(f'{self.URL}?{parametros}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(clave, response.json())
+
+
+class EstadisticasApiarioTests(ConsultasTestCase):
+    """Las estadísticas agregadas dan lo mismo que las cinco consultas por apiario de antes"""
+
+    def setUp(self):
+        super().setUp()
+        crear_datos(3)
+        self.apicultor = Apicultor.objects.order_by('id').first()
+        self.apiario = Apiario.objects.get(apicultor=self.apicultor)
+        # Un segundo tambor del apiario en el mismo pool y en otro pool, con análisis físico-químico
+        tambor = MuestraTambor.objects.create(num_registro='T-90000', fecha_de_extraccion=date(2024, 3, 1))
+        TamborApiario.objects.create(tambor=tambor, apiario=self.apiario)
+        ContienePool.objects.create(pool=Pool.objects.order_by('id').first(), tambor=tambor)
+        ContienePool.objects.create(pool=Pool.objects.order_by('id')[1], tambor=tambor)
+        AnalisisFisicoQuimico.objects.create(
+            analista=Analista.objects.first(), tambor=tambor, color=80, humedad=Decimal('18.40'),
+            fecha_extraccion=date(2024, 3, 1), fecha_analisis=date(2024, 3, 20),
+        )
+        # Un tambor sin pools y un apiario sin tambores
+        otro_tambor = MuestraTambor.objects.create(num_registro='T-90001', fecha_de_extraccion=date(2024, 3, 2))
+        TamborApiario.objects.create(tambor=otro_tambor, apiario=self.apiario)
+        Apiario.objects.create(apicultor=self.apicultor, nombre_apiario='Apiario vacío', cant_colmenas=5)
+
+    @staticmethod
+    def por_apiario(apiario):
+        """El cálculo anterior de ApiarioViewSet.estadisticas"""
+        stats = {
+            'total_tambores': apiario.tambores.count(),
+            'total_muestras': Pool.objects.filter(tambores__apiarios=apiario).distinct().count(),
+            'analisis_palinologicos': AnalisisPalinologico.objects.filter(
+                pool__tambores__apiarios=apiario
+            ).distinct().count(),
+            'especies_encontradas': Especie.objects.filter(
+                analisis_palinologicos__pool__tambores__apiarios=apiario
+            ).distinct().count(),
+        }
+        stats.update(AnalisisFisicoQuimico.objects.filter(tambor__apiarios=apiario).aggregate(
+            promedio_humedad=Avg('humedad'), promedio_color=Avg('color')
+        ))
+        return stats
+
+    def assertEstadisticasIguales(self, obtenidas, esperadas):
+        for campo in EstadisticasApiarioService.CAMPOS:
+            if esperadas[campo] is None or campo.startswith('promedio'):
+                self.assertEqual(obtenidas[campo] is None, esperadas[campo] is None, campo)
+                if esperadas[campo] is not None:
+                    self.assertAlmostEqual(float(obtenidas[campo]), float(esperadas[campo]), places=4, msg=campo)
+            else:
+                self.assertEqual(obtenidas[campo], esperadas[campo], campo)
+
+    def test_estadisticas_iguales_al_calculo_por_apiario(self):
+        self.assertEqual(self.por_apiario(self.apiario)['total_tambores'], 3)
+        for apiario in Apiario.objects.all():
+            with self.subTest(apiario=apiario.nombre_apiario):
+                with self.assertNumQueries(1):
+                    response = self.client.get(f'/api/apiarios/{apiario.id}/estadisticas/')
+                self.assertEqual(list(response.json()), list(EstadisticasApiarioService.CAMPOS))
+                self.assertEstadisticasIguales(response.json(), self.por_apiario(apiario))
+        self.assertEqual(self.client.get('/api/apiarios/999999/estadisticas/').status_code, 404)
+
+    def test_estadisticas_por_apicultor_en_una_consulta(self):
+        url = f'/api/apiarios/estadisticas/?apicultor={self.apicultor.id}'
+        with self.assertNumQueries(1):
+            filas = self.client.get(url).json()
+        apiarios = list(Apiario.objects.filter(apicultor=self.apicultor).order_by('id'))
+        self.assertEqual([(fila['id'], fila['nombre_apiario']) for fila in filas],
+                         [(apiario.id, apiario.nombre_apiario) for apiario in apiarios])
+        for fila, apiario in zip(filas, apiarios):
+            with self.subTest(apiario=apiario.nombre_apiario):
+                self.assertEstadisticasIguales(fila, self.por_apiario(apiario))
+
+        # Más apiarios del apicultor no agregan consultas
+        for i in range(3):
+            Apiario.objects.create(apicultor=self.apicultor, nombre_apiario=f'Apiario extra {i}', cant_colmenas=1)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.client.get(url).json()), len(apiarios) + 3)
+
+    def test_apicultor_obligatorio(self):
+        for parametros in ('', '?apicultor=', '?apicultor=uno'):
+            with self.subTest(parametros=parametros):
+                response = self.client.get(f'/api/apiarios/estadisticas/{parametros}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+
+class GenerarDatosTests(TestCase):
+    """generar_datos a escala chica: datos coherentes y tablas derivadas al día"""
+    OPCIONES = {
+        'apicultores': 3, 'apiarios': 6, 'tambores': 60, 'pools': 10, 'especies': 12,
+        'especies_por_pool': 4, 'analistas': 2, 'temporadas': 2, 'batch_size': 7,
+    }
+
+    def setUp(self):
+        self.salida = io.StringIO()
+        call_command('generar_datos', stdout=self.salida, **self.OPCIONES)
+
+    def test_genera_las_cantidades_pedidas(self):
+        self.assertEqual(Apicultor.objects.count(), 3)
+        self.assertEqual(Apiario.objects.count(), 6)
+        self.assertEqual(MuestraTambor.objects.count(), 60)
+        self.assertEqual(Pool.objects.count(), 10)
+        self.assertEqual(Especie.objects.count(), 12)
+        self.assertEqual(Analista.objects.count(), 2)
+        self.assertEqual(ReglaClasificacion.objects.count(), 5)
+        self.assertIn('Listo', self.salida.getvalue())
+
+        # Cada tambor en un apiario, cada pool con tambores, análisis y número de registro
+        self.assertFalse(MuestraTambor.objects.filter(apiarios__isnull=True).exists())
+        self.assertFalse(Pool.objects.filter(tambores__isnull=True).exists())
+        self.assertFalse(Pool.objects.filter(analisis_palinologicos__isnull=True).exists())
+        self.assertEqual(len(set(Pool.objects.values_list('num_registro', flat=True))), 10)
+        for apiario in Apiario.objects.all():
+            self.assertEqual(apiario.geohash, codificar_geohash(apiario.latitud, apiario.longitud))
+
+    def test_las_tablas_derivadas_quedan_al_dia(self):
+        for pool in Pool.objects.prefetch_related('analisis_palinologicos'):
+            with self.subTest(pool=pool.id):
+                composicion = PoolComposicion.objects.get(pool=pool)
+                analisis = list(pool.analisis_palinologicos.all())
+                self.assertEqual(composicion.num_especies, len(analisis))
+                self.assertEqual(composicion.total_granos, sum(a.cantidad_granos for a in analisis))
+                self.assertIsNotNone(pool.tipo_floral)
+        for especie in Especie.objects.all():
+            with self.subTest(especie=especie.id):
+                total = AnalisisPalinologico.objects.filter(especie=especie).count()
+                resumen = ResumenEspecie.objects.filter(especie=especie).first()
+                self.assertEqual(resumen.total_analisis if resumen else 0, total)
+        self.assertTrue(SerieFisicoQuimica.objects.exists())
+
+        # verificar_presupuestos encuentra filas en todos los listados
+        self.assertEqual(endpoints(page_size=50)[1], [])
+
+    def test_no_genera_dos_veces_en_la_misma_base(self):
+        with self.assertRaises(CommandError):
+            call_command('generar_datos', stdout=io.StringIO(), **self.OPCIONES)
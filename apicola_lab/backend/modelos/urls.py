@@ -1,11 +1,12 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     ApicultorViewSet, AnalistaViewSet, ApiarioViewSet,
     TamborViewSet, EspecieViewSet, MuestraViewSet,
     AnalisisPalinologicoViewSet, AnalisisFisicoQuimicoViewSet,
-    EstadisticasView, ContienePoolViewSet, TamborApiarioViewSet,
-    PoolViewSet, pool_stats
+    EstadisticasView, SeriesEstadisticasView, ContienePoolViewSet, TamborApiarioViewSet,
+    PoolViewSet, ReglaClasificacionViewSet, ExportarAnalisisView, ImportarTemporadaView,
+    ReportePoolView, ReportesPoolsView, pool_stats
 )
 
 router = DefaultRouter()
@@ -20,9 +21,19 @@ router.register(r'analisis-fisicoquimicos', AnalisisFisicoQuimicoViewSet)
 router.register(r'pools', PoolViewSet)
 router.register(r'contiene-pool', ContienePoolViewSet)
 router.register(r'tambor-apiario', TamborApiarioViewSet)
+router.register(r'reglas-clasificacion', ReglaClasificacionViewSet)
 
 urlpatterns = [
+    # Antes del router: 'pools/reportes.zip' coincide con su patrón de sufijo de formato
+    path('pools/reportes.zip', ReportesPoolsView.as_view(), name='reportes_pools'),
+    path('pools/<int:pool_id>/reporte.pdf', ReportePoolView.as_view(), name='reporte_pool'),
     path('', include(router.urls)),
     path('estadisticas/', EstadisticasView.as_view(), name='estadisticas'),
+    path('estadisticas/series/', SeriesEstadisticasView.as_view(), name='estadisticas_series'),
     path('pool/<int:pool_id>/stats/', pool_stats, name='pool_stats'),
+    path('importaciones/temporada/', ImportarTemporadaView.as_view(), name='importar_temporada'),
+    re_path(r'^export/analisis-palinologicos\.(?P<formato>csv|ndjson)$',
+            ExportarAnalisisView.as_view(tipo='palinologico'), name='export_analisis_palinologicos'),
+    re_path(r'^export/analisis-fisicoquimicos\.(?P<formato>csv|ndjson)$',
+            ExportarAnalisisView.as_view(tipo='fisicoquimico'), name='export_analisis_fisicoquimicos'),
 ] 
\ No newline at end of file
@@ -1,12 +1,17 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Avg, Sum, Q
-from django.db.models.functions import TruncMonth, TruncYear
-from django.utils import timezone
-from datetime import timedelta, datetime
+from django.db.models import Q, F, Value
+from django.db.models.functions import Coalesce, Concat
+from django.utils.dateparse import parse_date
+from datetime import datetime
+import io
 import json
 
 from .models.Analista_model import Analista
@@ -19,21 +24,267 @@ from .models.Pool_model import Pool
 from .models.ContienePool_model import ContienePool
 from .models.AnalisisPalinologico_model import AnalisisPalinologico
 from .models.AnalisisFisicoQuimico_model import AnalisisFisicoQuimico
+from .models.PoolComposicion_model import PoolComposicion
+from .models.ResumenEspecie_model import ResumenEspecie
+from .models.ReglaClasificacion_model import ReglaClasificacion
 
 
+from .lectura_rapida import compilar, compilar_modelo
+from .replicas import lectura_replica
 from .serializers import (
     ApicultorSerializer, AnalistaSerializer, ApiarioSerializer,
     TamborSerializer, TamborApiarioSerializer, EspecieSerializer,
-    PoolSerializer, MuestraTamborSerializer, AnalisisPalinologicoSerializer,
+    PoolSerializer, PoolDetailSerializer, MuestraTamborSerializer, AnalisisPalinologicoSerializer,
     AnalisisFisicoQuimicoSerializer, ApiarioDetailSerializer,
     MuestraDetailSerializer, AnalisisPalinologicoDetailSerializer,
-    AnalisisFisicoQuimicoDetailSerializer, EstadisticasSerializer,
+    AnalisisFisicoQuimicoDetailSerializer, EstadisticasSerializer, SeriesEstadisticasSerializer,
     ContienePoolSerializer,
-    TamborWithApiariosSerializer
+    TamborWithApiariosSerializer, ConteosPoolSerializer, PoolConTamboresSerializer,
+    SimilitudSerializer, PerfilSimilitudSerializer, ReglaClasificacionSerializer
 )
 
-class ApicultorViewSet(viewsets.ModelViewSet):
+
+class EagerLoadingViewSetMixin:
+    """
+    Arma el queryset a partir del serializer que usa la acción: aplica los
+    select_related/Prefetch que declara su setup_eager_loading para que los
+    listados cuesten un número fijo de consultas.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        setup_eager_loading = getattr(self.get_serializer_class(), 'setup_eager_loading', None)
+        if setup_eager_loading is not None:
+            queryset = setup_eager_loading(queryset)
+        return queryset
+
+
+class AnotacionesViewSetMixin:
+    """
+    Permite pedir columnas calculadas en los listados con ?with=a,b.
+
+    Cada viewset declara en `anotaciones` el nombre y la expresión de cada
+    columna; las pedidas se resuelven con annotate() en la misma consulta
+    del listado, sin requests ni consultas extra por fila.
+    """
+    anotaciones = {}
+
+    def _anotaciones_pedidas(self):
+        if self.request is None:
+            return []
+        pedidas = [
+            nombre.strip()
+            for nombre in self.request.query_params.get('with', '').split(',')
+            if nombre.strip()
+        ]
+        desconocidas = [nombre for nombre in pedidas if nombre not in self.anotaciones]
+        if desconocidas:
+            raise ValidationError({
+                'with': f"Anotaciones desconocidas: {', '.join(desconocidas)}. "
+                        f"Disponibles: {', '.join(self.anotaciones)}"
+            })
+        return pedidas
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        pedidas = self._anotaciones_pedidas()
+        if pedidas:
+            queryset = queryset.annotate(**{nombre: self.anotaciones[nombre] for nombre in pedidas})
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['anotaciones'] = self._anotaciones_pedidas()
+        return context
+
+
+def _orden_paginacion(vista, queryset):
+    """Campos por los que ordena el paginador del listado (sin el signo)"""
+    if vista.paginator is None:
+        return []
+    return [campo.lstrip('-') for campo in vista.paginator.get_ordering(vista.request, queryset, vista)]
+
+
+class LecturaRapidaViewSetMixin:
+    """
+    list y retrieve con el serializer compilado (ver modelos/lectura_rapida.py).
+
+    Lee filas con values() y arma la misma salida que el serializer, sin
+    instanciar modelos ni recorrer los campos de DRF. Si el serializer no se
+    puede compilar, o hay permisos a nivel de objeto, sigue el camino normal.
+    """
+
+    def _columnas_lectura(self, queryset, compilado):
+        anotaciones = list(self.get_serializer_context().get('anotaciones', ()))
+        columnas = compilado.columnas() + anotaciones
+        return queryset.select_related(None).prefetch_related(None), columnas, anotaciones
+
+    def list(self, request, *args, **kwargs):
+        compilado = compilar(self.get_serializer_class())
+        if compilado is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset, columnas, anotaciones = self._columnas_lectura(
+            self.filter_queryset(self.get_queryset()), compilado
+        )
+        # El cursor necesita las columnas de orden aunque el serializer no las muestre
+        campos = {field.name for field in queryset.model._meta.concrete_fields} | set(anotaciones)
+        for campo in _orden_paginacion(self, queryset):
+            if campo in campos and campo not in columnas:
+                columnas.append(campo)
+
+        filas = queryset.values(*columnas)
+        page = self.paginate_queryset(filas)
+        if page is not None:
+            return self.get_paginated_response(compilado.serializar(page, anotaciones))
+        return Response(compilado.serializar(filas, anotaciones))
+
+    def retrieve(self, request, *args, **kwargs):
+        compilado = compilar(self.get_serializer_class())
+        sin_permisos_de_objeto = all(
+            type(permiso).has_object_permission is permissions.BasePermission.has_object_permission
+            for permiso in self.get_permissions()
+        )
+        if compilado is None or not sin_permisos_de_objeto:
+            return super().retrieve(request, *args, **kwargs)
+
+        queryset, columnas, anotaciones = self._columnas_lectura(
+            self.filter_queryset(self.get_queryset()), compilado
+        )
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            fila = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).values(*columnas).first()
+        except (TypeError, ValueError, DjangoValidationError):
+            fila = None
+        if fila is None:
+            raise Http404
+        return Response(compilado.serializar([fila], anotaciones)[0])
+
+
+class SparseFieldsViewSetMixin:
+    """
+    Listados livianos con ?fields= y ?expand=.
+
+    ?fields=a,b devuelve solo esas columnas, leídas con values() sin instanciar
+    modelos; las claves foráneas salen como id. ?expand=rel agrega un bloque
+    'included' con cada objeto relacionado una sola vez, serializado con el
+    serializer que el viewset declara en `expandibles`.
+    Sin esos parámetros el listado responde igual que siempre.
+    """
+    expandibles = {}
+
+    def _parametro_lista(self, nombre):
+        valor = self.request.query_params.get(nombre, '')
+        return [item.strip() for item in valor.split(',') if item.strip()]
+
+    @classmethod
+    def consultas_adicionales(cls, request, accion):
+        """Consultas de ?expand= sobre el presupuesto del listado: una por relación y sus prefetch"""
+        if accion != 'list':
+            return 0
+        consultas = 0
+        for nombre in {item.strip() for item in request.GET.get('expand', '').split(',')}:
+            serializer_class = cls.expandibles.get(nombre)
+            if serializer_class is None:
+                continue
+            relacionados = cls.queryset.model._meta.get_field(nombre).related_model.objects.all()
+            setup_eager_loading = getattr(serializer_class, 'setup_eager_loading', None)
+            if setup_eager_loading is not None:
+                relacionados = setup_eager_loading(relacionados)
+            consultas += 1 + len(relacionados._prefetch_related_lookups)
+        return consultas
+
+    def _columnas_disponibles(self, queryset):
+        # nombre público -> columna de values(); las FK se leen por su attname (pool -> pool_id)
+        columnas = {
+            field.name: field.attname
+            for field in queryset.model._meta.concrete_fields
+        }
+        columnas.update({nombre: nombre for nombre in queryset.query.annotations})
+        return columnas
+
+    def list(self, request, *args, **kwargs):
+        fields = self._parametro_lista('fields')
+        expand = self._parametro_lista('expand')
+        if not fields and not expand:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        disponibles = self._columnas_disponibles(queryset)
+
+        desconocidos = [nombre for nombre in fields if nombre not in disponibles]
+        if desconocidos:
+            raise ValidationError({
+                'fields': f"Campos desconocidos: {', '.join(desconocidos)}. "
+                          f"Disponibles: {', '.join(disponibles)}"
+            })
+        desconocidos = [nombre for nombre in expand if nombre not in self.expandibles]
+        if desconocidos:
+            raise ValidationError({
+                'expand': f"Relaciones desconocidas: {', '.join(desconocidos)}. "
+                          f"Disponibles: {', '.join(self.expandibles)}"
+            })
+
+        # Sin ?fields= se devuelven todas las columnas propias;
+        # las relaciones expandidas siempre van como id en cada fila
+        pedidos = fields or [nombre for nombre in disponibles if nombre not in queryset.query.annotations]
+        pedidos += [nombre for nombre in expand if nombre not in pedidos]
+
+        # El cursor necesita las columnas de orden aunque el cliente no las pida
+        orden = _orden_paginacion(self, queryset)
+        leidos = pedidos + [campo for campo in orden if campo in disponibles and campo not in pedidos]
+
+        filas_qs = queryset.select_related(None).prefetch_related(None).values(
+            *[disponibles[nombre] for nombre in leidos]
+        )
+        page = self.paginate_queryset(filas_qs)
+        # Misma representación que el serializer para cada columna (decimales, fechas)
+        convertidores = compilar_modelo(queryset.model).convertidores()
+        filas = []
+        for fila in (page if page is not None else filas_qs):
+            data = {}
+            for nombre in pedidos:
+                valor = fila[disponibles[nombre]]
+                convertir = convertidores.get(nombre)
+                data[nombre] = valor if valor is None or convertir is None else convertir(valor)
+            filas.append(data)
+
+        if page is not None:
+            response = self.get_paginated_response(filas)
+        else:
+            response = Response({'results': filas} if expand else filas)
+
+        if expand:
+            response.data['included'] = self._incluidos(queryset.model, filas, expand)
+        return response
+
+    def _incluidos(self, model, filas, expand):
+        incluidos = {}
+        for nombre in expand:
+            ids = {fila[nombre] for fila in filas if fila[nombre] is not None}
+            serializer_class = self.expandibles[nombre]
+            relacionados = model._meta.get_field(nombre).related_model.objects.filter(pk__in=ids)
+            setup_eager_loading = getattr(serializer_class, 'setup_eager_loading', None)
+            if setup_eager_loading is not None:
+                relacionados = setup_eager_loading(relacionados)
+            incluidos[nombre] = serializer_class(
+                relacionados, many=True, context=self.get_serializer_context()
+            ).data
+        return incluidos
+
+
+# Columnas calculadas de los pools; los totales salen de la composición precalculada
+ANOTACIONES_POOL = {
+    'conteo_analisis': Coalesce(F('composicion__num_especies'), 0),
+    'total_granos': Coalesce(F('composicion__total_granos'), 0),
+    'num_especies': Coalesce(F('composicion__num_especies'), 0),
+    'analista_nombre': Concat('analista__nombres', Value(' '), 'analista__apellidos'),
+}
+
+
+class ApicultorViewSet(LecturaRapidaViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Apicultor.objects.all()
+    presupuesto_consultas = {'list': 2, 'retrieve': 2, 'apiarios': 3}
     serializer_class = ApicultorSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -44,20 +295,30 @@ class ApicultorViewSet(viewsets.ModelViewSet):
         serializer = ApiarioSerializer(apiarios, many=True)
         return Response(serializer.data)
 
-class AnalistaViewSet(viewsets.ModelViewSet):
+class AnalistaViewSet(LecturaRapidaViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Analista.objects.all()
+    presupuesto_consultas = {'list': 2, 'retrieve': 2, 'muestras': 4}
     serializer_class = AnalistaSerializer
     permission_classes = [permissions.AllowAny]
 
     @action(detail=True, methods=['get'])
     def muestras(self, request, pk=None):
         analista = self.get_object()
-        muestras = Pool.objects.filter(analista=analista)
+        muestras = PoolSerializer.setup_eager_loading(Pool.objects.filter(analista=analista))
         serializer = PoolSerializer(muestras, many=True)
         return Response(serializer.data)
 
-class ApiarioViewSet(viewsets.ModelViewSet):
+class ApiarioViewSet(LecturaRapidaViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
+    """
+    Filtros geográficos (ver modelos/geo.py):
+    ?bbox=lon_min,lat_min,lon_max,lat_max y ?near=lat,lon&radius_km=R.
+    Con near, el listado agrega distancia_km y se pagina por distancia (y por id).
+    """
     queryset = Apiario.objects.all()
+    presupuesto_consultas = {
+        'list': 2, 'retrieve': 2, 'celdas': 5, 'estadisticas': 2, 'estadisticas_por_apicultor': 2, 'tambores': 4,
+    }
+    lecturas_replica = {'celdas', 'estadisticas', 'estadisticas_por_apicultor'}
     permission_classes = [permissions.AllowAny]
 
     def get_serializer_class(self):
@@ -65,49 +326,121 @@ class ApiarioViewSet(viewsets.ModelViewSet):
             return ApiarioDetailSerializer
         return ApiarioSerializer
 
+    def _bbox(self):
+        from .geo import parsear_bbox
+
+        valor = self.request.query_params.get('bbox')
+        if not valor:
+            return None
+        try:
+            return parsear_bbox(valor)
+        except ValueError:
+            raise ValidationError({'bbox': 'Debe ser lon_min,lat_min,lon_max,lat_max en grados'})
+
+    def _cercania(self):
+        """(lat, lon, radio_km) pedidos con ?near= y ?radius_km=, o None"""
+        from .geo import parsear_punto
+
+        if self.request is None or self.action != 'list':
+            return None
+        near = self.request.query_params.get('near')
+        radio = self.request.query_params.get('radius_km')
+        if not near and not radio:
+            return None
+        try:
+            latitud, longitud = parsear_punto(near or '')
+        except ValueError:
+            raise ValidationError({'near': 'Debe ser lat,lon en grados'})
+        try:
+            radio = float(radio)
+        except (TypeError, ValueError):
+            radio = None
+        if radio is None or not 0 < radio <= 20000:
+            raise ValidationError({'radius_km': 'Debe ser un número de kilómetros entre 0 y 20000'})
+        return latitud, longitud, radio
+
+    def get_queryset(self):
+        from .geo import caja_radio, distancia_km, q_caja
+
+        queryset = super().get_queryset()
+        if self.request is None or self.action != 'list':
+            return queryset
+
+        caja = self._bbox()
+        if caja is not None:
+            queryset = queryset.filter(q_caja(caja))
+
+        cercania = self._cercania()
+        if cercania is not None:
+            latitud, longitud, radio = cercania
+            # La caja que contiene el círculo usa el índice; la distancia exacta filtra el resto
+            queryset = queryset.filter(q_caja(caja_radio(latitud, longitud, radio))).annotate(
+                distancia_km=distancia_km(latitud, longitud)
+            ).filter(distancia_km__lte=radio)
+        return queryset
+
+    def get_orden_paginacion(self):
+        """Con ?near= el cursor recorre los apiarios del más cercano al más lejano"""
+        return ('distancia_km', 'id') if self._cercania() is not None else None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self._cercania() is not None:
+            context['anotaciones'] = ['distancia_km']
+        return context
+
+    @action(detail=False, methods=['get'])
+    def celdas(self, request):
+        """
+        Apiarios, humedad y pools agregados por celda de geohash, para mapas de calor.
+        Acepta ?precision=1..8 (5 por defecto, celdas de ~5 km) y ?bbox=
+        """
+        from .services import MapaApiariosService
+
+        precision = request.query_params.get('precision')
+        if precision is not None:
+            if not precision.isdigit() or int(precision) not in MapaApiariosService.PRECISIONES:
+                return Response({'error': 'precision debe ser un entero entre 1 y 8'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            precision = int(precision)
+        return Response(MapaApiariosService.celdas(self._bbox(), precision))
+
     @action(detail=True, methods=['get'])
     def tambores(self, request, pk=None):
         apiario = self.get_object()
-        tambores = MuestraTambor.objects.filter(apiarios=apiario)
+        tambores = MuestraTamborSerializer.setup_eager_loading(MuestraTambor.objects.filter(apiarios=apiario))
         serializer = MuestraTamborSerializer(tambores, many=True)
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
     def estadisticas(self, request, pk=None):
-        apiario = self.get_object()
-        
-        # Estadísticas del apiario
-        stats = {
-            'total_tambores': apiario.tambores.count(),
-            'total_muestras': Pool.objects.filter(tambores__apiarios=apiario).distinct().count(),
-            'analisis_palinologicos': AnalisisPalinologico.objects.filter(
-                pool__tambores__apiarios=apiario
-            ).distinct().count(),
-
-            'especies_encontradas': Especie.objects.filter(
-                analisis_palinologicos__pool__tambores__apiarios=apiario
-            ).distinct().count()
-        }
+        """Tambores, pools, análisis y promedios físico-químicos del apiario, en una consulta"""
+        from .services import EstadisticasApiarioService
 
-        # Análisis físico-químicos del apiario
-        analisis_fq = AnalisisFisicoQuimico.objects.filter(
-            tambor__apiarios=apiario
-        ).aggregate(
-            promedio_humedad=Avg('humedad'),
-            promedio_color=Avg('color')
-        )
+        stats = EstadisticasApiarioService.estadisticas(pk) if str(pk).isdigit() else None
+        if stats is None:
+            raise Http404
+        return Response(stats)
 
-        stats.update(analisis_fq)
+    @action(detail=False, methods=['get'], url_path='estadisticas')
+    def estadisticas_por_apicultor(self, request):
+        """?apicultor=<id>: las estadísticas de cada apiario del apicultor, en una consulta"""
+        from .services import EstadisticasApiarioService
 
-        return Response(stats)
+        apicultor = request.query_params.get('apicultor', '')
+        if not apicultor.isdigit():
+            return Response({'error': 'Debe indicar el id del apicultor con ?apicultor='},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(EstadisticasApiarioService.por_apicultor(int(apicultor)))
 
-class TamborViewSet(viewsets.ModelViewSet):
+class TamborViewSet(LecturaRapidaViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = MuestraTambor.objects.all()
+    presupuesto_consultas = {'list': 3, 'retrieve': 3, 'muestras': 5}
     serializer_class = TamborWithApiariosSerializer
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
-        queryset = MuestraTambor.objects.all()
+        queryset = super().get_queryset()
         # Filtrar por tambores disponibles si se especifica el parámetro
         disponibles = self.request.query_params.get('disponibles', None)
         if disponibles == 'true':
@@ -117,7 +450,7 @@ class TamborViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def muestras(self, request, pk=None):
         tambor = self.get_object()
-        muestras = Pool.objects.filter(tambores=tambor)
+        muestras = PoolSerializer.setup_eager_loading(Pool.objects.filter(tambores=tambor))
         serializer = PoolSerializer(muestras, many=True)
         return Response(serializer.data)
 
@@ -137,8 +470,9 @@ class TamborViewSet(viewsets.ModelViewSet):
         MuestraTambor.objects.filter(id__in=tambor_ids).update(estado_analisis_palinologico=False)
         return Response({'message': f'{len(tambor_ids)} tambores liberados exitosamente'})
 
-class EspecieViewSet(viewsets.ModelViewSet):
+class EspecieViewSet(LecturaRapidaViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Especie.objects.all()
+    presupuesto_consultas = {'list': 2, 'retrieve': 2, 'analisis_palinologicos': 3}
     serializer_class = EspecieSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -149,9 +483,13 @@ class EspecieViewSet(viewsets.ModelViewSet):
         serializer = AnalisisPalinologicoSerializer(analisis, many=True)
         return Response(serializer.data)
 
-class MuestraViewSet(viewsets.ModelViewSet):
+class MuestraViewSet(SparseFieldsViewSetMixin, LecturaRapidaViewSetMixin, AnotacionesViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Pool.objects.all()
+    presupuesto_consultas = {'list': 3, 'retrieve': 4, 'estadisticas': 4}
+    lecturas_replica = {'estadisticas'}
     permission_classes = [permissions.AllowAny]
+    anotaciones = ANOTACIONES_POOL
+    expandibles = {'analista': AnalistaSerializer}
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -161,23 +499,27 @@ class MuestraViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def estadisticas(self, request, pk=None):
         muestra = self.get_object()
-        
-        # Estadísticas de la muestra
+        composicion = PoolComposicion.objects.filter(pool=muestra).first()
+        especies = composicion.especies if composicion else []
+
+        # Estadísticas de la muestra, leídas de la composición precalculada
         stats = {
-            'total_analisis_palinologicos': muestra.analisis_palinologicos.count(),
-            'especies_encontradas': muestra.analisis_palinologicos.values(
-                'especie__nombre_cientifico'
-            ).annotate(
-                total_granos=Sum('cantidad_granos'),
-                porcentaje=Avg('porcentaje')
-            )
+            'total_analisis_palinologicos': composicion.num_especies if composicion else 0,
+            'especies_encontradas': [{
+                'especie__nombre_cientifico': item['especie'],
+                'total_granos': item['cantidad'],
+                'porcentaje': item['porcentaje']
+            } for item in especies]
         }
 
         return Response(stats)
 
-class AnalisisPalinologicoViewSet(viewsets.ModelViewSet):
+class AnalisisPalinologicoViewSet(SparseFieldsViewSetMixin, LecturaRapidaViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = AnalisisPalinologico.objects.all()
+    presupuesto_consultas = {'list': 2, 'retrieve': 2, 'resumen_especies': 2}
+    lecturas_replica = {'resumen_especies'}
     permission_classes = [permissions.AllowAny]
+    expandibles = {'pool': PoolDetailSerializer, 'especie': EspecieSerializer}
     
     def get_serializer_class(self):
         if self.action in ['retrieve', 'list']:
@@ -200,21 +542,20 @@ class AnalisisPalinologicoViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def resumen_especies(self, request):
-        # Resumen de especies más comunes
-        especies = Especie.objects.annotate(
-            total_analisis=Count('analisis_palinologicos'),
-            total_granos=Sum('analisis_palinologicos__cantidad_granos')
-        ).order_by('-total_analisis')[:10]
+        # Resumen de especies más comunes, desde los totales precalculados
+        resumenes = ResumenEspecie.objects.select_related('especie').order_by('-total_analisis')[:10]
 
         return Response([{
-            'especie': especie.nombre_cientifico,
-            'total_analisis': especie.total_analisis,
-            'total_granos': especie.total_granos
-        } for especie in especies])
+            'especie': resumen.especie.nombre_cientifico,
+            'total_analisis': resumen.total_analisis,
+            'total_granos': resumen.total_granos
+        } for resumen in resumenes])
 
-class AnalisisFisicoQuimicoViewSet(viewsets.ModelViewSet):
+class AnalisisFisicoQuimicoViewSet(SparseFieldsViewSetMixin, LecturaRapidaViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = AnalisisFisicoQuimico.objects.all()
+    presupuesto_consultas = {'list': 2, 'retrieve': 3, 'tambor': 4}
     permission_classes = [permissions.AllowAny]
+    expandibles = {'analista': AnalistaSerializer, 'tambor': MuestraTamborSerializer}
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -229,63 +570,46 @@ class AnalisisFisicoQuimicoViewSet(viewsets.ModelViewSet):
 
 class EstadisticasView(APIView):
     permission_classes = [permissions.AllowAny]
+    lecturas_replica = True
     serializer_class = EstadisticasSerializer
 
     def get(self, request):
-        # Obtener estadísticas generales
-        stats = {
-            'total_apicultores': Apicultor.objects.count(),
-            'total_apiarios': Apiario.objects.count(),
-            'total_tambores': MuestraTambor.objects.count(),
-            'total_muestras': Pool.objects.count(),
-            'total_analisis': {
-                'palinologicos': AnalisisPalinologico.objects.count(),
-                'fisicoquimicos': AnalisisFisicoQuimico.objects.count()
-            }
-        }
+        """
+        Estadísticas generales, servidas desde la caché del tablero.
+        ?fresh=1 recalcula todo; la cabecera X-Cache-Age indica la antigüedad en segundos
+        """
+        from .services import DashboardService
+
+        fresh = request.query_params.get('fresh') in ('1', 'true')
+        datos, edad = DashboardService.obtener(fresh=fresh)
+        response = Response(datos)
+        response['X-Cache-Age'] = str(edad)
+        return response
+
+class SeriesEstadisticasView(APIView):
+    """Series mensuales o anuales de humedad y color, leídas de SerieFisicoQuimica"""
+    permission_classes = [permissions.AllowAny]
+    lecturas_replica = True
 
-        # Estadísticas de muestras por mes
-        # Eliminar estadísticas por fecha_extraccion del Pool, ya que ahora es atributo del tambor
-        muestras_por_mes = []
-
-        # Estadísticas de análisis por especie
-        analisis_por_especie = AnalisisPalinologico.objects.values(
-            'especie__nombre_cientifico'
-        ).annotate(
-            total=Count('id'),
-            promedio_granos=Avg('cantidad_granos')
-        ).order_by('-total')[:10]
-
-        # Estadísticas de humedad por apiario
-        humedad_por_apiario = AnalisisFisicoQuimico.objects.values(
-            'tambor__apiarios__nombre_apiario'
-        ).annotate(
-            promedio_humedad=Avg('humedad')
-        ).order_by('-promedio_humedad')
-
-        # Estadísticas de los últimos 30 días
-        fecha_limite = timezone.now() - timedelta(days=30)
-        stats['ultimos_30_dias'] = {
-            'muestras_nuevas': Pool.objects.filter(
-                created_at__gte=fecha_limite
-            ).count(),
-            'analisis_nuevos': {
-                'palinologicos': AnalisisPalinologico.objects.filter(
-                    created_at__gte=fecha_limite
-                ).count(),
-                'fisicoquimicos': AnalisisFisicoQuimico.objects.filter(
-                    created_at__gte=fecha_limite
-                ).count()
-            }
-        }
+    def get(self, request):
+        """
+        ?agrupacion=apiario|localidad|apicultor|total&periodo=mes|anio
+        &fecha_desde=&fecha_hasta= (inicio del período) &clave= (repetible)
+        """
+        from .services import SerieFisicoQuimicaService
+
+        parametros = SeriesEstadisticasSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        datos = parametros.validated_data
+        series = SerieFisicoQuimicaService.series(
+            datos['agrupacion'].upper(),
+            datos['periodo'].upper(),
+            desde=datos.get('fecha_desde'),
+            hasta=datos.get('fecha_hasta'),
+            claves=datos.get('clave'),
+        )
+        return Response({'agrupacion': datos['agrupacion'], 'periodo': datos['periodo'], 'series': series})
 
-        return Response({
-            'estadisticas_generales': stats,
-            'muestras_por_mes': list(muestras_por_mes),
-            'analisis_por_especie': list(analisis_por_especie),
-            'humedad_por_apiario': list(humedad_por_apiario)
-        }) 
-        
 class ContadorView(APIView):
     """Vista para el contador de muestras"""
     permission_classes = [permissions.IsAuthenticated]
@@ -303,8 +627,9 @@ class ContadorView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class ContienePoolViewSet(viewsets.ModelViewSet):
+class ContienePoolViewSet(LecturaRapidaViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = ContienePool.objects.all()
+    presupuesto_consultas = {'list': 2, 'retrieve': 2, 'pool': 4}
     serializer_class = ContienePoolSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -314,8 +639,9 @@ class ContienePoolViewSet(viewsets.ModelViewSet):
         serializer = PoolSerializer(contiene_pool.pool)
         return Response(serializer.data)
 
-class TamborApiarioViewSet(viewsets.ModelViewSet):
+class TamborApiarioViewSet(LecturaRapidaViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = TamborApiario.objects.all()
+    presupuesto_consultas = {'list': 2, 'retrieve': 2, 'apiario': 3}
     serializer_class = TamborApiarioSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -323,14 +649,50 @@ class TamborApiarioViewSet(viewsets.ModelViewSet):
     def apiario(self, request, pk=None):
         tambor_apiario = self.get_object()
         serializer = ApiarioSerializer(tambor_apiario.apiario)
+        return Response(serializer.data)
 
-class PoolViewSet(viewsets.ModelViewSet):
+class PoolViewSet(SparseFieldsViewSetMixin, LecturaRapidaViewSetMixin, AnotacionesViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Pool.objects.all()
+    presupuesto_consultas = {'list': 3, 'retrieve': 3, 'estadisticas': 2, 'similares': 6, 'stats': 3}
+    lecturas_replica = {'estadisticas', 'stats'}
     serializer_class = PoolSerializer
     permission_classes = [permissions.AllowAny]
+    anotaciones = ANOTACIONES_POOL
+    expandibles = {'analista': AnalistaSerializer, 'especie_dominante': EspecieSerializer}
 
     def get_queryset(self):
-        queryset = Pool.objects.select_related('analista').all()
+        """
+        Filtros por clasificación: ?tipo_floral=MONOFLORAL&especie_dominante=3
+        y ?fecha_desde=AAAA-MM-DD&fecha_hasta=AAAA-MM-DD sobre la fecha de análisis
+        """
+        queryset = super().get_queryset()
+        if self.request is None:
+            return queryset
+        params = self.request.query_params
+
+        tipo_floral = params.get('tipo_floral')
+        if tipo_floral:
+            if tipo_floral not in dict(Pool.TIPO_FLORAL_CHOICES):
+                raise ValidationError({'tipo_floral': 'Debe ser MONOFLORAL o MULTIFLORAL'})
+            queryset = queryset.filter(tipo_floral=tipo_floral)
+
+        especie_dominante = params.get('especie_dominante')
+        if especie_dominante:
+            if not especie_dominante.isdigit():
+                raise ValidationError({'especie_dominante': 'Debe ser el id de una especie'})
+            queryset = queryset.filter(especie_dominante_id=int(especie_dominante))
+
+        for param, lookup in (('fecha_desde', 'fecha_analisis__gte'), ('fecha_hasta', 'fecha_analisis__lte')):
+            valor = params.get(param)
+            if not valor:
+                continue
+            try:
+                fecha = parse_date(valor)
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                raise ValidationError({param: 'Debe tener el formato AAAA-MM-DD'})
+            queryset = queryset.filter(**{lookup: fecha})
         return queryset
 
     @action(detail=True, methods=['get'])
@@ -339,6 +701,284 @@ class PoolViewSet(viewsets.ModelViewSet):
         from .services import get_pool_stats_response
         return get_pool_stats_response(pk)
 
+    @action(detail=True, methods=['post', 'put'], url_path='analisis-palinologicos/bulk')
+    def analisis_palinologicos_bulk(self, request, pk=None):
+        """
+        Guarda el conteo completo del pool en una transacción.
+        Body: {"conteos": [{"especie": 1, "cantidad_granos": 120, "marca_especial": "#"}, ...]}
+        Las especies que no figuran en el conteo se eliminan del pool.
+        """
+        from .services import ConteoPolenService
+
+        pool = get_object_or_404(Pool, pk=pk)
+        serializer = ConteosPoolSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        resultado = ConteoPolenService.guardar_conteos(pool.id, serializer.validated_data['conteos'])
+        return Response(resultado)
+
+    @action(detail=False, methods=['post'], url_path='with-tambores')
+    def with_tambores(self, request):
+        """
+        Crea un pool y le asigna sus tambores en una sola transacción.
+        Body: campos del pool + {"tambor_ids": [1, 2], "fecha_asociacion": "AAAA-MM-DD"}
+        """
+        from .services import PoolService, TamboresNoDisponibles
+
+        serializer = PoolConTamboresSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = dict(serializer.validated_data)
+        tambor_ids = datos.pop('tambor_ids')
+        fecha_asociacion = datos.pop('fecha_asociacion', None)
+
+        try:
+            pool = PoolService.crear_con_tambores(datos, tambor_ids, fecha_asociacion)
+        except TamboresNoDisponibles as e:
+            return Response({'error': str(e), 'tambores_no_disponibles': e.tambor_ids},
+                            status=status.HTTP_409_CONFLICT)
+
+        return Response(PoolSerializer(pool).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def similares(self, request, pk=None):
+        """
+        Pools con composición polínica más parecida a la de este pool.
+        Acepta ?k=10 (máximo 100) y ?metrica=coseno|bray-curtis
+        """
+        from .services import SimilitudService
+
+        parametros = SimilitudSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        pool = get_object_or_404(Pool.objects.only('id', 'num_registro'), pk=pk)
+        resultados = SimilitudService.similares_a_pool(pool.id, **parametros.validated_data)
+        if resultados is None:
+            return Response({'error': 'El pool no tiene análisis palinológicos cargados'},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'pool_id': pool.id,
+            'num_registro': pool.num_registro,
+            'metrica': parametros.validated_data['metrica'],
+            'resultados': resultados,
+        })
+
+    @action(detail=False, methods=['post'], url_path='similares')
+    def similares_a_perfil(self, request):
+        """
+        Pools con composición más parecida a un perfil de referencia.
+        Body: {"perfil": [{"especie": 1, "cantidad_granos": 120}, ...], "k": 10, "metrica": "coseno"}
+        """
+        from .services import SimilitudService
+
+        serializer = PerfilSimilitudSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        cantidades = {item['especie']: item['cantidad_granos'] for item in datos['perfil']}
+        if not any(cantidades.values()):
+            return Response({'error': 'El perfil debe tener al menos un grano contado'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'metrica': datos['metrica'],
+            'resultados': SimilitudService.similares_a_perfil(cantidades, datos['k'], datos['metrica']),
+        })
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Estadísticas de muchos pools en una sola respuesta.
+        Acepta ?ids=1,2,3 y/o ?fecha_desde=AAAA-MM-DD&fecha_hasta=AAAA-MM-DD
+        """
+        from .services import get_bulk_pool_stats_response
+
+        pool_ids = None
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                pool_ids = [int(pool_id) for pool_id in ids.split(',') if pool_id.strip()]
+            except ValueError:
+                return Response({'error': 'ids debe ser una lista de enteros separados por coma'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        fechas = {}
+        for param in ('fecha_desde', 'fecha_hasta'):
+            valor = request.query_params.get(param)
+            if not valor:
+                continue
+            try:
+                fechas[param] = parse_date(valor)
+            except ValueError:
+                fechas[param] = None
+            if fechas[param] is None:
+                return Response({'error': f'{param} debe tener el formato AAAA-MM-DD'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        return get_bulk_pool_stats_response(pool_ids, **fechas)
+
+class ReglaClasificacionViewSet(LecturaRapidaViewSetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
+    """Umbrales por especie para la clasificación monofloral; al cambiarlos se reclasifican los pools"""
+    queryset = ReglaClasificacion.objects.all()
+    presupuesto_consultas = {'list': 2, 'retrieve': 2}
+    serializer_class = ReglaClasificacionSerializer
+    permission_classes = [permissions.AllowAny]
+
+class ExportarAnalisisView(APIView):
+    """
+    Exportación en streaming de análisis en CSV o NDJSON.
+    Filtros: ?fecha_desde=AAAA-MM-DD&fecha_hasta=AAAA-MM-DD y listas de ids
+    separadas por coma en ?apiario=, ?apicultor= y ?especie=
+    """
+    permission_classes = [permissions.AllowAny]
+    lecturas_replica = True
+    tipo = None
+
+    def get(self, request, formato):
+        from .services import ExportacionService
+
+        filtros = {}
+        for param in ('fecha_desde', 'fecha_hasta'):
+            valor = request.query_params.get(param)
+            if not valor:
+                continue
+            try:
+                filtros[param] = parse_date(valor)
+            except ValueError:
+                filtros[param] = None
+            if filtros[param] is None:
+                return Response({'error': f'{param} debe tener el formato AAAA-MM-DD'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        for param, filtro in (('apiario', 'apiarios'), ('apicultor', 'apicultores'), ('especie', 'especies')):
+            valor = request.query_params.get(param)
+            if not valor:
+                continue
+            try:
+                filtros[filtro] = [int(item) for item in valor.split(',') if item.strip()]
+            except ValueError:
+                return Response({'error': f'{param} debe ser una lista de enteros separados por coma'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        if self.tipo == 'palinologico':
+            queryset = ExportacionService.analisis_palinologicos(**filtros)
+            columnas = ExportacionService.COLUMNAS_PALINOLOGICO
+            nombre = 'analisis-palinologicos'
+        else:
+            queryset = ExportacionService.analisis_fisicoquimicos(**filtros)
+            columnas = ExportacionService.COLUMNAS_FISICOQUIMICO
+            nombre = 'analisis-fisicoquimicos'
+
+        return ExportacionService.respuesta(queryset, columnas, formato, nombre)
+
+class ImportarTemporadaView(APIView):
+    """
+    Importación de una temporada desde un archivo .csv o .xlsx (campo 'archivo').
+    ?dry_run=1 solo valida. Devuelve lo creado y los errores por fila
+    """
+    permission_classes = [permissions.AllowAny]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        from .services import ImportacionTemporadaService
+
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response({'error': "Falta el archivo en el campo 'archivo'"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        try:
+            resultado = ImportacionTemporadaService.importar(
+                ImportacionTemporadaService.leer_filas(archivo, archivo.name),
+                dry_run=dry_run
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(resultado)
+
+class ReportePoolView(APIView):
+    """
+    Reporte PDF de un pool, servido desde la caché en disco si no cambió nada.
+    Acepta ?solicitante=, ?observacion=, ?fecha_cosecha= y ?tipo= para el encabezado;
+    con los tres primeros (texto libre) el PDF se arma en cada pedido y no se guarda
+    """
+    permission_classes = [permissions.AllowAny]
+    lecturas_replica = True
+
+    def get(self, request, pool_id):
+        from .services import ReportePoolService
+
+        tipo = request.query_params.get('tipo')
+        if tipo and tipo not in ('MONOFLORAL', 'MULTIFLORAL'):
+            return Response({'error': 'tipo debe ser MONOFLORAL o MULTIFLORAL'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        extras = {
+            campo: request.query_params.get(campo)
+            for campo in ('solicitante', 'observacion', 'fecha_cosecha', 'tipo')
+        }
+        nombre = f'reporte_palinologico_{pool_id}.pdf'
+
+        if any(extras[campo] for campo in extras if campo not in ReportePoolService.EXTRAS_CACHEABLES):
+            contenido = ReportePoolService.renderizar_sin_cache(pool_id, extras)
+            if contenido is None:
+                return Response({'error': 'Pool no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+            return FileResponse(io.BytesIO(contenido), content_type='application/pdf', filename=nombre)
+
+        rutas = ReportePoolService.obtener_pdfs([pool_id], extras)
+        if pool_id not in rutas:
+            return Response({'error': 'Pool no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(rutas[pool_id], 'rb'), content_type='application/pdf', filename=nombre)
+
+class ReportesPoolsView(APIView):
+    """
+    ZIP con los reportes PDF de los pools analizados entre
+    ?fecha_desde=AAAA-MM-DD y ?fecha_hasta=AAAA-MM-DD (o de ?ids=1,2,3)
+    """
+    permission_classes = [permissions.AllowAny]
+    lecturas_replica = True
+
+    def get(self, request):
+        from .services import ReportePoolService
+
+        pools = Pool.objects.all()
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                pools = pools.filter(id__in=[int(pool_id) for pool_id in ids.split(',') if pool_id.strip()])
+            except ValueError:
+                return Response({'error': 'ids debe ser una lista de enteros separados por coma'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        for param, lookup in (('fecha_desde', 'fecha_analisis__gte'), ('fecha_hasta', 'fecha_analisis__lte')):
+            valor = request.query_params.get(param)
+            if not valor:
+                continue
+            try:
+                fecha = parse_date(valor)
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                return Response({'error': f'{param} debe tener el formato AAAA-MM-DD'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            pools = pools.filter(**{lookup: fecha})
+
+        if not any(request.query_params.get(param) for param in ('ids', 'fecha_desde', 'fecha_hasta')):
+            return Response({'error': 'Indicar ids o un rango de fechas (fecha_desde, fecha_hasta)'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        nombres = {
+            pool_id: f'reporte_palinologico_{num_registro or pool_id}.pdf'
+            for pool_id, num_registro in pools.order_by('id').values_list('id', 'num_registro')
+        }
+        if not nombres:
+            return Response({'error': 'No hay pools en el rango indicado'}, status=status.HTTP_404_NOT_FOUND)
+
+        rutas = ReportePoolService.obtener_pdfs(list(nombres))
+        return FileResponse(
+            ReportePoolService.comprimir(rutas, nombres),
+            content_type='application/zip',
+            as_attachment=True,
+            filename='reportes_palinologicos.zip'
+        )
+
+@lectura_replica
 def pool_stats(request, pool_id):
     """
     Obtiene estadísticas de un pool específico para visualizaciones
@@ -348,15 +988,11 @@ def pool_stats(request, pool_id):
     return get_pool_stats_response(pool_id)
 
 
-# Health check endpoint para AWS ALB
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
+def metricas(request):
+    """Métricas de los requests en formato Prometheus, solo para las IPs de METRICAS_IPS"""
+    from django.conf import settings
+    from .instrumentacion import registro
 
-@csrf_exempt
-def health_check(request):
-    """Endpoint de health check para AWS Application Load Balancer"""
-    return JsonResponse({
-        "status": "healthy", 
-        "service": "apicola_lab",
-        "timestamp": timezone.now().isoformat()
-    })
\ No newline at end of file
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICAS_IPS', ()):
+        raise Http404
+    return HttpResponse(registro.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,27 @@
+"""
+Suite de rendimiento: reproduce los patrones de llamadas del frontend.
+
+Sobre una base dedicada (nunca la de producción):
+
+    python manage.py generar_datos                 # ~500k tambores, ~100k pools
+    python manage.py medir_rendimiento --historial rendimiento.jsonl
+
+medir_rendimiento corre los escenarios en proceso, con el cliente de pruebas
+de Django, y por cada request informa p50/p99 de latencia y consultas SQL;
+--historial agrega el resultado a un archivo JSON Lines para comparar entre
+commits.
+
+Las herramientas de carga están en requirements-dev.txt. Los mismos
+escenarios como benchmarks de pytest-benchmark, que guardan cada corrida y
+fallan si un escenario empeora respecto de la anterior:
+
+    pytest rendimiento/bench_escenarios.py --benchmark-autosave
+    pytest rendimiento/bench_escenarios.py --benchmark-compare --benchmark-compare-fail=median:10%
+
+Para carga concurrente contra un servidor real:
+
+    locust -f rendimiento/locustfile.py --host http://localhost:8000
+
+Locust informa la latencia por request; las consultas las lee de la
+cabecera Server-Timing que agrega InstrumentacionMiddleware.
+"""
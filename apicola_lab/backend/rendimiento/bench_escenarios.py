@@ -0,0 +1,78 @@
+"""
+Benchmarks con pytest-benchmark de los escenarios de escenarios.py, en proceso
+
+    pytest rendimiento/bench_escenarios.py --benchmark-autosave
+    pytest rendimiento/bench_escenarios.py --benchmark-compare --benchmark-compare-fail=median:10%
+
+Corre contra la base configurada (la de generar_datos), no contra una base
+de pruebas: el nombre del archivo no sigue el patrón test_*.py para que un
+`pytest` sin argumentos no lo recoja. --benchmark-compare compara con la
+corrida guardada anterior y, con --benchmark-compare-fail, falla si un
+escenario empeora. El comando medir_rendimiento mide lo mismo, con p50/p99 y
+consultas por request de cada llamada.
+"""
+import json
+import os
+import random
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apicola_lab.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import DatabaseError  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+
+from rendimiento.escenarios import ESCENARIOS, preparar  # noqa: E402
+
+
+def ejecutar(client, escenario):
+    """Recorre el generador del escenario; devuelve lo que retorne (preparar devuelve los datos)"""
+    respuesta = None
+    while True:
+        try:
+            nombre, metodo, url, cuerpo = escenario.send(respuesta)
+        except StopIteration as fin:
+            return fin.value
+        if metodo == 'GET':
+            response = client.get(url)
+        else:
+            response = client.generic(metodo, url, json.dumps(cuerpo), content_type='application/json')
+        # Las respuestas en streaming hacen sus consultas mientras se leen
+        contenido = b''.join(response.streaming_content) if response.streaming else response.content
+        assert response.status_code < 400, f"{metodo} {url} respondió {response.status_code}: {contenido[:500]!r}"
+        respuesta = json.loads(contenido) if contenido else None
+
+
+@pytest.fixture(scope='module')
+def client():
+    setup_test_environment()
+    yield Client()
+    teardown_test_environment()
+
+
+@pytest.fixture(scope='module')
+def datos(client):
+    try:
+        datos = ejecutar(client, preparar())
+    except DatabaseError as e:
+        pytest.skip(f'Sin base para medir: {e}')
+    if not datos['pool_ids']:
+        pytest.skip('No hay pools con conteos: generar datos con manage.py generar_datos')
+    return datos
+
+
+@pytest.mark.parametrize('nombre', sorted(ESCENARIOS))
+def test_escenario(benchmark, client, datos, nombre):
+    _, escenario = ESCENARIOS[nombre]
+    rng = random.Random(42)
+    # Las vueltas de calentamiento llenan las cachés y la matriz de similitud
+    benchmark.pedantic(
+        lambda: ejecutar(client, escenario(datos, rng)), rounds=20, warmup_rounds=2, iterations=1
+    )
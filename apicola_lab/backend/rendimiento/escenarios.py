@@ -0,0 +1,86 @@
+"""
+Escenarios de carga: las llamadas que hace el frontend, en el mismo orden.
+
+Cada escenario es un generador que produce (nombre, método, url, cuerpo) y
+recibe, con send(), el JSON de la respuesta anterior. Así lo pueden
+reproducir tanto el comando medir_rendimiento (en proceso, con el cliente de
+pruebas de Django) como locustfile.py (por HTTP contra un servidor), sin
+depender de Django ni de Locust.
+
+`datos` es lo que devuelve preparar(): ids de pools con conteos cargados,
+leídos de la API al empezar.
+"""
+
+# Pools de los que se toman ids para los escenarios
+URL_POOLS = '/api/pools/?fields=id,tipo_floral&page_size=500'
+
+
+def listado(nombre, url):
+    """Todas las filas de un listado, siguiendo 'next' como obtenerTodos (frontend/src/api/listados.js)"""
+    filas = []
+    while url:
+        pagina = yield (nombre, 'GET', url, None)
+        filas += pagina['results']
+        url = pagina['next']
+    return filas
+
+
+def preparar():
+    """Lee los ids de pools con conteos (tipo_floral calculado)"""
+    pools = yield from listado('preparar', URL_POOLS)
+    return {
+        'pool_ids': [pool['id'] for pool in pools if pool.get('tipo_floral')],
+    }
+
+
+def graficas_global(datos, rng):
+    """GraficasConsultas sin pool: el scatter global con las estadísticas de todos los pools"""
+    yield ('pools/stats', 'GET', '/api/pools/stats/', None)
+
+
+def graficas_pool(datos, rng):
+    """GraficasConsultas de un pool"""
+    pool_id = rng.choice(datos['pool_ids'])
+    yield ('pool/<id>/stats', 'GET', f'/api/pool/{pool_id}/stats/', None)
+
+
+def lista_muestras(datos, rng):
+    """ListaMuestras: todos los pools con sus conteos y el nombre del analista"""
+    yield from listado('muestras', '/api/muestras/?with=conteo_analisis,analista_nombre&page_size=500')
+
+
+def estadisticas(datos, rng):
+    """Reportes y ReportesFisicoquimico: el tablero de estadísticas"""
+    yield ('estadisticas', 'GET', '/api/estadisticas/', None)
+
+
+def contador_polen(datos, rng):
+    """ContadorPolen: carga las especies y guarda el conteo completo de un pool"""
+    especies = yield from listado('especies', '/api/especies/?page_size=500')
+    pool_id = rng.choice(datos['pool_ids'])
+    elegidas = rng.sample(especies, min(len(especies), rng.randint(10, 40)))
+    conteos = [{'especie': especie['id'], 'cantidad_granos': rng.randint(1, 300)} for especie in elegidas]
+    yield ('pools/<id>/analisis-palinologicos/bulk', 'POST',
+           f'/api/pools/{pool_id}/analisis-palinologicos/bulk/', {'conteos': conteos})
+
+
+# Nombre -> (peso relativo en la mezcla de Locust, escenario)
+ESCENARIOS = {
+    'graficas_global': (1, graficas_global),
+    'graficas_pool': (4, graficas_pool),
+    'lista_muestras': (3, lista_muestras),
+    'estadisticas': (3, estadisticas),
+    'contador_polen': (2, contador_polen),
+}
+
+
+def consultas_server_timing(valor):
+    """Cantidad de consultas de la cabecera Server-Timing (ver modelos/instrumentacion.py), o None"""
+    for metrica in (valor or '').split(','):
+        partes = [parte.strip() for parte in metrica.split(';')]
+        if partes[0] != 'db':
+            continue
+        for parte in partes[1:]:
+            if parte.startswith('desc='):
+                return int(parte[len('desc='):].strip('"').split()[0])
+    return None
@@ -0,0 +1,62 @@
+"""
+Carga concurrente con Locust sobre los escenarios de escenarios.py
+
+    locust -f rendimiento/locustfile.py --host http://localhost:8000
+
+Al terminar imprime p50/p99 de consultas por request, leídas de la
+cabecera Server-Timing.
+"""
+import random
+import statistics
+from collections import defaultdict
+
+from locust import HttpUser, between, events
+
+from escenarios import ESCENARIOS, consultas_server_timing, preparar
+
+
+# Nombre de request -> consultas de cada respuesta
+consultas_por_request = defaultdict(list)
+
+
+class UsuarioFrontend(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        self.rng = random.Random()
+        self.datos = self._ejecutar(preparar())
+
+    def _ejecutar(self, escenario):
+        respuesta = None
+        while True:
+            try:
+                nombre, metodo, url, cuerpo = escenario.send(respuesta)
+            except StopIteration as fin:
+                return fin.value
+            response = self.client.request(metodo, url, json=cuerpo, name=nombre)
+            consultas = consultas_server_timing(response.headers.get('Server-Timing'))
+            if consultas is not None:
+                consultas_por_request[f"{metodo} {nombre}"].append(consultas)
+            respuesta = response.json() if response.content else None
+
+
+def _tarea(escenario):
+    def ejecutar(usuario):
+        usuario._ejecutar(escenario(usuario.datos, usuario.rng))
+    ejecutar.__name__ = escenario.__name__
+    return ejecutar
+
+
+UsuarioFrontend.tasks = {_tarea(escenario): peso for peso, escenario in ESCENARIOS.values()}
+
+
+@events.test_stop.add_listener
+def informar_consultas(environment, **kwargs):
+    print(f"{'request':<50} {'n':>6} {'p50':>6} {'p99':>6}  (consultas)")
+    for nombre, valores in sorted(consultas_por_request.items()):
+        if len(valores) > 1:
+            percentiles = statistics.quantiles(valores, n=100, method='inclusive')
+            p50, p99 = percentiles[49], percentiles[98]
+        else:
+            p50 = p99 = valores[0]
+        print(f"{nombre:<50} {len(valores):>6} {p50:>6.1f} {p99:>6.1f}")
@@ -0,0 +1,39 @@
+import axios from 'axios';
+
+// Filas por página al recorrer un listado completo (max_page_size del backend)
+const TAMANO_PAGINA = 500;
+
+/**
+ * Trae todas las filas de un listado de la API siguiendo los cursores.
+ *
+ * Los listados vienen paginados ({ next, previous, results }). Con ?expand=
+ * cada página trae además su bloque 'included'; se juntan sin repetir objetos.
+ * Devuelve { results, included }.
+ */
+export const obtenerListado = async (url, config) => {
+  const separador = url.includes('?') ? '&' : '?';
+  let siguiente = url.includes('page_size=') ? url : `${url}${separador}page_size=${TAMANO_PAGINA}`;
+  const results = [];
+  const included = {};
+
+  while (siguiente) {
+    const { data } = await axios.get(siguiente, config);
+    results.push(...data.results);
+    Object.entries(data.included || {}).forEach(([relacion, objetos]) => {
+      const porId = included[relacion] || new Map();
+      objetos.forEach(objeto => porId.set(objeto.id, objeto));
+      included[relacion] = porId;
+    });
+    siguiente = data.next;
+  }
+
+  return {
+    results,
+    included: Object.fromEntries(
+      Object.entries(included).map(([relacion, porId]) => [relacion, Array.from(porId.values())])
+    )
+  };
+};
+
+/** Todas las filas de un listado, como arreglo */
+export const obtenerTodos = async (url, config) => (await obtenerListado(url, config)).results;
@@ -21,6 +21,7 @@ import {
   Tooltip
 } from '@chakra-ui/react';
 import { ViewIcon } from '@chakra-ui/icons';
+import { obtenerTodos } from '../../api/listados';
 
 const ListaPools = () => {
   const navigate = useNavigate();
@@ -37,14 +38,7 @@ const ListaPools = () => {
   const fetchPools = async () => {
     try {
       setLoading(true);
-      const response = await fetch(`${API_URL}/api/pools/`);
-      
-      if (!response.ok) {
-        throw new Error(`Error ${response.status}: ${response.statusText}`);
-      }
-      
-      const result = await response.json();
-      setPools(result);
+      setPools(await obtenerTodos(`${API_URL}/api/pools/`));
     } catch (err) {
       setError(err.message);
     } finally {
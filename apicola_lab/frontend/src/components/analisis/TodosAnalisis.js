@@ -11,7 +11,7 @@ import {
   Badge
 } from '@chakra-ui/react';
 import { useNavigate } from 'react-router-dom';
-import axios from 'axios';
+import { obtenerTodos } from '../../api/listados';
 
 const API_URL = process.env.REACT_APP_API_URL;
 
@@ -32,13 +32,13 @@ const TodosAnalisis = () => {
       try {
         // Obtener muestras palinológicas y fisicoquímicas
         const [palinoRes, fisicoRes, analistasRes] = await Promise.all([
-          axios.get(`${API_URL}/api/muestras/`),
-          axios.get(`${API_URL}/api/analisis-fisicoquimicos/`),
-          axios.get(`${API_URL}/api/analistas/`)
+          obtenerTodos(`${API_URL}/api/muestras/`),
+          obtenerTodos(`${API_URL}/api/analisis-fisicoquimicos/`),
+          obtenerTodos(`${API_URL}/api/analistas/`)
         ]);
 
         // Procesar muestras palinológicas
-        const muestrasPalino = palinoRes.data.map(muestra => ({
+        const muestrasPalino = palinoRes.map(muestra => ({
           ...muestra,
           tipo: 'Palinológico',
           id_muestra: muestra.id,
@@ -47,7 +47,7 @@ const TodosAnalisis = () => {
         }));
 
         // Procesar muestras fisicoquímicas
-        const muestrasFisico = fisicoRes.data.map(muestra => ({
+        const muestrasFisico = fisicoRes.map(muestra => ({
           ...muestra,
           tipo: 'Fisicoquímico',
           id_muestra: muestra.id,
@@ -59,7 +59,7 @@ const TodosAnalisis = () => {
         const todasLasMuestras = [...muestrasPalino, ...muestrasFisico];
 
         setMuestras(todasLasMuestras);
-        setAnalistas(analistasRes.data);
+        setAnalistas(analistasRes);
 
         // Extraer estudios únicos
         const estudiosUnicos = [...new Set(todasLasMuestras.map(m => m.estudio))];
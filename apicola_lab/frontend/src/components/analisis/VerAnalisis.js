@@ -22,7 +22,7 @@ import {
 } from '@chakra-ui/react';
 import { ArrowBackIcon, RepeatIcon } from '@chakra-ui/icons';
 import { useColorModeValue } from '@chakra-ui/react';
-import axios from 'axios';
+import { obtenerListado } from '../../api/listados';
 
 const API_URL = process.env.REACT_APP_API_URL;
 
@@ -57,8 +57,17 @@ const VerAnalisis = () => {
     try {
       // Agregar timestamp para evitar caché sin usar headers problemáticos
       const timestamp = new Date().getTime();
-      const response = await axios.get(`${API_URL}/api/analisis-palinologicos/?_t=${timestamp}`);
-      setAnalisis(response.data);
+      // Filas planas, página por página; cada pool y especie llega una sola vez en 'included'
+      const { results, included } = await obtenerListado(
+        `${API_URL}/api/analisis-palinologicos/?fields=pool,especie,cantidad_granos,marca_especial&expand=pool,especie&_t=${timestamp}`
+      );
+      const poolsPorId = new Map(included.pool.map(pool => [pool.id, pool]));
+      const especiesPorId = new Map(included.especie.map(especie => [especie.id, especie]));
+      setAnalisis(results.map(item => ({
+        ...item,
+        pool: poolsPorId.get(item.pool) || item.pool,
+        especie: especiesPorId.get(item.especie) || null
+      })));
     } catch (err) {
       setError('Error al cargar los análisis: ' + (err.response?.data ? JSON.stringify(err.response.data) : err.message));
     } finally {
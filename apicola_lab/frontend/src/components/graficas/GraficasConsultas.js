@@ -15,7 +15,6 @@ const GraficasConsultas = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [globalScatter, setGlobalScatter] = useState(null);
-  const [pools, setPools] = useState([]);
   
   const API_URL = process.env.REACT_APP_API_URL;
 
@@ -50,22 +49,11 @@ const GraficasConsultas = () => {
       setLoading(true);
       setError(null);
 
-      const poolsRes = await fetch(`${API_URL}/api/pools/`);
-      if (!poolsRes.ok) throw new Error(`Error ${poolsRes.status}: ${poolsRes.statusText}`);
-      const poolsJson = await poolsRes.json();
-      setPools(poolsJson);
-
-      const stats = await Promise.all(
-        poolsJson.map(async (p) => {
-          try {
-            const res = await fetch(`${API_URL}/api/pool/${p.id}/stats/`);
-            if (!res.ok) return null;
-            return res.json();
-          } catch (_e) {
-            return null;
-          }
-        })
-      );
+      // Un solo request con las estadísticas de todos los pools
+      const statsRes = await fetch(`${API_URL}/api/pools/stats/`);
+      if (!statsRes.ok) throw new Error(`Error ${statsRes.status}: ${statsRes.statusText}`);
+      const statsJson = await statsRes.json();
+      const stats = Object.values(statsJson);
 
       const agregados = new Map();
       stats.forEach((st) => {
@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import { Box, Button, Flex, Text, VStack, Input, Textarea, FormControl, FormLabel, Select as ChakraSelect, useToast, Badge, HStack, IconButton, SimpleGrid } from '@chakra-ui/react';
 import { CheckCircleIcon, CloseIcon } from '@chakra-ui/icons';
 import axios from 'axios';
+import { obtenerTodos } from '../../api/listados';
 
 const API_URL = process.env.REACT_APP_API_URL;
 
@@ -24,13 +25,13 @@ const AgregarMuestra = () => {
 
   useEffect(() => {
     // Obtener la lista de analistas
-    axios.get(`${API_URL}/api/analistas/`)
-      .then(res => setAnalistas(res.data))
+    obtenerTodos(`${API_URL}/api/analistas/`)
+      .then(setAnalistas)
       .catch(err => setError('Error al cargar analistas: ' + (err.response?.data ? JSON.stringify(err.response.data) : err.message)));
     
     // Obtener solo tambores disponibles (estado_analisis_palinologico = false)
-    axios.get(`${API_URL}/api/tambores/?disponibles=true`)
-      .then(res => setTambores(res.data))
+    obtenerTodos(`${API_URL}/api/tambores/?disponibles=true`)
+      .then(setTambores)
       .catch(err => setError('Error al cargar tambores: ' + (err.response?.data ? JSON.stringify(err.response.data) : err.message)));
   }, []);
 
@@ -86,25 +87,12 @@ const AgregarMuestra = () => {
     }
    
     try {
-      // Crear el pool (muestra)
-      const res = await axios.post(`${API_URL}/api/muestras/`, form);
-      const poolId = res.data.id;
-      
-      // Asociar tambores al pool y actualizar su estado
-      await Promise.all(selectedTambores.map(tamborId =>
-        axios.post(`${API_URL}/api/contiene-pool/`, {
-          pool: poolId,
-          tambor: tamborId,
-          fecha_asociacion: form.fecha_analisis
-        })
-      ));
-
-      // Actualizar el estado de los tambores a True (asignados)
-      await Promise.all(selectedTambores.map(tamborId =>
-        axios.patch(`${API_URL}/api/tambores/${tamborId}/`, {
-          estado_analisis_palinologico: true
-        })
-      ));
+      // Crear el pool, asociar los tambores y marcarlos como asignados en un solo request
+      await axios.post(`${API_URL}/api/pools/with-tambores/`, {
+        ...form,
+        tambor_ids: selectedTambores.map(id => parseInt(id)),
+        fecha_asociacion: form.fecha_analisis || null
+      });
 
       toast({
         title: 'Grupo creado',
@@ -120,8 +108,8 @@ const AgregarMuestra = () => {
       setSelectedTambores([]);
       
       // Recargar tambores disponibles
-      axios.get(`${API_URL}/api/tambores/?disponibles=true`)
-        .then(res => setTambores(res.data))
+      obtenerTodos(`${API_URL}/api/tambores/?disponibles=true`)
+        .then(setTambores)
         .catch(err => console.error('Error al recargar tambores:', err));
 
     } catch (err) {
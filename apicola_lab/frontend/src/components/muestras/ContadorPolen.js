@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { Box, VStack, HStack, Text, IconButton, SimpleGrid, useBreakpointValue, Button, Alert, AlertIcon, Center, Checkbox, Heading, Select } from '@chakra-ui/react';
 import { AddIcon, MinusIcon, ArrowBackIcon } from '@chakra-ui/icons';
 import axios from 'axios';
+import { obtenerTodos } from '../../api/listados';
 import { useParams, useNavigate } from 'react-router-dom';
 
 const API_URL = process.env.REACT_APP_API_URL;
@@ -26,10 +27,10 @@ const ContadorPolen = () => {
   const columns = useBreakpointValue({ base: 1, md: 1 });
 
   useEffect(() => {
-    axios.get(`${API_URL}/api/especies/`)
-      .then(res => {
+    obtenerTodos(`${API_URL}/api/especies/`)
+      .then(especies => {
         // Ordenar alfabéticamente por nombre_cientifico
-        const especiesOrdenadas = res.data.sort((a, b) => a.nombre_cientifico.localeCompare(b.nombre_cientifico));
+        const especiesOrdenadas = especies.sort((a, b) => a.nombre_cientifico.localeCompare(b.nombre_cientifico));
         setEspecies(especiesOrdenadas);
       })
       .catch(err => setError('Error al cargar especies: ' + (err.response?.data ? JSON.stringify(err.response.data) : err.message)));
@@ -87,6 +88,7 @@ const ContadorPolen = () => {
     }
     
     try {
+      const conteosAGuardar = [];
       for (let especie of especiesSeleccionadas) {
         const cantidad = conteos[especie.id] || 0;
         const marcaEspecial = marcasEspeciales[especie.id] || '';
@@ -100,7 +102,6 @@ const ContadorPolen = () => {
         
         // Preparar los datos para guardar
         const datosAGuardar = {
-          pool: parseInt(id), // Convertir a entero
           especie: parseInt(especie.id), // Convertir a entero
           cantidad_granos: parseInt(cantidad) // Convertir a entero
         };
@@ -110,10 +111,11 @@ const ContadorPolen = () => {
           datosAGuardar.marca_especial = marcaEspecial;
         }
         
-        console.log('Enviando datos:', datosAGuardar); // Debug
-        
-        await axios.post(`${API_URL}/api/analisis-palinologicos/`, datosAGuardar);
+        conteosAGuardar.push(datosAGuardar);
       }
+
+      // Un solo request guarda todo el conteo del pool en una transacción
+      await axios.post(`${API_URL}/api/pools/${parseInt(id)}/analisis-palinologicos/bulk/`, { conteos: conteosAGuardar });
       setSuccess(true);
       setTimeout(() => navigate('/muestras'), 1200);
     } catch (err) {
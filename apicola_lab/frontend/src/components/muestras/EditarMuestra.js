@@ -3,6 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom';
 import { Box, Button, Flex, Text, VStack, HStack, Heading, SimpleGrid, IconButton, Alert, AlertIcon, Center, Select } from '@chakra-ui/react';
 import { AddIcon, MinusIcon, ArrowBackIcon, EditIcon, CheckIcon } from '@chakra-ui/icons';
 import axios from 'axios';
+import { obtenerTodos } from '../../api/listados';
 
 const API_URL = process.env.REACT_APP_API_URL;
 
@@ -26,22 +27,22 @@ const EditarMuestra = () => {
 
   useEffect(() => {
     // Cargar especies y análisis actuales
-    axios.get(`${API_URL}/api/especies/`)
-      .then(res => setEspecies(res.data))
+    obtenerTodos(`${API_URL}/api/especies/`)
+      .then(setEspecies)
       .catch(err => setError('Error al cargar especies: ' + (err.response?.data ? JSON.stringify(err.response.data) : err.message)));
     axios.get(`${API_URL}/api/muestras/${id}/`)
       .then(res => {
         setFechaAnalisis(res.data.fecha_analisis || '');
       })
       .catch(() => setFechaAnalisis(''));
-    axios.get(`${API_URL}/api/analisis-palinologicos/?pool=${id}`)
-      .then(res => {
-        setAnalisis(res.data);
+    obtenerTodos(`${API_URL}/api/analisis-palinologicos/?pool=${id}`)
+      .then(analisisPool => {
+        setAnalisis(analisisPool);
         // Extraer solo los IDs de las especies, no los objetos completos
-        setEspeciesSeleccionadas(res.data.map(a => a.especie.id || a.especie));
+        setEspeciesSeleccionadas(analisisPool.map(a => a.especie.id || a.especie));
         const conteosMap = {};
         const marcasMap = {};
-        res.data.forEach(a => {
+        analisisPool.forEach(a => {
           const especieId = a.especie.id || a.especie;
           conteosMap[especieId] = a.cantidad_granos;
           marcasMap[especieId] = a.marca_especial || '';
@@ -96,58 +97,22 @@ const EditarMuestra = () => {
     setError('');
     setSuccess(false);
     try {
-      // 1. Actualizar o crear análisis para especies seleccionadas
-      for (let especieId of especiesSeleccionadas) {
-        const cantidad = conteos[especieId] || 0;
+      // Un solo request: crea, actualiza y elimina (especies deseleccionadas) en una transacción
+      const conteosAGuardar = especiesSeleccionadas.map((especieId) => {
+        const datos = {
+          especie: parseInt(especieId),
+          cantidad_granos: parseInt(conteos[especieId] || 0)
+        };
         const marcaEspecial = marcasEspeciales[especieId] || '';
         
-        // Buscar análisis existente comparando IDs de especies
-        const analisisExistente = analisis.find(a => {
-          const aEspecieId = a.especie.id || a.especie;
-          return aEspecieId === especieId;
-        });
-        
-        if (analisisExistente) {
-          // PUT para actualizar - solo enviar los campos que se están actualizando
-          const datosActualizacion = {
-            cantidad_granos: parseInt(cantidad)
-          };
-          
-          // Solo agregar marca_especial si tiene valor
-          if (marcaEspecial && marcaEspecial.trim() !== '') {
-            datosActualizacion.marca_especial = marcaEspecial;
-          }
-          
-          console.log('Actualizando análisis:', analisisExistente.id, "datos actualizacion", datosActualizacion);
-          
-          await axios.put(`${API_URL}/api/analisis-palinologicos/${analisisExistente.id}/`, datosActualizacion);
-        } else {
-          // POST para crear - asegurar que especie sea solo el ID
-          const datosCreacion = {
-            pool: parseInt(id),
-            especie: parseInt(especieId),
-            cantidad_granos: parseInt(cantidad)
-          };
-          
-          // Solo agregar marca_especial si tiene valor
-          if (marcaEspecial && marcaEspecial.trim() !== '') {
-            datosCreacion.marca_especial = marcaEspecial;
-          }
-          
-          console.log('Creando nuevo análisis:', datosCreacion);
-          
-          await axios.post(`${API_URL}/api/analisis-palinologicos/`, datosCreacion);
+        // Solo agregar marca_especial si tiene valor
+        if (marcaEspecial && marcaEspecial.trim() !== '') {
+          datos.marca_especial = marcaEspecial;
         }
-      }
+        return datos;
+      });
       
-      // 2. Eliminar análisis de especies que fueron deseleccionadas
-      for (let a of analisis) {
-        const aEspecieId = a.especie.id || a.especie;
-        if (!especiesSeleccionadas.some(e => e === aEspecieId)) {
-          console.log('Eliminando análisis:', a.id);
-          await axios.delete(`${API_URL}/api/analisis-palinologicos/${a.id}/`);
-        }
-      }
+      await axios.post(`${API_URL}/api/pools/${parseInt(id)}/analisis-palinologicos/bulk/`, { conteos: conteosAGuardar });
       
       setSuccess(true);
       setTimeout(() => navigate('/muestras'), 1200);
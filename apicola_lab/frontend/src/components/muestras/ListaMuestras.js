@@ -1,43 +1,21 @@
 import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Box, Button, Flex, Text, VStack, HStack } from '@chakra-ui/react';
-import axios from 'axios';
+import { obtenerTodos } from '../../api/listados';
 
 const API_URL = process.env.REACT_APP_API_URL;
 
 const ListaMuestras = () => {
   const [muestras, setMuestras] = useState([]);
-  const [analistas, setAnalistas] = useState([]);
-  const [analisisPorPool, setAnalisisPorPool] = useState({}); // { poolId: true/false }
   const navigate = useNavigate();
 
   useEffect(() => {
-    axios.get(`${API_URL}/api/muestras/`)
-      .then(res => {
-        setMuestras(res.data);
-        // Por cada muestra, consultar si tiene análisis palinológico
-        res.data.forEach(muestra => {
-          axios.get(`${API_URL}/api/analisis-palinologicos/?pool=${muestra.id}`)
-            .then(resp => {
-              setAnalisisPorPool(prev => ({ ...prev, [muestra.id]: resp.data.length > 0 }));
-            })
-            .catch(() => {
-              setAnalisisPorPool(prev => ({ ...prev, [muestra.id]: false }));
-            });
-        });
-      })
+    // El conteo de análisis y el nombre del analista vienen calculados en la misma respuesta
+    obtenerTodos(`${API_URL}/api/muestras/?with=conteo_analisis,analista_nombre`)
+      .then(setMuestras)
       .catch(err => console.error('Error al cargar muestras:', err));
-    axios.get(`${API_URL}/api/analistas/`)
-      .then(res => setAnalistas(res.data))
-      .catch(err => console.error('Error al cargar analistas:', err));
   }, []);
 
-  // Función para obtener el nombre completo del analista por ID
-  const getNombreAnalista = (id) => {
-    const analista = analistas.find(a => a.id === id);
-    return analista ? `${analista.nombres} ${analista.apellidos || ''}` : id;
-  };
-
   // Ordenar por fecha de análisis descendente
   const muestrasOrdenadas = [...muestras].sort((a, b) => (b.fecha_analisis || '').localeCompare(a.fecha_analisis || ''));
 
@@ -57,13 +35,13 @@ const ListaMuestras = () => {
           {muestrasOrdenadas.map(muestra => (
             <HStack key={muestra.id} w="100%" justify="space-between">
               <Text>
-                <b>ID:</b> {muestra.id} | <b>Analista:</b> {getNombreAnalista(muestra.analista)} | <b>Fecha análisis:</b> {muestra.fecha_analisis}
+                <b>ID:</b> {muestra.id} | <b>Analista:</b> {muestra.analista_nombre || muestra.analista} | <b>Fecha análisis:</b> {muestra.fecha_analisis}
               </Text>
               <Button 
-                colorScheme={analisisPorPool[muestra.id] ? 'yellow' : 'green'} 
+                colorScheme={muestra.conteo_analisis > 0 ? 'yellow' : 'green'} 
                 onClick={() => navigate(`/editar-muestra/${muestra.id}`)}
               >
-                {analisisPorPool[muestra.id] ? 'Editar conteo' : 'Iniciar conteo'}
+                {muestra.conteo_analisis > 0 ? 'Editar conteo' : 'Iniciar conteo'}
               </Button>
             </HStack>
           ))}
@@ -46,6 +46,7 @@ import {
 } from '@chakra-ui/icons';
 import { useColorModeValue } from '@chakra-ui/react';
 import axios from 'axios';
+import { obtenerListado, obtenerTodos } from '../../api/listados';
 
 const API_URL = process.env.REACT_APP_API_URL;
 
@@ -91,13 +92,15 @@ const ReportePorcentajes = () => {
     setLoading(true);
     setError('');
     try {
-      // Obtener análisis palinológicos con información de pool y especie
       const timestamp = new Date().getTime();
-      const response = await axios.get(`${API_URL}/api/analisis-palinologicos/?_t=${timestamp}`);
-      setAnalisis(response.data);
-      
+      // Solo ids por fila, página por página; cada pool llega una vez en 'included'
+      const { results, included } = await obtenerListado(
+        `${API_URL}/api/analisis-palinologicos/?fields=pool&expand=pool&_t=${timestamp}`
+      );
+      setAnalisis(results);
+
       // Extraer pools únicos de los análisis
-      const poolsUnicos = extraerPoolsUnicos(response.data);
+      const poolsUnicos = extraerPoolsUnicos(included.pool.map(pool => ({ pool })));
       setPools(poolsUnicos);
     } catch (err) {
       setError('Error al cargar los datos: ' + (err.response?.data ? JSON.stringify(err.response.data) : err.message));
@@ -140,8 +143,7 @@ const ReportePorcentajes = () => {
   const cargarAnalisisPool = async (poolId) => {
     try {
       const timestamp = new Date().getTime();
-      const response = await axios.get(`${API_URL}/api/analisis-palinologicos/?pool=${poolId}&_t=${timestamp}`);
-      setPoolAnalisis(response.data);
+      setPoolAnalisis(await obtenerTodos(`${API_URL}/api/analisis-palinologicos/?pool=${poolId}&_t=${timestamp}`));
     } catch (err) {
       toast({
         title: 'Error',
@@ -178,141 +180,28 @@ const ReportePorcentajes = () => {
   const handleDescargarPDF = () => {
     const exportar = async () => {
       try {
-        const [{ jsPDF }, autoTableModule] = await Promise.all([
-          import('jspdf'),
-          import('jspdf-autotable')
-        ]);
-
-        const doc = new jsPDF({ unit: 'pt' });
-        const pageWidth = doc.internal.pageSize.getWidth();
-
-        // Título
-        doc.setFontSize(16);
-        doc.text('Reporte Melisopalinológico', pageWidth / 2, 40, { align: 'center' });
-
-        // Información del Estudio
-        doc.setFontSize(11);
-        const infoLines = [
-          `Estudio ID: ${selectedPool?.id ?? 'N/A'}`,
-          `Protocolo/ID: ${selectedPool?.num_registro || `Pool ${selectedPool?.id}`}`,
-          `Fecha de Análisis: ${selectedPool?.fecha_analisis ? new Date(selectedPool.fecha_analisis).toLocaleDateString('es-ES', { timeZone: 'UTC' }) : 'Sin fecha'}`,
-          `Analista: ${selectedPool?.analista ? `${selectedPool.analista.nombres || ''} ${selectedPool.analista.apellidos || ''}`.trim() || 'N/A' : 'N/A'}`,
-          `Solicitante: ${solicitante || '—'}`,
-          `Fecha de Cosecha: ${fechaCosecha ? new Date(fechaCosecha).toLocaleDateString('es-ES', { timeZone: 'UTC' }) : (sugeridaFechaCosecha ? new Date(sugeridaFechaCosecha).toLocaleDateString('es-ES', { timeZone: 'UTC' }) : '—')}`,
-          `Tipo (selección): ${tipoSeleccionado || determinarTipoFloral.tipo}`,
-          `Observación: ${observacion || '—'}`
-        ];
-        let y = 70;
-        infoLines.forEach((linea) => {
-          doc.text(linea, 40, y);
-          y += 16;
-        });
-
-        // Sección de Tambores del Estudio
-        const tambores = Array.isArray(selectedPool?.tambores) ? selectedPool.tambores : [];
-        if (tambores.length > 0) {
-          y += 10;
-          doc.setFontSize(12);
-          doc.text('Tambores que componen la muestra', 40, y);
-          y += 6;
-
-          const headersTambores = [[
-            'ID Tambor',
-            'Código',
-            'Apiario(s)',
-            'Apicultor',
-            'Fecha de Extracción',
-            'Observaciones'
-          ]];
-
-          const rowsTambores = tambores.map(t => {
-            const nombresApiarios = Array.isArray(t?.apiarios) && t.apiarios.length > 0
-              ? t.apiarios.map(a => a?.nombre_apiario || a?.nombre || '').filter(Boolean).join(', ')
-              : (t?.apiario?.nombre || t?.apiario_nombre || t?.apiario || '—');
-            const primerApiario = Array.isArray(t?.apiarios) && t.apiarios.length > 0 ? t.apiarios[0] : null;
-            const apicultorNombre = primerApiario?.apicultor
-              ? `${primerApiario.apicultor.nombre || ''} ${primerApiario.apicultor.apellido || ''}`.trim() || '—'
-              : (t?.apicultor_nombre || t?.productor || '—');
-            const fechaRaw = t?.fecha_de_extraccion || t?.fecha_extraccion;
-            const fechaExt = fechaRaw ? new Date(fechaRaw).toLocaleDateString('es-ES', { timeZone: 'UTC' }) : '—';
-            return [
-              String(t?.id ?? '—'),
-              String(t?.codigo || t?.numero || t?.identificador || '—'),
-              String(nombresApiarios || '—'),
-              String(apicultorNombre),
-              String(fechaExt),
-              String(t?.observaciones || '—')
-            ];
-          });
-
-          autoTableModule.default(doc, {
-            head: headersTambores,
-            body: rowsTambores,
-            startY: y + 10,
-            styles: { fontSize: 9 },
-            headStyles: { fillColor: [49, 130, 206] },
-            bodyStyles: { valign: 'middle' },
-            columnStyles: {
-              0: { cellWidth: 70 },
-              1: { cellWidth: 80 },
-              2: { cellWidth: 120 },
-              3: { cellWidth: 140 },
-              4: { cellWidth: 90 },
-              5: { cellWidth: 'auto' }
-            }
-          });
-
-          y = doc.lastAutoTable?.finalY ? doc.lastAutoTable.finalY + 10 : y + 20;
-        }
-
-        // Tabla de especies
-        const headers = [['Nombre Científico', 'Nombre Vulgar', 'Familia', 'Cantidad', 'Porcentaje']];
-        const rows = calcularPorcentajesPool.map(e => [
-          e.nombre_cientifico,
-          e.nombre_comun,
-          e.familia,
-          String(e.cantidad_granos),
-          `${e.porcentaje.toFixed(1)}%`
-        ]);
-
-        autoTableModule.default(doc, {
-          head: headers,
-          body: rows,
-          startY: y + 10,
-          styles: { fontSize: 9 },
-          headStyles: { fillColor: [49, 130, 206] },
-        });
-
-        // Tabla de especies con marca especial (si existe)
-        if (calcularMarcasEspecialesPool.length > 0) {
-          const startYMarcas = (doc.lastAutoTable?.finalY || y) + 20;
-          doc.setFontSize(12);
-          doc.text('Especies con marca especial (no incluidas en % de miel)', 40, startYMarcas);
-
-          const headersMarcas = [['Nombre Científico', 'Nombre Vulgar', 'Familia', 'Cantidad', 'Marca Especial']];
-          const rowsMarcas = calcularMarcasEspecialesPool.map(e => [
-            e.nombre_cientifico,
-            e.nombre_comun,
-            e.familia,
-            String(e.cantidad_granos),
-            e.marca_especial || '—'
-          ]);
-
-          autoTableModule.default(doc, {
-            head: headersMarcas,
-            body: rowsMarcas,
-            startY: startYMarcas + 10,
-            styles: { fontSize: 9 },
-            headStyles: { fillColor: [156, 81, 182] },
-          });
-        }
-
-        doc.save(`reporte_palinologico_${selectedPool?.id || 'estudio'}.pdf`);
+        // El PDF se arma en el servidor y se sirve desde su caché si el pool no cambió
+        const params = new URLSearchParams();
+        if (solicitante) params.append('solicitante', solicitante);
+        if (observacion) params.append('observacion', observacion);
+        if (fechaCosecha || sugeridaFechaCosecha) params.append('fecha_cosecha', fechaCosecha || sugeridaFechaCosecha);
+        if (tipoSeleccionado) params.append('tipo', tipoSeleccionado);
+
+        const response = await axios.get(
+          `${API_URL}/api/pools/${selectedPool.id}/reporte.pdf?${params.toString()}`,
+          { responseType: 'blob' }
+        );
+        const url = window.URL.createObjectURL(response.data);
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = `reporte_palinologico_${selectedPool.id}.pdf`;
+        link.click();
+        window.URL.revokeObjectURL(url);
       } catch (err) {
         toast({
-          title: 'Dependencias faltantes para PDF',
-          description: 'Instala: npm i jspdf jspdf-autotable',
-          status: 'warning',
+          title: 'Error',
+          description: 'No se pudo generar el PDF',
+          status: 'error',
           duration: 5000,
           isClosable: true,
         });
@@ -505,14 +394,23 @@ const ReportePorcentajes = () => {
     }));
   }, [poolAnalisis]);
 
-  // Determinar si es monofloral o multifloral
+  // Determinar si es monofloral o multifloral: la clasificación la calcula el
+  // backend con los umbrales por especie; el 45% local queda como respaldo
   const determinarTipoFloral = useMemo(() => {
     if (!calcularPorcentajesPool.length) return { tipo: 'N/A', descripcion: 'Sin datos suficientes' };
     
-    const especieDominante = calcularPorcentajesPool[0];
-    const porcentajeDominante = especieDominante.porcentaje;
+    const clasificada = selectedPool?.tipo_floral
+      ? calcularPorcentajesPool.find(e => e.id === selectedPool.especie_dominante)
+      : null;
+    const especieDominante = clasificada || calcularPorcentajesPool[0];
+    const porcentajeDominante = clasificada
+      ? parseFloat(selectedPool.porcentaje_dominante)
+      : especieDominante.porcentaje;
+    const esMonofloral = clasificada
+      ? selectedPool.tipo_floral === 'MONOFLORAL'
+      : porcentajeDominante > 45;
     
-    if (porcentajeDominante > 45) {
+    if (esMonofloral) {
       return {
         tipo: 'MONOFLORAL',
         descripcion: `Miel monofloral de ${especieDominante.nombre_cientifico} (${porcentajeDominante.toFixed(1)}%)`,
@@ -527,7 +425,7 @@ const ReportePorcentajes = () => {
         porcentaje: porcentajeDominante
       };
     }
-  }, [calcularPorcentajesPool]);
+  }, [calcularPorcentajesPool, selectedPool]);
 
   // Calcular sugerencia de Fecha de Cosecha a partir de fechas de extracción de tambores
   useEffect(() => {
@@ -978,7 +876,7 @@ const ReportePorcentajes = () => {
                       <Badge colorScheme="purple" variant="subtle" mr={2}>
                         📊 Criterio
                       </Badge>
-                      Monofloral: {'>'}45% de una especie | Multifloral: ≤45% de todas las especies
+                      Monofloral: {'>'}45% de una especie (o el umbral propio de la especie) | Multifloral: ninguna lo supera
                     </Text>
                   </VStack>
                 </VStack>